@@ -0,0 +1,185 @@
+"""
+Admission Controller Module - Batasi pipeline !sn (scrape + AI) per user dan per guild
+Setiap user hanya boleh punya 1 pipeline aktif/menunggu, setiap guild dibatasi N pipeline paralel,
+dan antrian dilayani round-robin antar guild sehingga satu server yang ramai tidak menambah
+latency server lain. Antrian penuh langsung ditolak (fast reject) daripada menumpuk request.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from core.logger import logger
+
+SN_MAX_CONCURRENT = int(os.getenv("SN_MAX_CONCURRENT", "8"))  # Pipeline paralel global
+SN_GUILD_CONCURRENCY = int(os.getenv("SN_GUILD_CONCURRENCY", "3"))  # Pipeline paralel per guild
+SN_GUILD_QUEUE = int(os.getenv("SN_GUILD_QUEUE", "5"))  # Antrian maksimal per guild
+SN_MAX_QUEUE = int(os.getenv("SN_MAX_QUEUE", "30"))  # Antrian maksimal global
+SN_QUEUE_TIMEOUT = float(os.getenv("SN_QUEUE_TIMEOUT", "30"))  # Detik menunggu sebelum menyerah
+
+REJECT_MESSAGES = {
+    "user_busy": "⏳ Request kamu sebelumnya masih diproses, tunggu sebentar ya!",
+    "guild_busy": "🚦 Server ini lagi rame banget, coba lagi beberapa detik lagi ya!",
+    "queue_full": "🚦 Bot lagi sibuk banget, coba lagi beberapa detik lagi ya!",
+    "timeout": "⌛ Antrian terlalu lama, coba lagi sebentar lagi ya!",
+}
+
+
+class AdmissionRejected(Exception):
+    """Request !sn ditolak admission controller"""
+
+    def __init__(self, reason):
+        super().__init__(f"Admission rejected: {reason}")
+        self.reason = reason
+        self.user_message = REJECT_MESSAGES.get(reason, REJECT_MESSAGES["queue_full"])
+
+
+class AdmissionTicket:
+    """Satu pipeline !sn yang aktif atau menunggu"""
+
+    __slots__ = ("user_id", "guild_key", "future", "enqueued_at")
+
+    def __init__(self, user_id, guild_key):
+        self.user_id = user_id
+        self.guild_key = guild_key
+        self.future = None
+        self.enqueued_at = time.monotonic()
+
+
+class AdmissionController:
+    """Per-user limit 1 + per-guild cap + fair queue (round-robin antar guild)"""
+
+    def __init__(self, max_concurrent=SN_MAX_CONCURRENT, per_guild=SN_GUILD_CONCURRENCY,
+                 guild_queue=SN_GUILD_QUEUE, max_queue=SN_MAX_QUEUE, queue_timeout=SN_QUEUE_TIMEOUT):
+        self.max_concurrent = max_concurrent
+        self.per_guild = per_guild
+        self.guild_queue = guild_queue
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._guild_active = {}  # {guild_key: jumlah pipeline aktif}
+        self._users = set()  # User dengan pipeline aktif atau menunggu
+        self._queues = OrderedDict()  # {guild_key: deque[AdmissionTicket]} - urutan = giliran round-robin
+        self.stats = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected_user_busy": 0,
+            "rejected_guild_busy": 0,
+            "rejected_queue_full": 0,
+            "rejected_timeout": 0,
+            "total_wait": 0.0,
+            "waited": 0,
+            "max_depth": 0,
+        }
+
+    @staticmethod
+    def guild_key(guild_id, user_id):
+        # DM diperlakukan sebagai "guild" sendiri per user
+        return guild_id if guild_id is not None else f"dm:{user_id}"
+
+    def queue_depth(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _reject(self, reason):
+        self.stats[f"rejected_{reason}"] += 1
+        raise AdmissionRejected(reason)
+
+    def _start(self, ticket):
+        self._active += 1
+        self._guild_active[ticket.guild_key] = self._guild_active.get(ticket.guild_key, 0) + 1
+        self.stats["admitted"] += 1
+
+    def _dispatch(self):
+        """Isi slot kosong: guild pertama (giliran round-robin) yang masih di bawah cap-nya"""
+        while self._active < self.max_concurrent and self._queues:
+            for guild_key, queue in self._queues.items():
+                if self._guild_active.get(guild_key, 0) < self.per_guild:
+                    break
+            else:
+                return  # Semua guild yang menunggu sudah mentok cap per guild
+            ticket = queue.popleft()
+            if queue:
+                self._queues.move_to_end(guild_key)  # Guild ini ke belakang giliran
+            else:
+                del self._queues[guild_key]
+            if ticket.future.done():
+                continue  # Waiter sudah timeout/cancel
+            self._start(ticket)
+            self.stats["total_wait"] += time.monotonic() - ticket.enqueued_at
+            self.stats["waited"] += 1
+            ticket.future.set_result(True)
+
+    def _dequeue(self, ticket):
+        queue = self._queues.get(ticket.guild_key)
+        if queue and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del self._queues[ticket.guild_key]
+
+    async def acquire(self, user_id, guild_id):
+        """Return AdmissionTicket (panggil release setelah selesai) atau raise AdmissionRejected"""
+        if user_id in self._users:
+            self._reject("user_busy")
+        ticket = AdmissionTicket(user_id, self.guild_key(guild_id, user_id))
+
+        guild_active = self._guild_active.get(ticket.guild_key, 0)
+        if (self._active < self.max_concurrent and guild_active < self.per_guild
+                and ticket.guild_key not in self._queues):
+            self._users.add(user_id)
+            self._start(ticket)
+            return ticket
+
+        guild_waiting = len(self._queues.get(ticket.guild_key, ()))
+        if guild_waiting >= self.guild_queue:
+            self._reject("guild_busy")
+        if self.queue_depth() >= self.max_queue:
+            self._reject("queue_full")
+
+        ticket.future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(ticket.guild_key, deque()).append(ticket)
+        self._users.add(user_id)
+        self.stats["queued"] += 1
+        self.stats["max_depth"] = max(self.stats["max_depth"], self.queue_depth())
+
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket.future), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if ticket.future.done():
+                return ticket  # Slot diberikan tepat saat timeout
+            ticket.future.cancel()
+            self._dequeue(ticket)
+            self._users.discard(user_id)
+            logger.warning(f"!sn admission timeout: user {user_id} guild {ticket.guild_key}")
+            self._reject("timeout")
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                self.release(ticket)
+            else:
+                ticket.future.cancel()
+                self._dequeue(ticket)
+                self._users.discard(user_id)
+            raise
+        return ticket
+
+    def release(self, ticket):
+        self._active -= 1
+        remaining = self._guild_active.get(ticket.guild_key, 1) - 1
+        if remaining > 0:
+            self._guild_active[ticket.guild_key] = remaining
+        else:
+            self._guild_active.pop(ticket.guild_key, None)
+        self._users.discard(ticket.user_id)
+        self._dispatch()
+
+    def get_metrics(self):
+        waited = self.stats["waited"]
+        return {
+            "active": self._active,
+            "max_concurrent": self.max_concurrent,
+            "per_guild": self.per_guild,
+            "active_guilds": len(self._guild_active),
+            "queue_depth": self.queue_depth(),
+            "waiting_guilds": len(self._queues),
+            "max_queue": self.max_queue,
+            "avg_wait": round(self.stats["total_wait"] / waited, 2) if waited else 0.0,
+            **{key: value for key, value in self.stats.items() if key not in ("total_wait", "waited")},
+        }
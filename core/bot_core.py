@@ -1,12 +1,20 @@
 """
 Bot Core Module - Menangani inisialisasi bot dan konfigurasi utama
 """
+import asyncio
 import os
+import time
 import discord
 from discord.ext import commands
 import pandas as pd
 import redis
 from core.logger import logger
+from utils.cache_codec import wrap_redis
+from utils.cache_keys import namespace_generations
+from utils.local_cache import wrap_local_cache
+from core.sharding import shard_config_from_env, is_primary_worker, publish_shard_status
+from core.startup_profiler import startup_profiler, KIND_NETWORK
+from core.loop_monitor import loop_monitor
 try:
     from patch.smart_detector import SmartKPopDetector
 except ImportError:
@@ -57,17 +65,31 @@ class BotCore:
         self.REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
         self.STATUS_CHANNEL_ID = os.getenv("STATUS_CHANNEL_ID")  # Single channel for status messages
         
-        # Redis connection
-        self.redis_client = redis.from_url(self.REDIS_URL)
+        # Redis connection (value besar dikompres transparan oleh cache codec, L1 cache per worker di depannya)
+        self.redis_client = wrap_local_cache(wrap_redis(redis.from_url(self.REDIS_URL)))
+        namespace_generations.attach(self.redis_client)  # Generation cache namespace dibaca dari Redis
         
         # Initialize Database Manager (PostgreSQL + CSV fallback)
-        self.db_manager = DatabaseManager()
+        with startup_profiler.phase("db_load"):
+            self.db_manager = DatabaseManager()
         
         # Load K-pop database (fallback untuk compatibility)
-        self.kpop_df = self._get_legacy_dataframe()
+        with startup_profiler.phase("legacy_dataframe"):
+            self.kpop_df = self._get_legacy_dataframe()
         
         # Initialize K-pop detector
-        self.kpop_detector = SmartKPopDetector(self.kpop_df)
+        with startup_profiler.phase("detector_index"):
+            self.kpop_detector = SmartKPopDetector(self.kpop_df)
+        
+        # Sharding (AutoShardedBot / worker process dari launcher)
+        self.sharded, self.shard_count, self.shard_ids, self.worker_id = shard_config_from_env()
+        self._shard_status_task = None
+        
+        # Health server (aiohttp) di loop bot, dipasang oleh main.py; monotonic saat gateway putus
+        self.health_server = None
+        self.disconnected_since = None
+        # Coroutine function tanpa argumen, di-await saat loop bot berhenti (tutup session aiohttp, dll)
+        self.shutdown_hooks = []
         
         # Initialize Discord bot
         self.bot = self._create_bot()
@@ -111,7 +133,8 @@ class BotCore:
             }
             import requests
             from io import StringIO
-            response = requests.get(github_url, headers=headers)
+            with startup_profiler.phase("github_csv_fetch", KIND_NETWORK):
+                response = requests.get(github_url, headers=headers)
             response.raise_for_status()
             df = pd.read_csv(StringIO(response.text))
             logger.info(f"Emergency GitHub CSV fallback: {len(df)} records")
@@ -123,7 +146,8 @@ class BotCore:
         try:
             if self.KPOP_CSV_ID:
                 csv_url = f"https://docs.google.com/spreadsheets/d/{self.KPOP_CSV_ID}/export?format=csv&gid=0"
-                response = requests.get(csv_url, headers=headers)
+                with startup_profiler.phase("sheet_csv_fetch", KIND_NETWORK):
+                    response = requests.get(csv_url, headers=headers)
                 response.raise_for_status()
                 df = pd.read_csv(StringIO(response.text))
                 logger.info(f"Environment CSV fallback: {len(df)} records")
@@ -153,7 +177,7 @@ class BotCore:
         intents.message_content = True
         intents.guilds = True
         
-        self.bot = commands.Bot(
+        bot_options = dict(
             command_prefix='!', 
             intents=intents,
             heartbeat_timeout=60.0,  # Increase from default 30s
@@ -161,6 +185,17 @@ class BotCore:
             max_messages=1000
         )
         
+        if self.sharded:
+            # Worker launcher: shard_ids = range milik worker ini dari shard_count total
+            if self.shard_count:
+                bot_options["shard_count"] = self.shard_count
+            if self.shard_ids:
+                bot_options["shard_ids"] = self.shard_ids
+            self.bot = commands.AutoShardedBot(**bot_options)
+            logger.info(f"🧩 AutoShardedBot worker {self.worker_id}: shards {self.shard_ids or 'auto'} / {self.shard_count or 'auto'}")
+        else:
+            self.bot = commands.Bot(**bot_options)
+        
         # Add connection event handlers
         @self.bot.event
         async def on_ready():
@@ -169,19 +204,25 @@ class BotCore:
         @self.bot.event
         async def on_disconnect():
             logger.warning("🔴 Bot disconnected from Discord")
+            if self.disconnected_since is None:
+                self.disconnected_since = time.monotonic()
         
         @self.bot.event
         async def on_resumed():
             logger.info("🟢 Bot connection resumed")
+            self.disconnected_since = None
         
         @self.bot.event
         async def on_connect():
             logger.info("🔗 Bot connected to Discord gateway")
+            self.disconnected_since = None
+            loop_monitor.start()  # Lag sampler (+ block detector jika LOOP_BLOCK_DEBUG) di loop bot
         
         return self.bot
     
     async def _on_bot_ready(self):
         """Handle bot ready event with Discord status message"""
+        self.disconnected_since = None
         try:
             import random
             
@@ -203,6 +244,22 @@ class BotCore:
             logger.info(f"🤖 Bot logged in as {self.bot.user}")
             logger.info("🟢 Bot is ready and online!")
             
+            # Startup profile (STARTUP_PROFILE=true): process start -> gateway ready
+            if "gateway_ready" not in startup_profiler.marks:
+                startup_profiler.mark("gateway_ready")
+                startup_profiler.log_report()
+            
+            # Heartbeat status shard ke Redis untuk health server (sekali per process)
+            if self._shard_status_task is None or self._shard_status_task.done():
+                self._shard_status_task = asyncio.create_task(
+                    publish_shard_status(self.bot, self.redis_client, self.worker_id,
+                                         publish_metrics=self.health_server is None)  # Worker launcher: /metrics di launcher
+                )
+            
+            # Status message hanya dari worker utama (hindari duplikat antar worker)
+            if not is_primary_worker():
+                return
+            
             # Get database stats safely
             try:
                 db_stats = self.db_manager.get_database_stats()
@@ -247,15 +304,34 @@ class BotCore:
                 continue
             break
     
+    async def _run_async(self):
+        """Health server dan bot di satu event loop (loop macet -> health check ikut gagal)"""
+        if self.health_server:
+            await self.health_server.start()
+        try:
+            async with self.bot:
+                await self.bot.start(self.DISCORD_TOKEN, reconnect=True)
+        finally:
+            for hook in self.shutdown_hooks:
+                try:
+                    await hook()
+                except Exception as e:
+                    logger.warning(f"Shutdown hook {getattr(hook, '__qualname__', hook)} failed: {e}")
+            if self.health_server:
+                await self.health_server.stop()
+    
     def run(self):
         """Start the Discord bot with connection recovery"""
         max_retries = 3
         retry_count = 0
         
+        discord.utils.setup_logging()  # Sama seperti default bot.run()
         while retry_count < max_retries:
             try:
-                self.bot.run(self.DISCORD_TOKEN, reconnect=True)
+                asyncio.run(self._run_async())
                 break  # If successful, exit the loop
+            except KeyboardInterrupt:
+                break
             except Exception as e:
                 retry_count += 1
                 logger.error(f"Bot run failed (attempt {retry_count}/{max_retries}): {e}")
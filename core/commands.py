@@ -10,6 +10,13 @@ import random
 import discord
 from features.social_media.ai_handler import AIHandler
 from utils.data_fetcher import DataFetcher
+from utils.cache_codec import codec_stats
+from utils.semantic_cache import SemanticCache
+from utils.message_delivery import split_text
+from utils.conversation_store import ConversationStore
+from core.admission import AdmissionController, AdmissionRejected
+from utils.cache_keys import cache_key as build_cache_key
+from utils.cache_invalidation import clear_namespaces, clear_entity
 try:
     from features.analytics.analytics import BotAnalytics
     analytics = BotAnalytics()
@@ -24,18 +31,20 @@ except ImportError:
         def get_analytics_summary(self): return "Analytics not available"
         def _save_analytics(self): pass
     analytics = BotAnalytics()
-from features.social_media.social_media_commands import SocialMediaCommandsHandler
-from core.maintenance_manager import MaintenanceManager
-# Conditional import for bias commands to avoid startup errors
-try:
-    from features.bias_detector.bias_commands import BiasCommandsHandler
-    BIAS_COMMANDS_AVAILABLE = True
-except ImportError as e:
-    print(f"Warning: Bias commands not available: {e}")
-    BIAS_COMMANDS_AVAILABLE = False
-    BiasCommandsHandler = None
+from core.subsystems import SubsystemRegistry, SUBSYSTEM_WARMUP
+from core.startup_profiler import startup_profiler
+from utils.message_delivery import deliver_text
+from core.tracing import tracer, set_attribute, format_trace
+from core.metrics import QUEUE_DEPTH, IN_FLIGHT, observe_command_trace, record_cache
+from core.loop_monitor import loop_monitor
 
 class CommandsHandler:
+    # Command ringan yang tidak memicu scraping/AI - tidak dihitung admission control
+    ADMISSION_EXEMPT_PREFIXES = (
+        "help", "analytics", "db status", "database", "clearcache", "clear cache",
+        "bias info", "gacha info", "maintenance", "monitor", "gallery", "traces",
+    )
+    
     def __init__(self, bot_core):
         self.bot = bot_core.bot
         self.redis_client = bot_core.redis_client
@@ -45,58 +54,87 @@ class CommandsHandler:
         self.social_monitor = bot_core.social_monitor  # Add access to social media monitor
         
         # Initialize handlers
-        self.ai_handler = AIHandler()
+        with startup_profiler.phase("ai_handler"):
+            self.ai_handler = AIHandler()
+        bot_core.shutdown_hooks.append(self.ai_handler.close)  # Session aiohttp ditutup saat bot berhenti
         # DataFetcher will be lazy loaded when needed
         
-        # Initialize social media commands handler
-        self.social_media_handler = SocialMediaCommandsHandler(self.social_monitor)
+        # Subsystem berat dibangun lazy (saat pertama dipakai) atau di-warm up setelah on_ready
+        self.subsystems = SubsystemRegistry()
+        self.subsystems.register("social_media", "Social media commands", self._build_social_media_handler)
+        self.subsystems.register("maintenance", "Maintenance manager", self._build_maintenance_manager)
+        self.subsystems.register("gacha", "Gacha system", self._build_gacha_handler)
+        self.subsystems.register("bias", "Bias commands", self._build_bias_handler)
+        if SUBSYSTEM_WARMUP:
+            self.bot.add_listener(self._on_ready_warm_up, "on_ready")
         
-        # Initialize maintenance manager
-        self.maintenance_manager = MaintenanceManager(self.bot)
-        
-        # Initialize gacha system (optional)
-        try:
-            from features.gacha_system.gacha_commands import GachaCommandsHandler
-            self.gacha_handler = GachaCommandsHandler()
-            logger.info("✅ Gacha system initialized successfully")
-        except Exception as e:
-            logger.warning(f"⚠️ Gacha system initialization failed: {e}")
-            self.gacha_handler = None
+        # Conversation memory untuk obrolan santai (per user, TTL + LRU, opsional Redis)
+        self.max_memory_length = 3  # Simpan 3 pesan terakhir
+        use_redis_memory = os.getenv("CONVERSATION_REDIS", "false").lower() == "true"
+        self.conversation_store = ConversationStore(
+            redis_client=self.redis_client if use_redis_memory else None,
+            max_messages=self.max_memory_length * 2,  # *2 karena user+bot
+        )
+        # Konteks percakapan untuk transition detection (opt-in: mengubah hasil kpop_detector.detect)
+        self.context_detection = os.getenv("CONVERSATION_CONTEXT_DETECTION", "false").lower() == "true"
         
-        # Gallery system completely removed - all functionality moved to Google Colab
+        # Anti-duplicate response system
+        self.processing_messages = set()  # Track messages being processed
         
-        # Initialize bias detector and commands handler with error handling
-        self.bias_detector = None
-        self.bias_handler = None
+        # Admission control: 1 pipeline per user, cap per guild, antrian fair antar guild
+        self.admission = AdmissionController()
         
-        # Fix circular import by importing BiasDetector first
-        # Debug logs disabled to reduce Railway log spam
+        # Metrics /metrics: latency command dari trace, queue depth dievaluasi saat scrape
+        tracer.add_listener(observe_command_trace)
+        QUEUE_DEPTH.set_function(self._queue_depth_metrics)
+        IN_FLIGHT.set_function(self._in_flight_metrics)
         
-        try:
-            from features.bias_detector.bias_detector import BiasDetector
-            self.bias_detector = BiasDetector(self.ai_handler, self.kpop_df)
-            
-            # Import BiasCommandsHandler after BiasDetector is initialized
-            import features.bias_detector.bias_commands as bias_commands
-            self.bias_handler = bias_commands.BiasCommandsHandler(self.bias_detector, self.ai_handler, self.kpop_df)
-            logger.info("✅ Bias commands initialized successfully")
-        except Exception as e:
-            logger.error(f"Bias init failed: {e}")
-            import traceback
-            traceback.print_exc()
-            self.bias_detector = None
-            self.bias_handler = None
+        # Streaming AI response ke loading message (progressive edits)
+        self.ai_streaming = os.getenv("AI_STREAMING", "true").lower() == "true"
+        self.stream_edit_interval = float(os.getenv("AI_STREAM_EDIT_INTERVAL", "1.2"))  # Discord: ~5 edits / 5s per channel
         
-        # Conversation memory untuk obrolan santai (per user)
-        self.conversation_memory = {}  # {user_id: [messages]}
-        self.max_memory_length = 3  # Simpan 3 pesan terakhir
-        
-        # Anti-duplicate response system
-        self.processing_messages = set()  # Track messages being processed
+        # Near-duplicate cache untuk obrolan casual ("halo min" == "haloo minn!!")
+        self.casual_cache = SemanticCache()
         
         # Register commands
         self._register_commands()
     
+    def _queue_depth_metrics(self):
+        depth = {("admission",): self.admission.queue_depth()}
+        for category, count in self.ai_handler.scheduler.queue_depth().items():
+            depth[(f"ai_{category.lower()}",)] = count
+        return depth
+    
+    def _in_flight_metrics(self):
+        return {
+            ("admission",): self.admission.get_metrics()["active"],
+            ("ai",): self.ai_handler.scheduler.get_metrics()["active"],
+        }
+    
+    def _build_social_media_handler(self):
+        from features.social_media.social_media_commands import SocialMediaCommandsHandler
+        return SocialMediaCommandsHandler(self.social_monitor)
+    
+    def _build_maintenance_manager(self):
+        from core.maintenance_manager import MaintenanceManager
+        return MaintenanceManager(self.bot)
+    
+    def _build_gacha_handler(self):
+        # Optional: butuh Pillow + data foto
+        from features.gacha_system.gacha_commands import GachaCommandsHandler
+        return GachaCommandsHandler()
+    
+    def _build_bias_handler(self):
+        # Import BiasDetector dulu untuk menghindari circular import
+        from features.bias_detector.bias_detector import BiasDetector
+        import features.bias_detector.bias_commands as bias_commands
+        bias_detector = BiasDetector(self.ai_handler, self.kpop_df)
+        return bias_commands.BiasCommandsHandler(bias_detector, self.ai_handler, self.kpop_df)
+    
+    async def _on_ready_warm_up(self):
+        """Warm-up subsystem di background setelah gateway connect"""
+        self.subsystems.schedule_warm_up()
+    
     def _register_commands(self):
         """Register semua Discord commands"""
         @self.bot.command(name="sn")
@@ -115,142 +153,187 @@ class CommandsHandler:
         # Add to processing set
         self.processing_messages.add(message_id)
         
+        ticket = None
         try:
-            async with ctx.typing():
+            # Command ringan (help/admin/status) tidak lewat admission control
+            if not user_input.lower().startswith(self.ADMISSION_EXEMPT_PREFIXES):
                 try:
-                    # Clear cache command
-                    if user_input.lower().startswith("clearcache") or user_input.lower().startswith("clear cache"):
-                        await self._clear_cache(ctx)
-                        return
+                    guild_id = ctx.guild.id if ctx.guild else None
+                    ticket = await self.admission.acquire(ctx.author.id, guild_id)
+                except AdmissionRejected as e:
+                    logger.info(f"🚦 !sn rejected ({e.reason}): {ctx.author} | '{user_input[:50]}'")
+                    await ctx.send(e.user_message)
+                    return
+            
+            with tracer.trace("sn_command", command=user_input[:60], user=str(ctx.author.id),
+                              guild=str(ctx.guild.id) if ctx.guild else "dm"):
+                async with ctx.typing():
+                    try:
+                        # Clear cache command
+                        if user_input.lower().startswith("clearcache") or user_input.lower().startswith("clear cache"):
+                            await self._clear_cache(ctx, user_input)
+                            return
                     
-                    # Help command
-                    if user_input.lower().startswith("help"):
-                        await self._handle_help_command(ctx)
-                        return
+                        # Help command
+                        if user_input.lower().startswith("help"):
+                            await self._handle_help_command(ctx)
+                            return
                     
-                    # Specific info commands
-                    if user_input.lower().startswith("bias info"):
-                        await self._handle_bias_info_command(ctx)
-                        return
-                    elif user_input.lower().startswith("gacha info"):
-                        # Redirect to gacha system
-                        if self.gacha_handler:
-                            await self.gacha_handler.handle_gacha_command(ctx, "gacha info")
-                        else:
-                            await ctx.send("❌ Gacha system tidak tersedia.")
-                        return
+                        # Specific info commands
+                        if user_input.lower().startswith("bias info"):
+                            await self._handle_bias_info_command(ctx)
+                            return
+                        elif user_input.lower().startswith("gacha info"):
+                            # Redirect to gacha system
+                            gacha_handler = await self.subsystems["gacha"].get_async()
+                            if gacha_handler:
+                                await gacha_handler.handle_gacha_command(ctx, "gacha info")
+                            else:
+                                await ctx.send("❌ Gacha system tidak tersedia.")
+                            return
                     
-                    # Analytics command
-                    if user_input.lower().startswith("analytics"):
-                        await self._handle_analytics_command(ctx)
-                        return
+                        # Trace pipeline paling lambat (admin)
+                        if user_input.lower().startswith("traces"):
+                            await self._handle_traces_command(ctx, user_input)
+                            return
+                        
+                        # Analytics command
+                        if user_input.lower().startswith("analytics"):
+                            await self._handle_analytics_command(ctx)
+                            return
                     
-                    # Database status command
-                    if user_input.lower().startswith("db status") or user_input.lower().startswith("database"):
-                        await self._handle_database_status(ctx)
-                        return
+                        # Database status command
+                        if user_input.lower().startswith("db status") or user_input.lower().startswith("database"):
+                            await self._handle_database_status(ctx)
+                            return
                     
-                    # Maintenance command
-                    if user_input.lower().startswith("maintenance"):
-                        await self._handle_maintenance_command(ctx, user_input)
-                        return
+                        # Maintenance command
+                        if user_input.lower().startswith("maintenance"):
+                            await self._handle_maintenance_command(ctx, user_input)
+                            return
                     
-                    # Monitor command (social media monitoring)
-                    if user_input.lower().startswith("monitor"):
-                        # Parse monitor subcommand: "monitor start", "monitor stop", etc.
-                        parts = user_input.split()
-                        action = parts[1] if len(parts) > 1 else None
-                        platform = parts[2] if len(parts) > 2 else None
-                        await self._handle_monitor_command(ctx, action, platform)
-                        return
+                        # Monitor command (social media monitoring)
+                        if user_input.lower().startswith("monitor"):
+                            # Parse monitor subcommand: "monitor start", "monitor stop", etc.
+                            parts = user_input.split()
+                            action = parts[1] if len(parts) > 1 else None
+                            platform = parts[2] if len(parts) > 2 else None
+                            await self._handle_monitor_command(ctx, action, platform)
+                            return
                     
-                    # Bias detector commands (with availability check)
-                    if user_input.lower().startswith(("bias", "match", "fortune", "ramalan")):
-                        print(f"DEBUG: Bias command detected. bias_handler = {self.bias_handler}")
-                        if self.bias_handler:
-                            await self.bias_handler.handle_bias_command(ctx, user_input)
-                        else:
-                            await ctx.send("⚠️ Bias commands sedang tidak tersedia. Coba command lain ya!")
-                        return
+                        # Bias detector commands (with availability check)
+                        if user_input.lower().startswith(("bias", "match", "fortune", "ramalan")):
+                            bias_handler = await self.subsystems["bias"].get_async()
+                            if bias_handler:
+                                await bias_handler.handle_bias_command(ctx, user_input)
+                            else:
+                                await ctx.send("⚠️ Bias commands sedang tidak tersedia. Coba command lain ya!")
+                            return
                     
-                    # Gacha commands
-                    if user_input.lower().startswith("gacha"):
-                        if self.gacha_handler:
-                            await self.gacha_handler.handle_gacha_command(ctx, user_input)
-                        else:
-                            await ctx.send("❌ **Sistem gacha tidak tersedia!**\n"
-                                          "🔧 **Penyebab:** Missing dependency `Pillow`\n"
-                                          "💡 **Solusi:** Install dengan `pip install Pillow`\n"
-                                          "📋 **Atau:** `pip install -r requirements.txt`")
-                        return
+                        # Gacha commands
+                        if user_input.lower().startswith("gacha"):
+                            gacha_handler = await self.subsystems["gacha"].get_async()
+                            if gacha_handler:
+                                await gacha_handler.handle_gacha_command(ctx, user_input)
+                            else:
+                                await ctx.send("❌ **Sistem gacha tidak tersedia!**\n"
+                                              "🔧 **Penyebab:** Missing dependency `Pillow`\n"
+                                              "💡 **Solusi:** Install dengan `pip install Pillow`\n"
+                                              "📋 **Atau:** `pip install -r requirements.txt`")
+                            return
                     
-                    # Gallery commands (read-only, lightweight)
-                    if user_input.lower().startswith("gallery"):
-                        await self._handle_gallery_command(ctx, user_input)
-                        return
+                        # Gallery commands (read-only, lightweight)
+                        if user_input.lower().startswith("gallery"):
+                            await self._handle_gallery_command(ctx, user_input)
+                            return
                     
                     
-                    # Social media commands
-                    if user_input.lower().startswith(("twitter", "youtube", "instagram", "tiktok", "sosmed")):
-                        await self.social_media_handler.handle_social_command(ctx, user_input)
-                        return
+                        # Social media commands
+                        if user_input.lower().startswith(("twitter", "youtube", "instagram", "tiktok", "sosmed")):
+                            social_media_handler = await self.subsystems["social_media"].get_async()
+                            if social_media_handler:
+                                await social_media_handler.handle_social_command(ctx, user_input)
+                            else:
+                                await ctx.send("⚠️ Social media commands sedang tidak tersedia. Coba command lain ya!")
+                            return
                     
-                    # Deteksi K-pop member/group dengan SmartDetector (dengan conversation context)
-                    start_time = time.time()
-                    conversation_context = self._get_recent_conversation_context(ctx.author.id)
-                    category, detected_name, multiple_matches = self.kpop_detector.detect(user_input, conversation_context)
-                    detection_time = int((time.time() - start_time) * 1000)
+                        # Deteksi K-pop member/group dengan SmartDetector (dengan conversation context)
+                        start_time = time.time()
+                        conversation_context = await self._get_recent_conversation_context(ctx.author.id)
+                        with tracer.span("detect"):
+                            category, detected_name, multiple_matches = self.kpop_detector.detect(user_input, conversation_context)
+                        set_attribute("category", category)  # Di root span
+                        detection_time = int((time.time() - start_time) * 1000)
                     
-                    # Log dengan format yang rapi
-                    from core.logger import log_sn_command, log_detection, log_performance, log_transition
-                    log_sn_command(ctx.author, user_input, category, detected_name)
-                    log_detection(user_input, category, detected_name)
-                    log_performance("Detection", detection_time)
+                        # Log dengan format yang rapi
+                        from core.logger import log_sn_command, log_detection, log_performance, log_transition
+                        log_sn_command(ctx.author, user_input, category, detected_name)
+                        log_detection(user_input, category, detected_name)
+                        log_performance("Detection", detection_time)
                     
-                    # Log transition jika ada context
-                    if conversation_context:
-                        log_transition(conversation_context, user_input, category)
+                        # Log transition jika ada context
+                        if conversation_context:
+                            log_transition(conversation_context, user_input, category)
                     
-                    # Proses berdasarkan kategori
-                    if category == "MEMBER" or category == "GROUP" or category == "MEMBER_GROUP":
-                        # Reset conversation memory untuk K-pop queries
-                        self._clear_user_memory(ctx.author.id)
-                        await self._handle_kpop_query(ctx, category, detected_name)
-                    elif category == "MULTIPLE":
-                        self._clear_user_memory(ctx.author.id)
-                        await self._handle_multiple_matches(ctx, detected_name, multiple_matches)
-                    elif category == "REKOMENDASI":
-                        self._clear_user_memory(ctx.author.id)
-                        await self._handle_recommendation_request(ctx, user_input)
-                    elif category == "OBROLAN":
-                        await self._handle_casual_conversation(ctx, user_input)
-                    else:
-                        await self._handle_general_query(ctx, user_input)
+                        # Proses berdasarkan kategori
+                        if category == "MEMBER" or category == "GROUP" or category == "MEMBER_GROUP":
+                            # Reset conversation memory untuk K-pop queries
+                            await self._clear_user_memory(ctx.author.id)
+                            await self._handle_kpop_query(ctx, category, detected_name)
+                        elif category == "MULTIPLE":
+                            await self._clear_user_memory(ctx.author.id)
+                            await self._handle_multiple_matches(ctx, detected_name, multiple_matches)
+                        elif category == "REKOMENDASI":
+                            await self._clear_user_memory(ctx.author.id)
+                            await self._handle_recommendation_request(ctx, user_input)
+                        elif category == "OBROLAN":
+                            await self._handle_casual_conversation(ctx, user_input)
+                        else:
+                            await self._handle_general_query(ctx, user_input)
                         
-                except Exception as e:
-                    # Log error dengan detail lengkap
-                    logger.error(f"❌ Error in _handle_sn_command: {e}")
-                    logger.error(f"   User: {ctx.author} | Input: '{user_input}'")
-                    import traceback
-                    logger.error(f"   Traceback: {traceback.format_exc()}")
+                    except Exception as e:
+                        # Log error dengan detail lengkap
+                        logger.error(f"❌ Error in _handle_sn_command: {e}")
+                        logger.error(f"   User: {ctx.author} | Input: '{user_input}'")
+                        import traceback
+                        logger.error(f"   Traceback: {traceback.format_exc()}")
                     
-                    # Send user-friendly error message
-                    await ctx.send("❌ Maaf, terjadi error saat memproses command. Tim teknis sudah diberitahu! 🔧")
+                        # Send user-friendly error message
+                        await ctx.send("❌ Maaf, terjadi error saat memproses command. Tim teknis sudah diberitahu! 🔧")
                     
-                    # Log ke analytics untuk monitoring
-                    analytics.log_error("SN_COMMAND_ERROR", str(e), user_input)
+                        # Log ke analytics untuk monitoring
+                        analytics.log_error("SN_COMMAND_ERROR", str(e), user_input)
         finally:
             # Remove from processing set when done
             self.processing_messages.discard(message_id)
+            if ticket:
+                self.admission.release(ticket)
             
             # Cleanup processing messages if too many
             if len(self.processing_messages) > 50:
                 await self._cleanup_processing_messages()
     
-    async def _clear_cache(self, ctx):
-        """Clear Redis cache"""
-        self.redis_client.flushdb()
-        await ctx.send("Redis cache berhasil dihapus.")
+    async def _clear_cache(self, ctx, user_input=""):
+        """Clear cache bot per namespace (tanpa FLUSHDB - state sn_monitor:* tetap aman).
+        `clearcache <nama>` hanya menghapus cache satu member/grup."""
+        lowered = user_input.lower()
+        prefix = "clear cache" if lowered.startswith("clear cache") else "clearcache"
+        target = user_input[len(prefix):].strip()
+        
+        try:
+            if target:
+                deleted = await clear_entity(self.redis_client, target)
+                await asyncio.to_thread(self.data_fetcher.invalidate_entity, target)
+                await ctx.send(f"Cache untuk **{target}** berhasil dihapus ({deleted} key).")
+                return
+            
+            # Clear logis O(1) per namespace, key lama di-reclaim di background
+            await clear_namespaces(self.redis_client)
+            self.casual_cache.clear()
+            await ctx.send("Redis cache berhasil dihapus.")
+        except Exception as e:
+            logger.error(f"Clear cache error: {e}")
+            await ctx.send("❌ Gagal menghapus cache.")
     
     async def _handle_kpop_query(self, ctx, category, detected_name):
         """Handle K-pop related queries"""
@@ -259,14 +342,18 @@ class CommandsHandler:
         
         # Enhanced cache key untuk akurasi lebih tinggi
         enhanced_query = self._build_enhanced_query(category, detected_name)
-        cache_key = f"{category}:{detected_name.lower()}:{hash(enhanced_query)}"
+        cache_key = build_cache_key("summary", category, enhanced_query, entity=detected_name)
         
         # Kirim loading message terlebih dahulu
         loading_msg = await self._send_loading_message(ctx)
             
         # Cek cache terlebih dahulu
         try:
-            cached_summary = self.redis_client.get(cache_key)
+            with tracer.span("cache_lookup", namespace="summary") as span:
+                cached_summary = self.redis_client.get(cache_key)
+                if span:
+                    span.set_attribute("hit", bool(cached_summary))
+            record_cache("summary", bool(cached_summary))
             if cached_summary:
                 summary = cached_summary.decode("utf-8")
                 from core.logger import log_cache_hit
@@ -274,7 +361,8 @@ class CommandsHandler:
                 
                 # Update loading message untuk cache hit
                 await loading_msg.edit(content="⚡ Mengambil dari cache...")
-                return await self._send_kpop_embed(ctx, loading_msg, category, detected_name, summary)
+                with tracer.span("discord_send"):
+                    return await self._send_kpop_embed(ctx, loading_msg, category, detected_name, summary)
         except Exception as e:
             logger.error(f"Error accessing Redis cache: {e}")
             await loading_msg.edit(content="⚠️ Gagal mengakses cache. Mencoba mengambil data langsung...")
@@ -323,10 +411,21 @@ class CommandsHandler:
         # Generate AI summary with proper error handling
         ai_start = time.time()
         
+        streamed = False
         try:
-            # First try to generate summary with AI
-            ai_summary = await self.ai_handler.generate_kpop_summary(category, info)
+            # First try to generate summary with AI (streamed ke loading message jika aktif)
+            with tracer.span("ai_summary", streaming=self.ai_streaming):
+                if self.ai_streaming:
+                    header = f"{self._get_category_emoji(category)} **{detected_name}**\n\n"
+                    ai_summary = await self._stream_to_message(
+                        loading_msg, self.ai_handler.generate_kpop_summary_stream(category, info), header
+                    )
+                    streamed = bool(ai_summary)
+                else:
+                    ai_summary = await self.ai_handler.generate_kpop_summary(category, info)
             
+            # Stream yang putus sudah diganti jawaban utuh oleh stream_chat; pesan fallback/busy tidak dicache
+            cacheable = bool(ai_summary and ai_summary.strip()) and not self.ai_handler.is_canned_response(ai_summary)
             if ai_summary and ai_summary.strip():
                 summary = ai_summary
             else:
@@ -354,10 +453,11 @@ class CommandsHandler:
             
             # Smart cache duration berdasarkan kategori
             try:
-                cache_duration = self._get_cache_duration(category, len(str(summary)))
-                self.redis_client.set(cache_key, summary, ex=cache_duration)
-                from core.logger import log_cache_set
-                log_cache_set(category, detected_name)
+                if cacheable:
+                    cache_duration = self._get_cache_duration(category, len(str(summary)))
+                    self.redis_client.set(cache_key, summary, ex=cache_duration)
+                    from core.logger import log_cache_set
+                    log_cache_set(category, detected_name)
             except Exception as cache_error:
                 logger.error(f"Gagal menyimpan ke cache: {cache_error}")
                 
@@ -396,7 +496,8 @@ class CommandsHandler:
         # Scrape image untuk embed dengan group context
         image_data = None
         try:
-            await loading_msg.edit(content="🖼️ Mencari foto...")
+            if not streamed:
+                await loading_msg.edit(content="🖼️ Mencari foto...")
             
             # Extract group name from enhanced query for better image scraping
             group_name = None
@@ -408,18 +509,20 @@ class CommandsHandler:
                 if len(member_rows) > 0:
                     group_name = str(member_rows.iloc[0].get('Group', '')).strip()
             
-            image_data = await self.data_fetcher.scrape_kpop_image(detected_name, group_name)
+            with tracer.span("image_scrape"):
+                image_data = await self.data_fetcher.scrape_kpop_image(detected_name, group_name)
         except Exception as e:
             logger.debug(f"Image scraping failed: {e}")
         
         # Send dengan embed dan foto (tanpa URL link)
-        await self._send_kpop_embed(ctx, loading_msg, category, detected_name, summary, image_data)
+        with tracer.span("discord_send"):
+            await self._send_kpop_embed(ctx, loading_msg, category, detected_name, summary, image_data)
     
     @property
     def data_fetcher(self):
         """Lazy initialization of DataFetcher"""
         if not hasattr(self, '_data_fetcher'):
-            self._data_fetcher = DataFetcher(self.kpop_df)
+            self._data_fetcher = DataFetcher(self.kpop_df, db_engine=getattr(self.db_manager, 'engine', None))
             logger.info("DataFetcher initialized lazily")
         return self._data_fetcher
     
@@ -473,17 +576,42 @@ class CommandsHandler:
             messages_list = list(self.processing_messages)
             self.processing_messages = set(messages_list[-20:])
     
-    async def _send_kpop_embed(self, ctx, loading_msg, category, detected_name, summary, image_data=None):
-        """Send K-pop information as Discord embed"""
+    def _get_category_emoji(self, category):
+        """Emoji judul per kategori K-pop"""
         emoji_map = {
             "MEMBER": "👤",
             "GROUP": "🎵", 
             "MEMBER_GROUP": "👥"
         }
-        
+        return emoji_map.get(category, '🎤')
+    
+    async def _stream_to_message(self, message, stream, header=""):
+        """Pipe streamed AI text ke edit message, di-throttle sesuai edit rate limit Discord.
+        Return teks lengkap terakhir."""
+        text = ""
+        last_edit = 0.0
+        shown = None
+        async for text in stream:
+            now = time.monotonic()
+            if now - last_edit < self.stream_edit_interval:
+                continue
+            preview = header + text
+            if len(preview) > 1900:
+                preview = preview[:1900] + "…"
+            if preview != shown:
+                try:
+                    await message.edit(content=preview + " ▌")
+                    shown = preview
+                except discord.HTTPException as e:
+                    logger.debug(f"Stream edit skipped: {e}")
+                last_edit = now
+        return text
+    
+    async def _send_kpop_embed(self, ctx, loading_msg, category, detected_name, summary, image_data=None):
+        """Send K-pop information as Discord embed"""
         # Buat embed dengan warna K-pop theme
         embed = discord.Embed(
-            title=f"{emoji_map.get(category, '🎤')} {detected_name}",
+            title=f"{self._get_category_emoji(category)} {detected_name}",
             description=summary,
             color=0xFF1493  # Deep pink untuk K-pop theme
         )
@@ -516,29 +644,22 @@ class CommandsHandler:
             await loading_msg.edit(content="", embed=embed)
             logger.info(f"✅ Sent embed without image for {detected_name}")
     
-    def _add_to_memory(self, user_id, role, message):
-        """Tambahkan pesan ke conversation memory"""
-        if user_id not in self.conversation_memory:
-            self.conversation_memory[user_id] = []
-        
-        self.conversation_memory[user_id].append({"role": role, "content": message})
-        
-        # Batasi memory hanya 3 pesan terakhir
-        if len(self.conversation_memory[user_id]) > self.max_memory_length * 2:  # *2 karena user+bot
-            self.conversation_memory[user_id] = self.conversation_memory[user_id][-self.max_memory_length * 2:]
+    async def _add_to_memory(self, user_id, role, message):
+        """Tambahkan pesan ke conversation memory (hanya dipakai jika context detection aktif)"""
+        if self.context_detection:
+            await self.conversation_store.add_async(user_id, role, message)
     
-    def _clear_user_memory(self, user_id):
+    async def _clear_user_memory(self, user_id):
         """Hapus conversation memory untuk user tertentu"""
-        if user_id in self.conversation_memory:
-            del self.conversation_memory[user_id]
+        if self.context_detection:
+            await self.conversation_store.clear_async(user_id)
     
     def _get_conversation_context(self, user_id, current_message):
         """Dapatkan konteks percakapan untuk AI"""
         context_messages = []
         
         # Tambahkan pesan sebelumnya jika ada
-        if user_id in self.conversation_memory:
-            context_messages.extend(self.conversation_memory[user_id])
+        context_messages.extend(self.conversation_store.get(user_id))
         
         # Tambahkan pesan saat ini
         context_messages.append({"role": "user", "content": current_message})
@@ -558,13 +679,13 @@ class CommandsHandler:
         
         return conversation_context
     
-    def _get_recent_conversation_context(self, user_id):
-        """Get recent conversation context untuk transition detection"""
-        if user_id not in self.conversation_memory:
+    async def _get_recent_conversation_context(self, user_id):
+        """Get recent conversation context untuk transition detection (None jika tidak aktif)"""
+        if not self.context_detection:
             return None
         
         # Get last 3 messages untuk context
-        recent_messages = self.conversation_memory[user_id][-3:]
+        recent_messages = (await self.conversation_store.get_async(user_id))[-3:]
         if not recent_messages:
             return None
         
@@ -581,28 +702,46 @@ class CommandsHandler:
             user_id = ctx.author.id
             
             # Check cache untuk casual conversation
-            cache_key = f"casual:{hash(user_input.lower())}"
-            cached_response = self.redis_client.get(cache_key)
+            cache_key = build_cache_key("casual", user_input.lower())
+            with tracer.span("cache_lookup", namespace="casual"):
+                cached_response = self.redis_client.get(cache_key)
+            record_cache("casual", bool(cached_response))
             
             if cached_response:
                 from core.logger import log_cache_hit
                 log_cache_hit("CASUAL", user_input[:30])
-                await self._send_chunked_message(ctx, cached_response.decode('utf-8'))
+                cached_response = cached_response.decode('utf-8')
+                await self._add_to_memory(user_id, "user", user_input)
+                await self._add_to_memory(user_id, "bot", cached_response)
+                await self._send_chunked_message(ctx, cached_response)
                 return
-            else:
-                from core.logger import log_cache_miss
-                log_cache_miss("CASUAL", user_input[:30])
+            
+            # Fallback ke semantic cache (pesan mirip, bukan identik)
+            similar_response, similarity = self.casual_cache.get(user_input)
+            record_cache("casual_semantic", bool(similar_response))
+            if similar_response:
+                from core.logger import log_cache_hit
+                log_cache_hit("CASUAL_SEMANTIC", f"{user_input[:30]} ({similarity:.2f})")
+                await self._add_to_memory(user_id, "user", user_input)
+                await self._add_to_memory(user_id, "bot", similar_response)
+                await self._send_chunked_message(ctx, similar_response)
+                return
+            
+            from core.logger import log_cache_miss
+            log_cache_miss("CASUAL", user_input[:30])
             
             # Generate response dengan AI (reduced max_tokens untuk speed)
             start_time = time.time()
             from core.logger import log_ai_request
             log_ai_request("CASUAL", len(user_input))
-            summary = await self.ai_handler.chat_async(user_input, max_tokens=800, category="OBROLAN")
+            with tracer.span("ai_casual"):
+                summary = await self.ai_handler.chat_async(user_input, max_tokens=800, category="OBROLAN")
             ai_duration = int((time.time() - start_time) * 1000)
             from core.logger import log_ai_response
             log_ai_response("CASUAL", len(summary) if summary else 0, ai_duration)
             
-            # Validasi dan sanitasi response
+            # Validasi dan sanitasi response (fallback/busy tidak dicache)
+            cacheable = bool(summary) and isinstance(summary, str) and not self.ai_handler.is_canned_response(summary)
             if not summary or not isinstance(summary, str):
                 summary = "Maaf, saya tidak bisa memahami pertanyaan itu. Coba tanya yang lain ya! 😅"
             
@@ -611,9 +750,15 @@ class CommandsHandler:
                 summary = summary[:1900] + "..."
             
             # Cache response untuk 1 jam
-            self.redis_client.setex(cache_key, 3600, summary)
-            from core.logger import log_cache_set
-            log_cache_set("CASUAL", user_input[:30])
+            if cacheable:
+                self.redis_client.setex(cache_key, 3600, summary)
+                self.casual_cache.set(user_input, summary)
+                from core.logger import log_cache_set
+                log_cache_set("CASUAL", user_input[:30])
+            
+            # Simpan ke conversation memory (dipakai transition detection)
+            await self._add_to_memory(user_id, "user", user_input)
+            await self._add_to_memory(user_id, "bot", summary)
             
             # Kirim dengan chunked message untuk safety
             await self._send_chunked_message(ctx, summary)
@@ -651,12 +796,23 @@ class CommandsHandler:
             from core.logger import log_ai_request
             log_ai_request("GENERAL", len(user_input))
             
-            summary = await self.ai_handler.handle_general_query(user_input)
+            if self.ai_streaming:
+                message = await ctx.send("🤖 ...")
+                summary = await self._stream_to_message(message, self.ai_handler.handle_general_query_stream(user_input))
+            else:
+                summary = await self.ai_handler.handle_general_query(user_input)
             ai_duration = int((time.time() - start_time) * 1000)
             from core.logger import log_ai_response
             log_ai_response("GENERAL", len(summary) if summary else 0, ai_duration)
             
-            await ctx.send(summary)
+            if self.ai_streaming:
+                # Final edit tanpa cursor; sisa teks panjang dikirim sebagai chunk lanjutan (dipotong di batas kata)
+                chunks = split_text(summary or "", 1900)
+                await message.edit(content=chunks[0] if chunks else "🤖")
+                for chunk in chunks[1:]:
+                    await self._send_chunked_message(ctx, chunk)
+            else:
+                await ctx.send(summary)
             
         except Exception as e:
             from core.logger import log_error
@@ -868,6 +1024,102 @@ class CommandsHandler:
                 inline=True
             )
             
+            # Semantic casual cache
+            cache_stats = self.casual_cache.stats()
+            casual_stats = f"""💬 Hit Rate: {cache_stats['hit_rate']}% ({cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']})
+📦 Entries: {cache_stats['entries']} (evicted {cache_stats['evictions']})"""
+            top_entries = self.casual_cache.top_entries(3)
+            if top_entries and top_entries[0][1]:
+                casual_stats += "\n" + "\n".join(f"🔁 {sample} ({hits}x)" for sample, hits in top_entries if hits)
+            
+            embed.add_field(
+                name="🧠 Casual Cache",
+                value=casual_stats,
+                inline=True
+            )
+            
+            # AI scheduler (antrian prioritas)
+            queue = self.ai_handler.scheduler.get_metrics()
+            depth = ", ".join(f"{category} {count}" for category, count in queue['queue_depth'].items()) or "kosong"
+            queue_stats = f"""⚙️ In-flight: {queue['active']}/{queue['max_concurrency']}
+📥 Queue: {depth} (max {queue['max_depth']}/{queue['max_queue']})
+⏱️ Avg Wait: {queue['avg_wait']}s
+🚫 Busy: {queue['rejected_full']} full, {queue['dropped_deadline']} deadline, {queue['preempted']} preempted"""
+            hedge = self.ai_handler.hedge_policy.summary()
+            if hedge['enabled']:
+                queue_stats += f"\n🪁 Hedge: {hedge['hedges']} ({hedge['hedge_rate']}%), menang {hedge['hedge_wins']}, delay {hedge['delay']}s"
+            
+            embed.add_field(
+                name="🚦 AI Queue",
+                value=queue_stats,
+                inline=False
+            )
+            
+            # Admission control !sn (per user / per guild)
+            admission = self.admission.get_metrics()
+            admission_stats = f"""⚙️ Active: {admission['active']}/{admission['max_concurrent']} ({admission['active_guilds']} guild, max {admission['per_guild']}/guild)
+📥 Queue: {admission['queue_depth']} dari {admission['waiting_guilds']} guild (max {admission['max_depth']}/{admission['max_queue']}), avg wait {admission['avg_wait']}s
+🚫 Rejected: {admission['rejected_user_busy']} user, {admission['rejected_guild_busy']} guild, {admission['rejected_queue_full']} full, {admission['rejected_timeout']} timeout"""
+            embed.add_field(
+                name="🎫 !sn Admission",
+                value=admission_stats,
+                inline=False
+            )
+            
+            # Readiness subsystem lazy (gacha, bias, maintenance, social media)
+            state_emoji = {"ready": "🟢", "loading": "🟡", "pending": "⚪", "failed": "🔴"}
+            subsystem_stats = "\n".join(
+                f"{state_emoji.get(status['state'], '⚪')} {key}: {status['state']}"
+                + (f" ({status['load_time']}s)" if status['load_time'] is not None else "")
+                for key, status in self.subsystems.status().items()
+            )
+            embed.add_field(
+                name="⚙️ Subsystems",
+                value=subsystem_stats,
+                inline=True
+            )
+            
+            # Lag event loop + blocking call terakhir (LOOP_BLOCK_DEBUG)
+            loop_stats = loop_monitor.get_metrics()
+            loop_text = f"⏱️ Lag: avg {loop_stats['avg_lag_ms']}ms, max {loop_stats['max_lag_ms']}ms"
+            if loop_stats['block_debug']:
+                recent_blocks = loop_stats['blocks'][-3:]
+                loop_text += f"\n🧱 Blocks: {len(loop_stats['blocks'])}" + "".join(
+                    f"\n• {block['site']} ({block['duration'] * 1000:.0f}ms)" for block in recent_blocks
+                )
+            embed.add_field(
+                name="🌀 Event Loop",
+                value=loop_text,
+                inline=True
+            )
+            
+            # Token usage per kategori (usageMetadata Gemini)
+            token_usage = self.ai_handler.token_usage.summary()
+            if token_usage:
+                token_lines = [
+                    f"{category}: in ~{usage['avg_prompt']} / out ~{usage['avg_output']} (max {usage['avg_max_output']}) x{usage['requests']}"
+                    for category, usage in token_usage.items()
+                ]
+                embed.add_field(
+                    name="🧮 Avg Tokens / Request",
+                    value="\n".join(token_lines),
+                    inline=False
+                )
+            
+            # Key health table (EWMA per API key x model)
+            health_rows = self.ai_handler.key_health.snapshot()
+            if health_rows:
+                health_lines = []
+                for row in health_rows[:10]:
+                    status = f"🚫 {row['quarantine_left']}s" if row['quarantine_left'] else "✅"
+                    model = row['model'].replace("gemini-", "")
+                    health_lines.append(f"{status} #{row['key']} {model}: {row['latency']}s, err {row['error_rate']}% ({row['samples']})")
+                embed.add_field(
+                    name="🔑 Gemini Key Health",
+                    value="\n".join(health_lines),
+                    inline=False
+                )
+            
             await ctx.send(embed=embed)
             logger.info("Analytics command executed")
             
@@ -964,47 +1216,10 @@ class CommandsHandler:
         return detected_name
     
     async def _send_chunked_message(self, ctx, message):
-        """Kirim pesan dalam chunk <=2000 karakter dengan smart splitting"""
-        chunk_size = 1900  # Buffer untuk safety
-        
-        if len(message) <= chunk_size:
-            await ctx.send(message)
-            return
-        
-        # Simple splitting by character count with word boundary respect
-        chunks = []
-        words = message.split(' ')
-        current_chunk = ""
-        
-        for word in words:
-            # Check if adding this word would exceed limit
-            test_chunk = current_chunk + ' ' + word if current_chunk else word
-            
-            if len(test_chunk) <= chunk_size:
-                current_chunk = test_chunk
-            else:
-                # Save current chunk and start new one
-                if current_chunk:
-                    chunks.append(current_chunk)
-                current_chunk = word
-        
-        # Add remaining chunk
-        if current_chunk:
-            chunks.append(current_chunk)
-        
-        # Send all chunks with logging
-        logger.info(f"Sending {len(chunks)} chunks to Discord")
-        for i, chunk in enumerate(chunks):
-            try:
-                if i > 0:
-                    await asyncio.sleep(1.0)  # Longer delay between chunks
-                logger.info(f"Sending chunk {i+1}/{len(chunks)} - {len(chunk)} characters")
-                await ctx.send(chunk)
-                logger.info(f"Successfully sent chunk {i+1}/{len(chunks)}")
-            except Exception as e:
-                logger.error(f"Failed to send chunk {i+1}/{len(chunks)}: {e}")
-                # Try to send remaining chunks
-                continue
+        """Kirim pesan panjang dengan jumlah pesan minimal (embed 4096 karakter, maks 10 per pesan).
+        Pacing mengikuti rate-limit header Discord, bukan sleep tetap"""
+        with tracer.span("discord_send", characters=len(message or "")):
+            await deliver_text(ctx, message)
     
     async def _handle_database_status(self, ctx):
         """Handle database status command"""
@@ -1028,6 +1243,8 @@ class CommandsHandler:
 ⚡ **Status**: {db_stats['status'].title()}
 
 {self._get_database_performance_info()}
+{self._get_cache_codec_info()}
+{self._get_conversation_memory_info()}
             """.strip()
             
             await ctx.send(status_message)
@@ -1043,6 +1260,22 @@ class CommandsHandler:
         else:
             return "📊 **Performance**: CSV fallback mode"
     
+    def _get_cache_codec_info(self):
+        """Get Redis cache compression savings (per process)"""
+        stats = codec_stats.summary()
+        if not stats['writes']:
+            return "💾 **Cache Codec**: belum ada write"
+        saved_kb = stats['saved_bytes'] / 1024
+        return (f"💾 **Cache Codec**: {stats['encoding']} | {stats['compressed_writes']}/{stats['writes']} compressed | "
+                f"hemat {saved_kb:,.1f} KB (ratio {stats['ratio']:.2f})")
+    
+    def _get_conversation_memory_info(self):
+        """Get conversation memory usage (per process)"""
+        report = self.conversation_store.memory_report()
+        return (f"🧠 **Conversation Memory**: {report['backend']} | {report['users']:,}/{report['max_users']:,} users | "
+                f"{report['messages']:,} pesan (~{report['approx_bytes'] / 1024:,.1f} KB) | "
+                f"TTL {report['ttl'] // 60} menit | evicted {report['evictions']:,}")
+    
     async def _handle_monitor_command(self, ctx, action: str = None, platform: str = None):
         """Handle social media monitoring commands"""
         try:
@@ -1135,6 +1368,36 @@ class CommandsHandler:
             logger.error(f"Monitor command error: {e}")
             await ctx.send(f"❌ Error: {e}")
     
+    async def _handle_traces_command(self, ctx, user_input):
+        """!sn traces -> daftar trace paling lambat, !sn traces <n> -> detail span trace ke-n (admin only)"""
+        if not self._is_admin(ctx.author.id):
+            await ctx.send("❌ Command ini hanya untuk admin.")
+            return
+        
+        traces = tracer.slowest()
+        if not traces:
+            await ctx.send("📭 Belum ada trace tercatat.")
+            return
+        
+        parts = user_input.split()
+        if len(parts) > 1 and parts[1].isdigit():
+            index = int(parts[1]) - 1
+            if not 0 <= index < len(traces):
+                await ctx.send(f"❌ Trace #{parts[1]} tidak ada (1-{len(traces)}).")
+                return
+            trace = traces[index]
+            await ctx.send(f"🔎 **Trace #{index + 1}** `{trace.trace_id[:12]}` - {trace.duration:.2f}s\n"
+                           f"```\n{format_trace(trace)[:1800]}\n```")
+            return
+        
+        lines = []
+        for index, trace in enumerate(traces[:10], 1):
+            attributes = trace.root.attributes
+            lines.append(f"{index}. **{trace.duration:.2f}s** `{attributes.get('command', trace.name)}` "
+                         f"({attributes.get('category', '-')})")
+        await ctx.send(f"🐢 **Slowest !sn traces** (dari {tracer.finished} request)\n" + "\n".join(lines)
+                       + "\n\nDetail: `!sn traces <nomor>`")
+    
     def _is_admin(self, user_id):
         """Check if user is admin"""
         # Get admin IDs from environment variable
@@ -1186,7 +1449,11 @@ class CommandsHandler:
             args = parts[2:] if len(parts) > 2 else []
             
             # Delegate to MaintenanceManager
-            await self.maintenance_manager.handle_maintenance_command(ctx, action, *args)
+            maintenance_manager = await self.subsystems["maintenance"].get_async()
+            if not maintenance_manager:
+                await ctx.send("❌ Maintenance system tidak tersedia.")
+                return
+            await maintenance_manager.handle_maintenance_command(ctx, action, *args)
             
         except Exception as e:
             logger.error(f"Maintenance command error: {e}")
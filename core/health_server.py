@@ -0,0 +1,168 @@
+"""
+Health Server Module - Server health/readiness aiohttp di event loop bot sendiri
+Karena handler berjalan di loop yang sama dengan gateway Discord, loop yang macet otomatis membuat
+/live timeout, bukan menjawab OK dari thread terpisah. Catatan: healthcheckPath Railway hanya dicek saat
+deploy (menahan traffic sampai /ready); restart instance yang macet setelah itu butuh probe eksternal ke /live.
+
+    /live     loop hidup, bot belum ditutup, gateway tidak putus > HEALTH_DISCONNECT_GRACE detik
+    /ready    gateway ready + subsystem lazy selesai warm-up jika SUBSYSTEM_WARMUP aktif (503 selama masih dingin)
+    /status   JSON detail: latency, shard, subsystem, cache, admission, lag event loop
+    /health   alias /live (kompatibilitas healthcheck lama)
+    /metrics  Prometheus text format (launcher: registry semua worker, label worker)
+    /shards   agregasi status shard dari Redis (mode multi-process)
+"""
+import asyncio
+import math
+import os
+import time
+from aiohttp import web
+from core.logger import logger
+from core.loop_monitor import loop_monitor
+from core.metrics import merge_expositions, registry
+from core.sharding import build_shard_status
+from core.subsystems import SUBSYSTEM_WARMUP
+
+HEALTH_PORT = int(os.getenv("PORT", "8080"))
+HEALTH_DISCONNECT_GRACE = float(os.getenv("HEALTH_DISCONNECT_GRACE", "300"))  # Detik putus sebelum /live gagal
+
+
+def _finite_ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None and math.isfinite(seconds) else None
+
+
+class HealthServer:
+    """Server HTTP di loop yang sedang berjalan. bot_core/commands_handler untuk process bot,
+    launcher untuk process launcher multi-worker (tanpa bot)."""
+
+    def __init__(self, bot_core=None, commands_handler=None, launcher=None, shard_status=None, worker_metrics=None,
+                 port=HEALTH_PORT):
+        self.bot_core = bot_core
+        self.commands_handler = commands_handler
+        self.launcher = launcher
+        self.shard_status = shard_status  # Callable blocking -> dict (dijalankan via to_thread)
+        self.worker_metrics = worker_metrics  # Callable blocking -> {worker_id: exposition} (mode launcher)
+        self.port = port
+        self.started_at = time.time()
+        self._runner = None
+
+    def _build_app(self):
+        app = web.Application()
+        app.router.add_get("/live", self.handle_live)
+        app.router.add_get("/health", self.handle_health)
+        app.router.add_get("/ready", self.handle_ready)
+        app.router.add_get("/status", self.handle_status)
+        app.router.add_get("/metrics", self.handle_metrics)
+        app.router.add_get("/shards", self.handle_shards)
+        return app
+
+    async def start(self):
+        if self._runner is not None:
+            return
+        self._runner = web.AppRunner(self._build_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "0.0.0.0", self.port).start()
+        logger.info(f"🩺 Health server listening on port {self.port}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # ---- Checks ----
+
+    def live_checks(self):
+        checks = {}
+        if self.bot_core is not None:
+            bot = self.bot_core.bot
+            disconnected_since = self.bot_core.disconnected_since
+            checks["bot_open"] = not bot.is_closed()
+            checks["gateway"] = disconnected_since is None or time.monotonic() - disconnected_since < HEALTH_DISCONNECT_GRACE
+        return checks
+
+    def ready_checks(self):
+        checks = self.live_checks()
+        if self.bot_core is not None:
+            bot = self.bot_core.bot
+            checks["gateway_ready"] = bot.is_ready() and self.bot_core.disconnected_since is None
+            checks["latency"] = math.isfinite(bot.latency)
+        if self.commands_handler is not None and SUBSYSTEM_WARMUP:
+            # Tanpa warm-up subsystem baru dibangun saat pertama dipakai - tidak ikut syarat ready
+            checks["subsystems"] = self.commands_handler.subsystems.all_ready
+        if self.launcher is not None:
+            checks["workers"] = all(self.launcher.worker_status().values())  # Worker mati di-restart launcher
+        return checks
+
+    # ---- Handlers ----
+
+    async def handle_live(self, request):
+        checks = self.live_checks()
+        return web.json_response({"live": all(checks.values()), "checks": checks},
+                                 status=200 if all(checks.values()) else 503)
+
+    async def handle_health(self, request):
+        ok = all(self.live_checks().values())
+        return web.Response(text="OK" if ok else "UNHEALTHY", status=200 if ok else 503)
+
+    async def handle_ready(self, request):
+        checks = self.ready_checks()
+        if self.launcher is not None and self.shard_status is not None:
+            try:
+                checks["shards"] = (await asyncio.to_thread(self.shard_status))["healthy"]
+            except Exception as e:
+                logger.warning(f"Shard status error: {e}")
+                checks["shards"] = False
+        ready = all(checks.values())
+        return web.json_response({"ready": ready, "checks": checks}, status=200 if ready else 503)
+
+    async def handle_status(self, request):
+        status = {
+            "uptime": round(time.time() - self.started_at, 1),
+            "pid": os.getpid(),
+            "live": self.live_checks(),
+            "ready": self.ready_checks(),
+            "event_loop": loop_monitor.get_metrics(),
+        }
+        if self.bot_core is not None:
+            bot = self.bot_core.bot
+            shard_status = build_shard_status(bot, self.bot_core.worker_id)
+            for shard in shard_status["shards"].values():
+                if shard["latency_ms"] is not None and not math.isfinite(shard["latency_ms"]):
+                    shard["latency_ms"] = None
+            status["gateway"] = {
+                "user": str(bot.user) if bot.user else None,
+                "latency_ms": _finite_ms(bot.latency),
+                "disconnected_for": round(time.monotonic() - self.bot_core.disconnected_since, 1)
+                if self.bot_core.disconnected_since is not None else None,
+                **shard_status,
+            }
+            redis_client = self.bot_core.redis_client
+            if hasattr(redis_client, "local_stats"):
+                status["cache"] = {"local": redis_client.local_stats()}
+        if self.commands_handler is not None:
+            status["subsystems"] = self.commands_handler.subsystems.status()
+            status["admission"] = self.commands_handler.admission.get_metrics()
+            status.setdefault("cache", {})["conversation"] = self.commands_handler.conversation_store.memory_report()
+        if self.launcher is not None:
+            status["workers"] = {str(worker_id): alive for worker_id, alive in self.launcher.worker_status().items()}
+        return web.json_response(status)
+
+    async def handle_metrics(self, request):
+        text = registry.render()
+        if self.worker_metrics is not None:
+            try:
+                workers = await asyncio.to_thread(self.worker_metrics)
+                text = merge_expositions({"launcher": text, **workers})
+            except Exception as e:
+                logger.warning(f"Worker metrics error: {e}")
+        return web.Response(body=text.encode("utf-8"),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    async def handle_shards(self, request):
+        if self.shard_status is None:
+            return web.json_response({"error": "shard status unavailable"}, status=404)
+        try:
+            status = await asyncio.to_thread(self.shard_status)
+            code = 200 if status["healthy"] else 503
+        except Exception as e:
+            status, code = {"healthy": False, "error": str(e)}, 503
+        return web.json_response(status, status=code)
@@ -0,0 +1,151 @@
+"""
+Loop Monitor Module - Sampler lag event loop + detector blocking call
+Sampler: task yang sleep LOOP_MONITOR_INTERVAL lalu mengukur keterlambatan bangun (lag = aktual - jadwal),
+diumpankan ke histogram sn_event_loop_lag_seconds dan di-log jika melewati LOOP_LAG_WARN.
+Debug mode (LOOP_BLOCK_DEBUG=true): watchdog thread memeriksa heartbeat loop; jika loop tidak
+memproses callback lebih dari LOOP_BLOCK_THRESHOLD detik, stack thread loop diambil (sys._current_frames)
+saat masih terblokir, lalu dilaporkan ke log + counter sn_event_loop_blocks_total{site} setelah loop pulih.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from core.logger import logger
+from core.metrics import LOOP_LAG, registry
+
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.5"))  # Detik antar sample
+LOOP_LAG_WARN = float(os.getenv("LOOP_LAG_WARN", "0.25"))  # Lag di atas ini di-log warning
+LOOP_BLOCK_DEBUG = os.getenv("LOOP_BLOCK_DEBUG", "false").lower() == "true"
+LOOP_BLOCK_THRESHOLD = float(os.getenv("LOOP_BLOCK_THRESHOLD", "0.1"))  # Detik blocking sebelum stack diambil
+LOOP_BLOCK_STACK_DEPTH = 12  # Frame terdalam yang disimpan per laporan
+WARN_LOG_INTERVAL = 10.0  # Rate limit log lag (detik)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LOOP_BLOCKS = registry.counter(
+    "sn_event_loop_blocks", "Callback yang memblokir event loop > LOOP_BLOCK_THRESHOLD, per lokasi kode", ("site",))
+LOOP_BLOCK_DURATION = registry.histogram(
+    "sn_event_loop_block_duration_seconds", "Durasi blocking event loop yang terdeteksi watchdog",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+
+
+def blocking_site(frame):
+    """Lokasi kode bot terdalam (file:function) dari stack; fallback ke frame terdalam"""
+    innermost = frame
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(ROOT_DIR) and not filename.endswith("loop_monitor.py"):
+            return f"{os.path.relpath(filename, ROOT_DIR)}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    if innermost is None:
+        return "unknown"
+    return f"{os.path.basename(innermost.f_code.co_filename)}:{innermost.f_code.co_name}"
+
+
+class LoopMonitor:
+    """Sampler lag (selalu aktif setelah start) + watchdog blocking call (debug mode)"""
+
+    def __init__(self, interval=LOOP_MONITOR_INTERVAL, warn_threshold=LOOP_LAG_WARN,
+                 block_debug=LOOP_BLOCK_DEBUG, block_threshold=LOOP_BLOCK_THRESHOLD):
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self.block_debug = block_debug
+        self.block_threshold = block_threshold
+        self._loop = None
+        self._loop_thread_id = None
+        self._task = None
+        self._watchdog = None
+        self._stop = threading.Event()
+        self._heartbeat = time.monotonic()
+        self._last_warn = 0.0
+        self.samples = 0
+        self.max_lag = 0.0
+        self.recent_lag = deque(maxlen=120)  # ~1 menit pada interval default
+        self.blocks = deque(maxlen=20)  # Laporan blocking terakhir
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Mulai di event loop yang sedang berjalan (idempotent, aman dipanggil tiap reconnect)"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._task = self._loop.create_task(self._sample())
+        if self.block_debug and (self._watchdog is None or not self._watchdog.is_alive()):
+            self._stop.clear()
+            self._heartbeat = time.monotonic()
+            self._loop.call_soon(self._beat)
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+            logger.info(f"🐢 Loop block detector enabled (threshold {self.block_threshold * 1000:.0f}ms)")
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _sample(self):
+        while True:
+            scheduled = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - scheduled)
+            self.samples += 1
+            self.max_lag = max(self.max_lag, lag)
+            self.recent_lag.append(lag)
+            LOOP_LAG.observe(value=lag)
+            if lag >= self.warn_threshold and time.monotonic() - self._last_warn >= WARN_LOG_INTERVAL:
+                self._last_warn = time.monotonic()
+                logger.warning(f"🐢 Event loop lag {lag * 1000:.0f}ms (warn threshold {self.warn_threshold * 1000:.0f}ms)")
+
+    def _beat(self):
+        """Callback ringan di loop: update heartbeat untuk watchdog"""
+        self._heartbeat = time.monotonic()
+        if not self._stop.is_set():
+            self._loop.call_later(self.block_threshold / 4, self._beat)
+
+    def _watch(self):
+        """Watchdog thread: ambil stack loop saat heartbeat macet, laporkan setelah loop pulih"""
+        poll = self.block_threshold / 4
+        stalled_since = None
+        captured = None
+        while not self._stop.wait(poll):
+            if self._loop.is_closed():
+                return
+            last_beat = self._heartbeat
+            stalled = time.monotonic() - last_beat
+            if stalled >= self.block_threshold:
+                if stalled_since != last_beat:
+                    # Blocking baru: stack diambil sekarang, selagi callback masih berjalan
+                    stalled_since = last_beat
+                    frame = sys._current_frames().get(self._loop_thread_id)
+                    captured = (blocking_site(frame), traceback.format_stack(frame)[-LOOP_BLOCK_STACK_DEPTH:]) if frame else None
+            elif captured is not None:
+                # Heartbeat kembali jalan: durasi total = beat terakhir sebelum macet -> beat sekarang
+                self._report(captured[0], captured[1], last_beat - stalled_since)
+                stalled_since = captured = None
+
+    def _report(self, site, stack, duration):
+        LOOP_BLOCKS.inc(site)
+        LOOP_BLOCK_DURATION.observe(value=duration)
+        self.blocks.append({"site": site, "duration": round(duration, 3), "at": time.time()})
+        logger.warning(f"🐢 Event loop blocked {duration * 1000:.0f}ms at {site}\n{''.join(stack).rstrip()}")
+
+    def get_metrics(self):
+        recent = list(self.recent_lag)
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "avg_lag_ms": round(sum(recent) / len(recent) * 1000, 1) if recent else 0.0,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "block_debug": self.block_debug,
+            "blocks": list(self.blocks),
+        }
+
+
+loop_monitor = LoopMonitor()
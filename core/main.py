@@ -15,6 +15,9 @@ if parent_dir not in sys.path:
 if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
+# Import paling awal: titik nol startup profile (STARTUP_PROFILE=true)
+from core.startup_profiler import startup_profiler
+
 try:
     from core.bot_core import BotCore
 except ImportError:
@@ -34,56 +37,83 @@ except ImportError:
                 pass
             def log_analytics_to_railway(self):
                 pass
-import threading
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import asyncio
+from core.sharding import ShardLauncher, collect_shard_status, collect_worker_metrics
+from core.health_server import HealthServer
 
-class HealthCheckHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        if self.path == '/health':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/plain')
-            self.end_headers()
-            self.wfile.write(b'OK')
-        else:
-            self.send_response(404)
-            self.end_headers()
-    
-    def log_message(self, format, *args):
-        pass  # Suppress default logging
+# Launcher aktif (mode multi-process) - dipakai health server untuk liveness worker
+shard_launcher = None
+_status_redis = None
+
+def _get_status_redis():
+    global _status_redis
+    if _status_redis is None:
+        import redis
+        _status_redis = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"))
+    return _status_redis
+
+def get_shard_status():
+    """Status shard teragregasi dari heartbeat worker di Redis + liveness process worker"""
+    status = collect_shard_status(_get_status_redis())
+    if shard_launcher:
+        alive = shard_launcher.worker_status()
+        status["processes"] = {str(worker_id): is_alive for worker_id, is_alive in alive.items()}
+        status["healthy"] = status["healthy"] and all(alive.values())
+    return status
+
+def get_worker_metrics():
+    """Registry metrics yang di-publish worker ke Redis (untuk /metrics launcher)"""
+    return collect_worker_metrics(_get_status_redis())
 
-def start_health_server():
-    """Start health check server in background"""
-    port = int(os.environ.get('PORT', 8080))
-    server = HTTPServer(('0.0.0.0', port), HealthCheckHandler)
+async def run_launcher(launcher):
+    """Process launcher: health server (agregasi shard) + supervisi worker di satu event loop"""
+    health_server = HealthServer(launcher=launcher, shard_status=get_shard_status, worker_metrics=get_worker_metrics)
+    await health_server.start()
+    try:
+        await launcher.run_async()
+    finally:
+        await health_server.stop()
+
+def run_bot(health=True):
+    """Inisialisasi dan jalankan satu process bot (single process atau worker launcher)"""
+    # Initialize bot core with timeout handling
+    print("Initializing SN Fun Bot...")
+    startup_profiler.mark("imports_done")
+    with startup_profiler.phase("bot_core"):
+        bot_core = BotCore()
     
-    def run_server():
-        print(f"Health check server starting on port {port}")
-        server.serve_forever()
+    # Initialize command handlers
+    print("Loading command handlers...")
+    with startup_profiler.phase("commands_handler"):
+        commands_handler = CommandsHandler(bot_core)
     
-    thread = threading.Thread(target=run_server, daemon=True)
-    thread.start()
-    return server
+    # Health/readiness server di event loop bot (worker launcher: port dipegang launcher)
+    if health:
+        bot_core.health_server = HealthServer(bot_core, commands_handler, shard_status=get_shard_status)
+    
+    # Log bot startup
+    print("Bot ready, starting...")
+    # Note: Analytics logging disabled to reduce Railway log spam
+    
+    # Start bot
+    bot_core.run()
 
 def main():
     """Main function untuk menjalankan Discord bot"""
+    global shard_launcher
     try:
-        # Start health check server for Railway
-        start_health_server()
-        
-        # Initialize bot core with timeout handling
-        print("Initializing SN Fun Bot...")
-        bot_core = BotCore()
-        
-        # Initialize command handlers
-        print("Loading command handlers...")
-        commands_handler = CommandsHandler(bot_core)
-        
-        # Log bot startup
-        print("Bot ready, starting...")
-        # Note: Analytics logging disabled to reduce Railway log spam
+        # Mode multi-process: BOT_WORKERS > 1 -> launcher + worker per range shard
+        workers = int(os.getenv("BOT_WORKERS", "1"))
+        if workers > 1:
+            shard_count = int(os.getenv("SHARD_COUNT", "0")) or None
+            shard_launcher = ShardLauncher(workers, shard_count=shard_count, token=os.getenv("DISCORD_TOKEN"))
+            try:
+                asyncio.run(run_launcher(shard_launcher))
+            except KeyboardInterrupt:
+                pass
+            return
         
-        # Start bot
-        bot_core.run()
+        run_bot()
         
     except Exception as e:
         print(f"Failed to start bot: {e}")
@@ -0,0 +1,252 @@
+"""
+Metrics Module - Registry Prometheus ringan (tanpa dependency) untuk endpoint /metrics
+Counter, Gauge dan Histogram dengan label; update di hot path hanya lookup dict + increment di bawah lock.
+Gauge bisa berupa callback (queue depth scheduler/admission) yang dievaluasi saat scrape saja.
+Format output: Prometheus text exposition 0.0.4.
+Mode multi-process (BOT_WORKERS > 1): registry tiap worker di-publish ke Redis bersama heartbeat shard
+dan /metrics launcher menggabungkannya dengan label worker (merge_expositions), data tertinggal maks
+SHARD_STATUS_INTERVAL detik.
+"""
+import bisect
+import threading
+from core.logger import logger
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+    suffix = ""  # Ditambahkan ke nama sample dan HELP/TYPE (counter: _total)
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}  # {label_values: value/state}
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return tuple(str(label) for label in labels)
+
+    def header(self):
+        name = self.name + self.suffix
+        return [f"# HELP {name} {self.documentation}", f"# TYPE {name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+    suffix = "_total"
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self):
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{self.suffix}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback  # () -> {label_values_tuple: value} atau angka (tanpa label)
+
+    def set(self, *labels, value):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, callback):
+        self.callback = callback
+
+    def collect(self):
+        if self.callback:
+            try:
+                result = self.callback()
+            except Exception as e:
+                logger.debug(f"Gauge callback {self.name} failed: {e}")
+                result = {}
+            items = list(result.items()) if isinstance(result, dict) else [((), result)]
+            items = [((key,) if not isinstance(key, tuple) else key, value) for key, value in items]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *labels, value):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]  # [bucket counts, sum, count]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def collect(self):
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing  # Idempotent (modul di-import ulang / handler dibuat ulang)
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), callback=None):
+        return self._register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+def _add_label(sample, label):
+    """Sisipkan label di depan label lain pada satu baris sample"""
+    name, sep, rest = sample.partition("{")
+    if sep:
+        return f"{name}{{{label},{rest}"
+    name, _, value = sample.partition(" ")
+    return f"{name}{{{label}}} {value}"
+
+
+def merge_expositions(expositions, label_name="worker"):
+    """Gabungkan output render() beberapa process {label_value: text} menjadi satu exposition.
+    HELP/TYPE per metric family ditulis sekali, setiap sample diberi label {label_name}="..."."""
+    families = {}  # {family: {"header": [...], "samples": [...]}} - urutan kemunculan pertama
+    for label_value, text in expositions.items():
+        label = f'{label_name}="{_escape(label_value)}"'
+        family = None
+        for line in text.splitlines():
+            if not line:
+                continue
+            if line.startswith("# HELP "):
+                family = line.split(" ", 3)[2]
+                entry = families.setdefault(family, {"header": [], "samples": []})
+                if not entry["header"]:
+                    entry["header"].append(line)
+            elif line.startswith("# TYPE "):
+                entry = families.setdefault(line.split(" ", 3)[2], {"header": [], "samples": []})
+                if len(entry["header"]) < 2:
+                    entry["header"].append(line)
+            elif family is not None:
+                families[family]["samples"].append(_add_label(line, label))
+    lines = []
+    for entry in families.values():
+        lines.extend(entry["header"])
+        lines.extend(entry["samples"])
+    return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# ---- Metrics bot ----
+COMMAND_LATENCY = registry.histogram(
+    "sn_command_duration_seconds", "Durasi command !sn end-to-end per kategori", ("category",))
+CACHE_REQUESTS = registry.counter(
+    "sn_cache_requests", "Lookup cache per tier dan hasil (hit/miss)", ("tier", "result"))
+SCRAPE_LATENCY = registry.histogram(
+    "sn_scrape_duration_seconds", "Durasi scraping per domain", ("domain",))
+SCRAPE_RESULTS = registry.counter(
+    "sn_scrape_requests", "Hasil scraping per domain (ok/empty/http_error/error)", ("domain", "result"))
+GEMINI_LATENCY = registry.histogram(
+    "sn_gemini_request_duration_seconds", "Latency request Gemini per API key dan model", ("key", "model"))
+GEMINI_REQUESTS = registry.counter(
+    "sn_gemini_requests", "Request Gemini per API key, model dan status (200/429/timeout/...)", ("key", "model", "status"))
+GACHA_RENDER = registry.histogram(
+    "sn_gacha_render_duration_seconds", "Durasi render kartu gacha", ("rarity",))
+LOOP_LAG = registry.histogram(
+    "sn_event_loop_lag_seconds", "Keterlambatan event loop (sleep terjadwal vs aktual)",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+QUEUE_DEPTH = registry.gauge(
+    "sn_queue_depth", "Jumlah request menunggu per antrian", ("queue",))
+IN_FLIGHT = registry.gauge(
+    "sn_in_flight", "Jumlah request aktif per antrian", ("queue",))
+
+# Kategori command dengan cardinality terbatas (selain hasil deteksi MEMBER/GROUP/...)
+COMMAND_KEYWORDS = ("help", "analytics", "db", "database", "clearcache", "maintenance", "monitor", "gacha",
+                    "bias", "match", "fortune", "ramalan", "gallery", "traces", "twitter", "youtube",
+                    "instagram", "tiktok", "sosmed")
+
+
+def record_cache(tier, hit):
+    CACHE_REQUESTS.inc(tier, "hit" if hit else "miss")
+
+
+def command_category(trace):
+    """Label kategori command dari root span trace !sn"""
+    category = trace.root.attributes.get("category")
+    if category:
+        return category
+    keyword = (trace.root.attributes.get("command") or "").split(" ", 1)[0].lower()
+    return keyword if keyword in COMMAND_KEYWORDS else "other"
+
+
+def observe_command_trace(trace):
+    """Listener tracer: latency command dari root span"""
+    if trace.name == "sn_command":
+        COMMAND_LATENCY.observe(command_category(trace), value=trace.duration)
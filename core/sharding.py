@@ -0,0 +1,215 @@
+"""
+Sharding Module - Mode deployment AutoShardedBot multi-process
+Satu process = satu GIL: deteksi, scraping, parsing dan render gambar gacha saling berebut CPU.
+Launcher menjalankan N worker process, masing-masing memegang satu range shard Discord
+(SHARD_IDS dari SHARD_COUNT total). Setiap worker mem-publish status shard ke Redis
+(sn:shards:worker:{id}, TTL singkat) sehingga health server di process utama bisa agregasi.
+Worker tanpa health server sendiri juga mem-publish registry metrics (sn:metrics:worker:{id})
+yang digabung oleh /metrics launcher.
+
+    BOT_WORKERS=4 python core/main.py          # 4 worker, shard count dari Discord /gateway/bot
+    BOT_SHARDED=true python core/main.py       # 1 process, AutoShardedBot (semua shard)
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from core.logger import logger
+
+STATUS_KEY_PREFIX = "sn:shards:worker:"
+METRICS_KEY_PREFIX = "sn:metrics:worker:"
+STATUS_INTERVAL = float(os.getenv("SHARD_STATUS_INTERVAL", "10"))
+STATUS_TTL = int(os.getenv("SHARD_STATUS_TTL", "30"))  # Worker dianggap mati jika tidak heartbeat selama ini
+WORKER_RESTART_BACKOFF = 5.0
+WORKER_RESTART_MAX_BACKOFF = 120.0
+
+
+def shard_config_from_env():
+    """Return (sharded, shard_count, shard_ids, worker_id) dari env yang diset launcher/operator"""
+    shard_count = int(os.getenv("SHARD_COUNT", "0")) or None
+    shard_ids = [int(shard) for shard in os.getenv("SHARD_IDS", "").split(",") if shard.strip()] or None
+    sharded = os.getenv("BOT_SHARDED", "false").lower() == "true" or shard_count is not None
+    worker_id = int(os.getenv("WORKER_ID", "0"))
+    return sharded, shard_count, shard_ids, worker_id
+
+
+def is_primary_worker():
+    """Worker 0 yang mengirim status message / tugas global lain (hindari duplikat antar worker)"""
+    return shard_config_from_env()[3] == 0
+
+
+def plan_shards(shard_count, workers):
+    """Bagi shard 0..shard_count-1 menjadi range contiguous per worker"""
+    workers = max(1, min(workers, shard_count))
+    base, extra = divmod(shard_count, workers)
+    plan = []
+    start = 0
+    for worker_id in range(workers):
+        size = base + (1 if worker_id < extra else 0)
+        plan.append(list(range(start, start + size)))
+        start += size
+    return plan
+
+
+def fetch_recommended_shards(token, fallback):
+    """Jumlah shard yang direkomendasikan Discord (GET /gateway/bot)"""
+    try:
+        import requests
+        response = requests.get(
+            "https://discord.com/api/v10/gateway/bot",
+            headers={"Authorization": f"Bot {token}"},
+            timeout=10,
+        )
+        response.raise_for_status()
+        return int(response.json()["shards"])
+    except Exception as e:
+        logger.warning(f"Could not fetch recommended shard count, using {fallback}: {e}")
+        return fallback
+
+
+def build_shard_status(bot, worker_id):
+    """Snapshot status shard process ini"""
+    shards = {}
+    latencies = dict(getattr(bot, "latencies", []) or [])
+    shard_map = getattr(bot, "shards", None) or {}
+    if shard_map:
+        for shard_id, shard in shard_map.items():
+            shards[str(shard_id)] = {
+                "latency_ms": round(latencies.get(shard_id, shard.latency) * 1000, 1),
+                "closed": shard.is_closed(),
+                "guilds": 0,
+            }
+    else:
+        shards["0"] = {"latency_ms": round(bot.latency * 1000, 1), "closed": bot.is_closed(), "guilds": 0}
+    for guild in bot.guilds:
+        entry = shards.get(str(guild.shard_id or 0))
+        if entry:
+            entry["guilds"] += 1
+    return {
+        "worker": worker_id,
+        "pid": os.getpid(),
+        "ready": bot.is_ready(),
+        "shard_count": bot.shard_count or 1,
+        "guilds": len(bot.guilds),
+        "shards": shards,
+        "updated_at": time.time(),
+    }
+
+
+async def publish_shard_status(bot, redis_client, worker_id, publish_metrics=False):
+    """Heartbeat status shard (dan opsional registry metrics) ke Redis (loop selama bot berjalan)"""
+    from core.metrics import registry
+    client = getattr(redis_client, "raw_client", redis_client)
+    while not bot.is_closed():
+        try:
+            payload = json.dumps(build_shard_status(bot, worker_id))
+            await asyncio.to_thread(client.setex, f"{STATUS_KEY_PREFIX}{worker_id}", STATUS_TTL, payload)
+            if publish_metrics:
+                await asyncio.to_thread(client.setex, f"{METRICS_KEY_PREFIX}{worker_id}", STATUS_TTL, registry.render())
+        except Exception as e:
+            logger.warning(f"Shard status publish error: {e}")
+        await asyncio.sleep(STATUS_INTERVAL)
+
+
+def collect_shard_status(redis_client):
+    """Agregasi status semua worker dari Redis (blocking)"""
+    client = getattr(redis_client, "raw_client", redis_client)
+    workers = []
+    for key in client.scan_iter(match=f"{STATUS_KEY_PREFIX}*", count=100):
+        raw = client.get(key)
+        if raw:
+            workers.append(json.loads(raw))
+    workers.sort(key=lambda worker: worker["worker"])
+    shards = {shard_id: shard for worker in workers for shard_id, shard in worker["shards"].items()}
+    shard_count = max((worker["shard_count"] for worker in workers), default=0)
+    return {
+        "workers": workers,
+        "shard_count": shard_count,
+        "shards_reporting": len(shards),
+        "shards_closed": sorted(int(shard_id) for shard_id, shard in shards.items() if shard["closed"]),
+        "guilds": sum(worker["guilds"] for worker in workers),
+        "healthy": bool(workers) and all(worker["ready"] for worker in workers)
+                   and len(shards) >= shard_count and not any(shard["closed"] for shard in shards.values()),
+    }
+
+
+def collect_worker_metrics(redis_client):
+    """Registry metrics tiap worker dari Redis (blocking). Return {worker_id: exposition text}"""
+    client = getattr(redis_client, "raw_client", redis_client)
+    expositions = {}
+    for key in client.scan_iter(match=f"{METRICS_KEY_PREFIX}*", count=100):
+        raw = client.get(key)
+        if raw:
+            key = key.decode() if isinstance(key, bytes) else key
+            expositions[key[len(METRICS_KEY_PREFIX):]] = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+    return dict(sorted(expositions.items()))
+
+
+def _worker_main(worker_id, shard_ids, shard_count):
+    """Entry point worker process (spawn): set env shard lalu jalankan bot"""
+    os.environ["WORKER_ID"] = str(worker_id)
+    os.environ["SHARD_IDS"] = ",".join(str(shard) for shard in shard_ids)
+    os.environ["SHARD_COUNT"] = str(shard_count)
+    from core.main import run_bot
+    run_bot(health=False)  # Port health server dipegang launcher
+
+
+class ShardLauncher:
+    """Jalankan dan awasi N worker process, restart worker yang mati dengan backoff"""
+
+    def __init__(self, workers, shard_count=None, token=None):
+        self.workers = max(1, workers)
+        self.shard_count = shard_count or fetch_recommended_shards(token, fallback=self.workers)
+        self.plan = plan_shards(self.shard_count, self.workers)
+        self._context = multiprocessing.get_context("spawn")  # Fresh interpreter, tanpa state fork
+        self.processes = {}  # {worker_id: Process}
+        self._restarts = {}  # {worker_id: (count, next_allowed_at)}
+
+    def _start_worker(self, worker_id):
+        process = self._context.Process(
+            target=_worker_main,
+            args=(worker_id, self.plan[worker_id], self.shard_count),
+            name=f"sn-worker-{worker_id}",
+            daemon=False,
+        )
+        process.start()
+        self.processes[worker_id] = process
+        logger.info(f"🧩 Worker {worker_id} started (pid {process.pid}, shards {self.plan[worker_id]})")
+
+    def worker_status(self):
+        """Liveness process worker (dilihat dari launcher)"""
+        return {worker_id: process.is_alive() for worker_id, process in self.processes.items()}
+
+    def _restart_dead_workers(self):
+        now = time.monotonic()
+        for worker_id, process in list(self.processes.items()):
+            if process.is_alive():
+                continue
+            count, next_allowed_at = self._restarts.get(worker_id, (0, 0.0))
+            if now < next_allowed_at:
+                continue
+            logger.error(f"🧩 Worker {worker_id} exited (code {process.exitcode}), restarting")
+            backoff = min(WORKER_RESTART_MAX_BACKOFF, WORKER_RESTART_BACKOFF * 2 ** count)
+            self._restarts[worker_id] = (count + 1, now + backoff)
+            self._start_worker(worker_id)
+
+    def _stop_workers(self):
+        logger.info("🧩 Stopping workers...")
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes.values():
+            process.join(timeout=10)
+
+    async def run_async(self):
+        """Supervisi worker di event loop (health server launcher berjalan di loop yang sama)"""
+        logger.info(f"🧩 Launching {len(self.plan)} workers for {self.shard_count} shards")
+        for worker_id in range(len(self.plan)):
+            self._start_worker(worker_id)
+        try:
+            while True:
+                await asyncio.sleep(2)
+                self._restart_dead_workers()
+        finally:
+            await asyncio.to_thread(self._stop_workers)
@@ -0,0 +1,124 @@
+"""
+Startup Profiler Module - Wall time per import, fase init dan network fetch saat startup
+Aktif dengan STARTUP_PROFILE=true: fase (DB load, detector index, gacha/bias load, fetch CSV fallback)
+dicatat lewat startup_profiler.phase(...) dan report ranking di-log saat gateway ready.
+Waktu import diambil dari `python -X importtime` (lihat scripts/startup_profile.py, yang juga
+mengecek budget dan exit non-zero untuk CI).
+"""
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from core.logger import logger
+
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "false").lower() == "true"
+
+KIND_IMPORT = "import"
+KIND_PHASE = "phase"
+KIND_NETWORK = "network"
+
+# Baris stderr -X importtime: "import time:       123 |      4567 | pandas.core"
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+class StartupProfiler:
+    """Kumpulkan durasi (kind, name) selama startup. No-op jika tidak aktif"""
+
+    def __init__(self, enabled=STARTUP_PROFILE):
+        self.enabled = enabled
+        self.started_at = time.perf_counter()
+        self._lock = threading.Lock()
+        self.entries = []  # [{"kind", "name", "seconds"}]
+        self.marks = {}  # {name: detik sejak process start}
+
+    def record(self, name, seconds, kind=KIND_PHASE):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.entries.append({"kind": kind, "name": name, "seconds": seconds})
+
+    @contextmanager
+    def phase(self, name, kind=KIND_PHASE):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, kind)
+
+    def mark(self, name):
+        """Catat titik waktu (mis. gateway_ready) relatif terhadap process start"""
+        if self.enabled and name not in self.marks:
+            self.marks[name] = time.perf_counter() - self.started_at
+
+    def log_report(self, top=15):
+        if not self.enabled:
+            return
+        for line in format_report(self.entries, self.marks, top=top).splitlines():
+            logger.info(line)
+
+
+startup_profiler = StartupProfiler()
+
+
+def parse_importtime(stderr_text, depth=0):
+    """Parse output -X importtime. Return entries import (cumulative) untuk modul di level nesting `depth`
+    (0 = import top-level seperti pandas, discord, PIL)"""
+    entries = []
+    for line in stderr_text.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative_us, indent, module = match.groups()
+        if (len(indent) - 1) // 2 != depth:
+            continue
+        entries.append({"kind": KIND_IMPORT, "name": module, "seconds": int(cumulative_us) / 1e6})
+    return entries
+
+
+def rank_entries(entries):
+    return sorted(entries, key=lambda entry: entry["seconds"], reverse=True)
+
+
+def format_report(entries, marks=None, top=15):
+    """Report ranking: entry paling lambat dulu, plus total per kind dan marks"""
+    lines = ["⏱️ Startup profile (slowest first)"]
+    for entry in rank_entries(entries)[:top]:
+        lines.append(f"  {entry['seconds']:>7.2f}s  {entry['kind']:<8} {entry['name']}")
+    totals = {}
+    for entry in entries:
+        totals[entry["kind"]] = totals.get(entry["kind"], 0.0) + entry["seconds"]
+    if totals:
+        lines.append("  totals: " + ", ".join(f"{kind} {seconds:.2f}s" for kind, seconds in sorted(totals.items())))
+    for name, seconds in (marks or {}).items():
+        lines.append(f"  mark: {name} at {seconds:.2f}s")
+    return "\n".join(lines)
+
+
+def parse_budgets(spec):
+    """"total=20,import:pandas=3,phase:db_load=5" -> {"total": 20.0, "import:pandas": 3.0, ...}"""
+    budgets = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        key, value = item.split("=", 1)
+        budgets[key.strip()] = float(value)
+    return budgets
+
+
+def check_budgets(entries, budgets, total_seconds):
+    """Return list pelanggaran budget: (key, actual, budget). Key tanpa kind cocok dengan semua kind"""
+    violations = []
+    for key, budget in budgets.items():
+        if key == "total":
+            actual = total_seconds
+        else:
+            kind, _, name = key.rpartition(":")
+            actual = sum(entry["seconds"] for entry in entries
+                         if entry["name"] == name and (not kind or entry["kind"] == kind))
+        if actual > budget:
+            violations.append((key, actual, budget))
+    return violations
@@ -0,0 +1,111 @@
+"""
+Subsystems Module - Inisialisasi subsystem secara lazy (saat pertama dipakai) atau warm-up di background
+Gacha (JSON foto ~770 KB + CSV + integrasi), bias detector (iterrows seluruh DataFrame), maintenance
+dan social media handler tidak lagi dibangun sebelum bot connect ke gateway. Setiap subsystem punya
+readiness flag sendiri; build dijalankan di thread agar event loop (heartbeat gateway) tidak terblokir.
+"""
+import asyncio
+import os
+import threading
+import time
+from core.logger import logger
+from core.startup_profiler import startup_profiler
+
+SUBSYSTEM_WARMUP = os.getenv("SUBSYSTEM_WARMUP", "true").lower() == "true"  # Warm-up setelah on_ready
+
+STATE_PENDING = "pending"
+STATE_LOADING = "loading"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+
+
+class LazySubsystem:
+    """Satu subsystem: factory dipanggil sekali, hasil (atau kegagalan) di-cache"""
+
+    def __init__(self, key, name, factory):
+        self.key = key
+        self.name = name
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._instance = None
+        self.state = STATE_PENDING
+        self.error = None
+        self.load_time = None
+
+    @property
+    def ready(self):
+        return self.state == STATE_READY
+
+    def peek(self):
+        """Instance jika sudah siap, tanpa memicu build"""
+        return self._instance if self.ready else None
+
+    def get(self):
+        """Build (blocking) jika belum. Return instance, atau None jika build gagal"""
+        if self.state in (STATE_READY, STATE_FAILED):
+            return self._instance
+        with self._lock:
+            if self.state in (STATE_READY, STATE_FAILED):
+                return self._instance
+            self.state = STATE_LOADING
+            start = time.perf_counter()
+            try:
+                with startup_profiler.phase(f"{self.key}_load"):
+                    self._instance = self._factory()
+                self.state = STATE_READY
+                self.load_time = time.perf_counter() - start
+                logger.info(f"✅ {self.name} initialized in {self.load_time:.2f}s")
+            except Exception as e:
+                self.state = STATE_FAILED
+                self.error = str(e)
+                logger.warning(f"⚠️ {self.name} initialization failed: {e}")
+            return self._instance
+
+    async def get_async(self):
+        """Build di thread pool - aman dipanggil dari command handler"""
+        if self.state in (STATE_READY, STATE_FAILED):
+            return self._instance
+        return await asyncio.to_thread(self.get)
+
+    def status(self):
+        return {
+            "state": self.state,
+            "load_time": round(self.load_time, 2) if self.load_time is not None else None,
+            "error": self.error,
+        }
+
+
+class SubsystemRegistry:
+    """Kumpulan LazySubsystem dengan warm-up background berurutan"""
+
+    def __init__(self):
+        self._subsystems = {}
+        self._warmup_task = None
+
+    def register(self, key, name, factory):
+        self._subsystems[key] = LazySubsystem(key, name, factory)
+        return self._subsystems[key]
+
+    def __getitem__(self, key):
+        return self._subsystems[key]
+
+    async def warm_up(self):
+        """Build semua subsystem yang belum siap satu per satu (tidak berebut CPU dengan command)"""
+        start = time.perf_counter()
+        for subsystem in self._subsystems.values():
+            await subsystem.get_async()
+        logger.info(f"🔥 Subsystem warm-up done in {time.perf_counter() - start:.2f}s: "
+                    f"{', '.join(f'{key}={s.state}' for key, s in self._subsystems.items())}")
+
+    def schedule_warm_up(self):
+        """Jadwalkan warm-up sekali (on_ready bisa terpanggil ulang setelah reconnect)"""
+        if self._warmup_task is None:
+            self._warmup_task = asyncio.create_task(self.warm_up())
+        return self._warmup_task
+
+    @property
+    def all_ready(self):
+        return all(subsystem.state in (STATE_READY, STATE_FAILED) for subsystem in self._subsystems.values())
+
+    def status(self):
+        return {key: subsystem.status() for key, subsystem in self._subsystems.items()}
@@ -0,0 +1,229 @@
+"""
+Tracing Module - Span tracing ringan untuk pipeline !sn (context via contextvars)
+Satu trace per command: detect -> cache lookup -> scrape per site -> parse -> prompt build -> Gemini
+-> Discord send. Span anak otomatis menempel ke span aktif (termasuk task asyncio.gather, karena
+task menyalin context). Trace paling lambat disimpan di buffer kecil untuk `!sn traces`, dan bisa
+diekspor ke file JSON Lines berformat OTLP/JSON (TRACE_EXPORT_FILE).
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from core.logger import logger
+
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "20"))  # Jumlah trace paling lambat yang disimpan
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "")  # Kosong = tanpa export
+SERVICE_NAME = "sn-fun-bot"
+
+_current_span = contextvars.ContextVar("sn_current_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start", "start_ns", "duration", "attributes", "error")
+
+    def __init__(self, trace, name, parent_id, attributes):
+        self.trace = trace
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start = time.perf_counter()
+        self.start_ns = time.time_ns()
+        self.duration = None
+        self.attributes = dict(attributes)
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.start
+
+    @property
+    def offset(self):
+        """Detik sejak root span dimulai"""
+        return self.start - self.trace.root.start
+
+
+class Trace:
+    def __init__(self, name, attributes):
+        self.trace_id = secrets.token_hex(16)
+        self.spans = []
+        self.root = Span(self, name, None, attributes)
+        self.spans.append(self.root)
+
+    @property
+    def duration(self):
+        return self.root.duration or 0.0
+
+    @property
+    def name(self):
+        return self.root.name
+
+
+class Tracer:
+    """Kelola trace aktif, buffer trace paling lambat dan export OTLP/JSON"""
+
+    def __init__(self, buffer_size=TRACE_BUFFER_SIZE, export_path=TRACE_EXPORT_FILE):
+        self.buffer_size = buffer_size
+        self.export_path = export_path
+        self._lock = threading.Lock()
+        self._slowest = []  # min-heap [(duration, seq, trace)]
+        self._seq = itertools.count()
+        self._listeners = []  # Callback(trace) setelah trace selesai (mis. metrics)
+        self.finished = 0
+
+    @contextmanager
+    def trace(self, name, **attributes):
+        """Root span satu request. Nested trace() diperlakukan sebagai span biasa"""
+        if _current_span.get() is not None:
+            with self.span(name, **attributes) as span:
+                yield span
+            return
+        trace = Trace(name, attributes)
+        token = _current_span.set(trace.root)
+        try:
+            yield trace.root
+        except BaseException as e:
+            trace.root.error = repr(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            trace.root.finish()
+            self._finish_trace(trace)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Child span dari span aktif; no-op (yield None) jika tidak ada trace aktif"""
+        parent = _current_span.get()
+        if parent is None:
+            yield None
+            return
+        span = Span(parent.trace, name, parent.span_id, attributes)
+        parent.trace.spans.append(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = repr(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.finish()
+
+    def add_listener(self, callback):
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def _finish_trace(self, trace):
+        for callback in self._listeners:
+            try:
+                callback(trace)
+            except Exception as e:
+                logger.debug(f"Trace listener error: {e}")
+        with self._lock:
+            self.finished += 1
+            item = (trace.duration, next(self._seq), trace)
+            if len(self._slowest) < self.buffer_size:
+                heapq.heappush(self._slowest, item)
+            elif trace.duration > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, item)
+        if self.export_path:
+            self._export(trace)
+
+    def slowest(self, limit=None):
+        with self._lock:
+            traces = [item[2] for item in sorted(self._slowest, key=lambda item: item[0], reverse=True)]
+        return traces[:limit] if limit else traces
+
+    def _export(self, trace):
+        line = json.dumps(to_otlp_json(trace), ensure_ascii=False) + "\n"
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop:
+            loop.run_in_executor(None, self._append_line, line)  # File IO di luar event loop
+        else:
+            self._append_line(line)
+
+    def _append_line(self, line):
+        try:
+            with self._lock, open(self.export_path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except Exception as e:
+            logger.warning(f"Trace export error: {e}")
+
+
+tracer = Tracer()
+
+
+def current_span():
+    return _current_span.get()
+
+
+def set_attribute(key, value):
+    """Set attribute pada span aktif (no-op tanpa trace)"""
+    span = _current_span.get()
+    if span is not None:
+        span.set_attribute(key, value)
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp_json(trace):
+    """Trace -> satu ExportTraceServiceRequest OTLP/JSON (bisa di-ingest collector via file receiver)"""
+    spans = []
+    for span in trace.spans:
+        duration_ns = int((span.duration or 0.0) * 1e9)
+        spans.append({
+            "traceId": trace.trace_id,
+            "spanId": span.span_id,
+            **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+            "name": span.name,
+            "kind": 2 if span.parent_id is None else 1,  # SERVER untuk root, INTERNAL untuk child
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.start_ns + duration_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        })
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "sn.tracing"}, "spans": spans}],
+        }]
+    }
+
+
+def format_trace(trace, max_lines=40):
+    """Tree span dengan offset dan durasi (untuk admin command)"""
+    children = {}
+    for span in trace.spans:
+        children.setdefault(span.parent_id, []).append(span)
+    lines = []
+
+    def walk(span, depth):
+        if len(lines) >= max_lines:
+            return
+        duration = f"{span.duration * 1000:.0f}ms" if span.duration is not None else "running"
+        attributes = " ".join(f"{key}={value}" for key, value in span.attributes.items())
+        error = " ❌" if span.error else ""
+        lines.append(f"{'  ' * depth}{span.name} +{span.offset * 1000:.0f}ms {duration}{error} {attributes}".rstrip())
+        for child in sorted(children.get(span.span_id, []), key=lambda child: child.start):
+            walk(child, depth + 1)
+
+    walk(trace.root, 0)
+    return "\n".join(lines)
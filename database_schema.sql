@@ -33,3 +33,16 @@ CREATE EXTENSION IF NOT EXISTS pg_trgm;
 CREATE INDEX IF NOT EXISTS idx_stage_name_trgm ON kpop_members USING gin(stage_name gin_trgm_ops);
 CREATE INDEX IF NOT EXISTS idx_group_name_trgm ON kpop_members USING gin(group_name gin_trgm_ops);
 CREATE INDEX IF NOT EXISTS idx_korean_name_trgm ON kpop_members USING gin(korean_name gin_trgm_ops); -- NEW
+
+-- Fakta profil hasil scraping per entity (companion table untuk kpop_members)
+-- entity_key: "member:<stage name>@<grup>" (canonical), "member:<nama>" (nama ambigu), atau "group:<grup>"
+CREATE TABLE IF NOT EXISTS kpop_entity_facts (
+    entity_key VARCHAR(255) NOT NULL,
+    field VARCHAR(64) NOT NULL,        -- birthday, position, agency, instagram, dll
+    value TEXT NOT NULL,
+    source VARCHAR(255),               -- domain asal fakta (kprofiles.com, fandom.com, ...)
+    fetched_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (entity_key, field)
+);
+
+CREATE INDEX IF NOT EXISTS idx_entity_facts_fetched_at ON kpop_entity_facts(fetched_at);
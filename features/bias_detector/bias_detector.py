@@ -5,6 +5,7 @@ import discord
 import random
 from datetime import datetime
 from core.logger import logger
+from utils.cache_keys import stable_int
 from features.social_media.ai_handler import AIHandler
 
 class BiasDetector:
@@ -235,7 +236,7 @@ class BiasDetector:
             0xDDA0DD, 0x20B2AA, 0xFF1493, 0x00CED1, 0xBA55D3,
             0xFF6347, 0x40E0D0, 0xEE82EE, 0x90EE90, 0xF0E68C
         ]
-        return colors[hash(name) % len(colors)]
+        return colors[stable_int(name) % len(colors)]
     
     def _generate_member_emoji(self, traits):
         """Generate emoji based on traits"""
@@ -277,7 +278,7 @@ class BiasDetector:
             
             # Generate user-specific compatibility score
             score_seed = f"{user_id}_bias_detect_{selected_key}"
-            compatibility_score = 75 + (hash(score_seed) % 25)  # 75-99%
+            compatibility_score = 75 + (stable_int(score_seed) % 25)  # 75-99%
             
             # Generate personality-based AI analysis for bias detection
             personality_traits = [
@@ -286,8 +287,8 @@ class BiasDetector:
                 "artistic soul", "adventurous spirit", "caring dan nurturing", "confident dan bold"
             ]
             
-            user_trait = personality_traits[hash(f"{user_id}_trait") % len(personality_traits)]
-            member_trait = personality_traits[hash(f"{selected_key}_trait") % len(personality_traits)]
+            user_trait = personality_traits[stable_int(f"{user_id}_trait") % len(personality_traits)]
+            member_trait = personality_traits[stable_int(f"{selected_key}_trait") % len(personality_traits)]
             
             ai_prompt = f"""
             BIAS DETECTOR ANALYSIS 🎯
@@ -396,7 +397,7 @@ class BiasDetector:
         
         # Generate compatibility score (user-specific but consistent)
         score_seed = f"{user_id}_{selected_member}_score"
-        score = 30 + (hash(score_seed) % 70)  # 30-99%
+        score = 30 + (stable_int(score_seed) % 70)  # 30-99%
         
         # Generate AI analysis based on score threshold
         ai_analysis = self._generate_ai_analysis_by_score(score, member_data['name'], user_id)
@@ -601,11 +602,11 @@ class BiasDetector:
             
             # Generate user-specific fortune elements
             fortune_seed = f"{user_id}_fortune_{fortune_type}"
-            lucky_number = 1 + (hash(fortune_seed) % 99)
+            lucky_number = 1 + (stable_int(fortune_seed) % 99)
             
             # Fortune colors
             fortune_colors = [0xFF69B4, 0x87CEEB, 0x98FB98, 0xDDA0DD, 0xF0E68C, 0xFFB6C1]
-            lucky_color = fortune_colors[hash(fortune_seed + "_color") % len(fortune_colors)]
+            lucky_color = fortune_colors[stable_int(fortune_seed + "_color") % len(fortune_colors)]
             
             # Generate mystical fortune elements
             zodiac_signs = ["Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo", 
@@ -613,8 +614,8 @@ class BiasDetector:
             tarot_cards = ["The Star", "The Sun", "The Moon", "The Lovers", "The Empress", 
                           "The Magician", "Wheel of Fortune", "The World", "The Fool"]
             
-            cosmic_sign = zodiac_signs[hash(f"{user_id}_zodiac") % len(zodiac_signs)]
-            tarot_card = tarot_cards[hash(f"{user_id}_tarot") % len(tarot_cards)]
+            cosmic_sign = zodiac_signs[stable_int(f"{user_id}_zodiac") % len(zodiac_signs)]
+            tarot_card = tarot_cards[stable_int(f"{user_id}_tarot") % len(tarot_cards)]
             
             # Generate fortune based on type with mystical elements
             fortune_prompts = {
@@ -680,7 +681,7 @@ class BiasDetector:
             
             # Generate user-specific seed for consistent fortune elements
             fortune_seed = f"{user_id}_{ramalan_type}_ramalan"
-            random.seed(hash(fortune_seed) % (2**32))
+            random.seed(stable_int(fortune_seed) % (2**32))
             
             # Traditional Indonesian fortune elements
             weton_days = ['Legi', 'Pahing', 'Pon', 'Wage', 'Kliwon']
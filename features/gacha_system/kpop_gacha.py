@@ -13,6 +13,7 @@ import math
 import tempfile
 import logging
 import hashlib
+from core.metrics import GACHA_RENDER
 import time
 from functools import wraps
 
@@ -606,7 +607,9 @@ class KpopGachaSystem:
             mapped_rarity = map_old_rarity(rarity)
             
             # Generate template kartu menggunakan fungsi dari design_kartu dengan info member
+            render_start = time.perf_counter()
             template = generate_card_template(idol_photo_original, mapped_rarity, member_name, group_name)
+            GACHA_RENDER.observe(mapped_rarity, value=time.perf_counter() - render_start)
             
             return template
             
@@ -7,8 +7,14 @@ import json
 import time
 import random
 import os
-import requests
 from core.logger import logger
+from utils.rate_limiter import TokenBucketLimiter
+from features.social_media.ai_scheduler import AIRequestScheduler, AIBusyError
+from features.social_media.key_health import KeyHealthTracker
+from features.social_media.hedging import HedgePolicy, MAX_PARALLEL_ATTEMPTS
+from features.social_media.prompt_builder import PromptBuilder, TokenUsage
+from utils.text_dedup import estimate_tokens
+from core.tracing import tracer
 
 # Monitoring disabled for production
 MONITORING_AVAILABLE = False
@@ -45,12 +51,37 @@ class AIHandler:
         ]
         self.current_model_index = 0
         self.current_key_index = 0
-        self.base_url_template = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+        # GEMINI_BASE_URL override untuk load test ke stand-in lokal (scripts/gemini_standin.py)
+        self.base_url = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta").rstrip("/")
+        self.base_url_template = self.base_url + "/models/{model}:generateContent"
+        self.stream_url_template = self.base_url + "/models/{model}:streamGenerateContent"
         
-        # Rate limiting tracking per API key
-        self.last_request_times = [0] * len(self.api_keys) if self.api_keys else [0]
-        self.last_request_time = 0  # Global rate limiting fallback
-        self.min_request_interval = 1  # Reduced to 1 second with multiple keys
+        # Native aiohttp client (lazy) - tidak memakai thread pool executor
+        self.session = None
+        self.request_timeout = 30  # Per-request timeout (detik)
+        
+        # Rate limiting per (API key, model) - token bucket, opsional Redis agar berlaku lintas process
+        self.rate_limiter = TokenBucketLimiter(
+            rate_per_minute=int(os.getenv("GEMINI_RPM", "60")),
+            capacity=int(os.getenv("GEMINI_BURST", "2")),
+            max_wait=float(os.getenv("GEMINI_RATE_MAX_WAIT", "10")),
+            redis_url=os.getenv("REDIS_URL") if os.getenv("GEMINI_RATE_LIMIT_REDIS", "false").lower() == "true" else None,
+            prefix="ratelimit:gemini"
+        )
+        
+        # Priority queue + bounded concurrency per key di depan semua request AI
+        self.scheduler = AIRequestScheduler(num_keys=len(self.api_keys))
+        
+        # EWMA latency/error-rate per (key, model) untuk memilih pasangan tersehat
+        self.key_health = KeyHealthTracker(num_keys=len(self.api_keys), models=self.models)
+        
+        # Hedged fallback: model berikutnya ditembak paralel jika model utama lambat
+        self.hedge_policy = HedgePolicy()
+        
+        # Token budget: konteks summary dipilih per relevansi, maxOutputTokens diskalakan per kategori
+        self.prompt_builder = PromptBuilder()
+        self.token_usage = TokenUsage()
+        self.max_output_tokens = int(os.getenv("GEMINI_MAX_OUTPUT_TOKENS", "800"))  # Ceiling global
         
         # Category-specific API key assignment for optimal load distribution
         self.category_api_mapping = {
@@ -70,96 +101,203 @@ class AIHandler:
                 "REKOMENDASI": 2 % len(self.api_keys) if len(self.api_keys) > 2 else 0
             }
     
-    async def chat_async(self, prompt, model="gemini-2.0-flash-exp", max_tokens=2000, category=None):
-        """Async wrapper untuk Gemini chat with category support"""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self._chat_sync, prompt, model, max_tokens, category)
+    async def _get_session(self):
+        """Lazy aiohttp session (dibuat di event loop yang sedang berjalan)"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=20, limit_per_host=10)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+    
+    async def close(self):
+        """Tutup aiohttp session"""
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+        await self.rate_limiter.close()
     
-    def _chat_sync(self, prompt, model=None, max_tokens=2000, category=None):
-        """Synchronous Gemini API call with category-specific API key selection"""
+    async def chat_async(self, prompt, model="gemini-2.0-flash-exp", max_tokens=2000, category=None):
+        """Native async Gemini API call with category-specific API key selection.
+        Lewat scheduler: saat antrian jenuh langsung return pesan busy (tidak menggantung)"""
         # Validate API keys
         if not self.api_keys:
             logger.error("Gemini API key not found")
             return self._get_fallback_response()
         
-        # Determine preferred API key based on category
-        preferred_key_index = None
-        if category and category in self.category_api_mapping:
-            preferred_key_index = self.category_api_mapping[category]
-            if preferred_key_index < len(self.api_keys):
-                logger.info(f"Using dedicated API key #{preferred_key_index + 1} for category: {category}")
+        try:
+            # Jeda antara awal span ini dan span "gemini" pertama = waktu tunggu antrian scheduler
+            with tracer.span("ai_request", category=category or "GENERAL"):
+                async with self.scheduler.slot(category):
+                    return await self._chat_with_fallback(prompt, max_tokens, category)
+        except AIBusyError as e:
+            logger.warning(f"⏳ {e}")
+            return self._get_busy_response()
+    
+    async def _chat_with_fallback(self, prompt, max_tokens, category):
+        """Coba pasangan key x model dari yang tersehat (EWMA latency + error rate).
+        Key kategori mendapat bonus kecil; pasangan key x model yang terus kena 429 dikarantina sementara.
+        Hedging: jika attempt belum selesai setelah delay adaptif, model berikutnya ditembak paralel,
+        response valid pertama dipakai dan attempt lain dibatalkan."""
+        preferred_key_index = self.category_api_mapping.get(category) if category else None
+        remaining = self.key_health.ranked_pairs(preferred_key_index)
+        pending = {}  # {task: (key_index, model, started_at, is_hedge)}
+        self.hedge_policy.record_request()
+        
+        def launch(is_hedge=False):
+            # Hedge memilih model yang belum sedang berjalan (fallback: pasangan berikutnya)
+            running_models = {model for _, model, _, _ in pending.values()}
+            index = next((i for i, (_, model) in enumerate(remaining) if model not in running_models), 0) if is_hedge else 0
+            key_index, current_model = remaining.pop(index)
+            url = f"{self.base_url_template.format(model=current_model)}?key={self.api_keys[key_index]}"
+            key_type = "primary" if key_index < 3 else "backup"
+            action = "Hedging with" if is_hedge else "Trying"
+            logger.info(f"{action} model: {current_model} with {key_type} API key #{key_index + 1} for {category or 'GENERAL'}")
+            task = asyncio.ensure_future(self._try_model_request(url, prompt, max_tokens, current_model, key_index, category))
+            pending[task] = (key_index, current_model, time.time(), is_hedge)
         
-        # Try all available models
-        for model_attempt in range(len(self.models)):
-            current_model = self.models[(self.current_model_index + model_attempt) % len(self.models)]
-            
-            # If we have a preferred key for this category, try it first
-            if preferred_key_index is not None:
-                current_key = self.api_keys[preferred_key_index]
-                url = f"{self.base_url_template.format(model=current_model)}?key={current_key}"
+        try:
+            while pending or remaining:
+                if not pending:
+                    launch()
                 
-                key_type = "primary" if preferred_key_index < 3 else "backup"
-                logger.info(f"Trying model: {current_model} with {key_type} {category} API key #{preferred_key_index + 1}")
+                can_hedge = self.hedge_policy.enabled and remaining and len(pending) < MAX_PARALLEL_ATTEMPTS
+                timeout = self.hedge_policy.delay() if can_hedge else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
                 
-                result = self._try_model_request(url, prompt, max_tokens, current_model, preferred_key_index, category)
+                if not done:
+                    # Attempt utama lambat - hedge jika budget masih ada, jika tidak tunggu saja
+                    if self.hedge_policy.try_acquire():
+                        launch(is_hedge=True)
+                    else:
+                        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
                 
-                if result != "MODEL_FAILED":
-                    # Success with preferred key
-                    self.current_model_index = (self.current_model_index + model_attempt) % len(self.models)
-                    logger.info(f"✅ Success with {key_type} API key #{preferred_key_index + 1} for {category}")
-                    return result
-            
-            # If preferred key failed or not available, try all other keys
-            for key_attempt in range(len(self.api_keys)):
-                current_key_index = (self.current_key_index + key_attempt) % len(self.api_keys)
-                
-                # Skip the preferred key if we already tried it
-                if current_key_index == preferred_key_index:
-                    continue
+                for task in done:
+                    key_index, current_model, started_at, is_hedge = pending.pop(task)
+                    result = "MODEL_FAILED" if task.exception() else task.result()
+                    if result == "MODEL_FAILED":
+                        continue
                     
-                current_key = self.api_keys[current_key_index]
-                url = f"{self.base_url_template.format(model=current_model)}?key={current_key}"
-                
-                key_type = "primary" if current_key_index < 3 else "backup"
-                logger.info(f"Trying model: {current_model} with {key_type} fallback API key #{current_key_index + 1}")
-                
-                result = self._try_model_request(url, prompt, max_tokens, current_model, current_key_index, category)
-                
-                if result != "MODEL_FAILED":
-                    # Success with fallback key
-                    self.current_model_index = (self.current_model_index + model_attempt) % len(self.models)
-                    self.current_key_index = current_key_index
-                    logger.info(f"✅ Success with {key_type} fallback API key #{current_key_index + 1} for {category or 'GENERAL'}")
+                    self.hedge_policy.record_latency(time.time() - started_at)
+                    if is_hedge:
+                        self.hedge_policy.hedge_wins += 1
+                    self.current_model_index = self.models.index(current_model)
+                    self.current_key_index = key_index
+                    key_type = "primary" if key_index < 3 else "backup"
+                    logger.info(f"✅ Success with {key_type} API key #{key_index + 1} ({current_model}) for {category or 'GENERAL'}"
+                                + (" [hedge]" if is_hedge else ""))
                     return result
-            
+        finally:
+            # Batalkan attempt yang kalah (atau semua jika caller dibatalkan)
+            for task in pending:
+                task.cancel()
         
         # All models and keys failed
         logger.error("All Gemini models and API keys failed")
         return self._get_fallback_response()
     
-    def _try_model_request(self, url, prompt, max_tokens, model_name, api_key_index, category=None):
-        """Try a single model request with retry logic and rate limiting"""
-        # Rate limiting - ensure minimum interval between requests
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last
-            logger.info(f"Rate limiting: waiting {sleep_time:.1f}s before request")
-            time.sleep(sleep_time)
+    async def stream_chat(self, prompt, max_tokens=2000, category=None):
+        """Streaming Gemini (SSE) - yield teks kumulatif setiap ada chunk baru.
+        Pasangan key x model dicoba dari yang tersehat; setelah HTTP error (termasuk 429) key lain
+        didahulukan. Teks terakhir yang di-yield selalu jawaban utuh: stream yang putus sebelum
+        finishReason diganti hasil chat_async (non-streaming, full key/model fallback)."""
+        if not self.api_keys:
+            logger.error("Gemini API key not found")
+            yield self._get_fallback_response()
+            return
         
-        self.last_request_time = time.time()
+        preferred_key_index = self.category_api_mapping.get(category) if category else None
+        remaining = self.key_health.ranked_pairs(preferred_key_index)
+        failed_keys = set()
+        data = self._build_request_body(prompt, max_tokens)
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout)
         
-        headers = {
-            "Content-Type": "application/json"
-        }
-        data = {
+        try:
+            async with self.scheduler.slot(category):
+                for _ in range(min(len(self.models), len(remaining))):
+                    # Key fallback: pasangan tersehat dengan key yang belum gagal di request ini
+                    index = next((i for i, (key, _) in enumerate(remaining) if key not in failed_keys), 0)
+                    key_index, current_model = remaining.pop(index)
+                    if not await self._wait_for_rate_limit(key_index, current_model):
+                        failed_keys.add(key_index)
+                        continue
+
+                    url = f"{self.stream_url_template.format(model=current_model)}?alt=sse&key={self.api_keys[key_index]}"
+                    text = ""
+                    usage_metadata = None
+                    finish_reason = None
+                    stream_start = time.time()
+                    try:
+                        session = await self._get_session()
+                        async with self.scheduler.key_slot(key_index), session.post(url, json=data, timeout=timeout) as response:
+                            if response.status != 200:
+                                logger.warning(f"Gemini stream HTTP {response.status} for {current_model} "
+                                               f"with API key #{key_index + 1}, trying next key/model")
+                                self.key_health.record(key_index, current_model, time.time() - stream_start, False, response.status,
+                                                       self._parse_retry_after(response))
+                                failed_keys.add(key_index)
+                                continue
+
+                            async for raw_line in response.content:
+                                line = raw_line.decode("utf-8", errors="replace").strip()
+                                if not line.startswith("data:"):
+                                    continue
+                                chunk = json.loads(line[5:].strip())
+                                usage_metadata = chunk.get("usageMetadata", usage_metadata)
+                                for candidate in chunk.get("candidates", [])[:1]:
+                                    finish_reason = candidate.get("finishReason") or finish_reason
+                                delta = self._extract_stream_delta(chunk)
+                                if delta:
+                                    text += delta
+                                    yield text
+
+                        completed = bool(text.strip()) and finish_reason is not None
+                        self.key_health.record(key_index, current_model, time.time() - stream_start, completed, 200)
+                        if completed:
+                            self.token_usage.record(category, estimate_tokens(prompt), usage_metadata,
+                                                    min(max_tokens, self.max_output_tokens))
+                            logger.info(f"✅ Streamed {len(text)} chars from {current_model} with API key #{key_index + 1}")
+                            return
+                        if text.strip():
+                            # Stream berhenti tanpa finishReason - jangan pakai teks terpotong
+                            logger.warning(f"Stream from {current_model} ended without finishReason, falling back")
+                            break
+                        logger.warning(f"Empty stream from {current_model}, trying next model")
+                    except (asyncio.TimeoutError, aiohttp.ClientError, ValueError) as e:
+                        logger.warning(f"Gemini stream error for {current_model}: {e}")
+                        self.key_health.record(key_index, current_model, time.time() - stream_start, False, type(e).__name__)
+                        if text.strip():
+                            # Teks parsial sudah tampil - ganti dengan jawaban utuh dari request biasa
+                            break
+                        failed_keys.add(key_index)
+        except AIBusyError as e:
+            logger.warning(f"⏳ {e}")
+            yield self._get_busy_response()
+            return
+        
+        # Streaming gagal / terputus - fallback ke request biasa (teks ini menggantikan teks parsial)
+        logger.info("Streaming unavailable or incomplete, falling back to non-streaming request")
+        yield await self.chat_async(prompt, max_tokens=max_tokens, category=category)
+    
+    def _extract_stream_delta(self, chunk):
+        """Ambil potongan teks dari satu event SSE streamGenerateContent"""
+        for candidate in chunk.get("candidates", [])[:1]:
+            if candidate.get("finishReason") == "SAFETY":
+                return "\n\nMaaf, respons diblokir karena kebijakan keamanan. 🛡️"
+            parts = candidate.get("content", {}).get("parts", [])
+            return "".join(part.get("text", "") for part in parts)
+        if chunk.get("promptFeedback", {}).get("blockReason"):
+            return "Maaf, pertanyaan ini tidak bisa dijawab karena kebijakan keamanan. Coba tanya yang lain ya! 🛡️"
+        return ""
+    
+    def _build_request_body(self, prompt, max_tokens):
+        """Request body generateContent"""
+        return {
             "contents": [{
                 "parts": [{
                     "text": prompt
                 }]
             }],
             "generationConfig": {
-                "maxOutputTokens": min(max_tokens, 800),  # Limit tokens to reduce rate limiting
+                "maxOutputTokens": min(max_tokens, self.max_output_tokens),  # Limit tokens to reduce rate limiting
                 "temperature": 0.3,  # Lower temperature for more predictable responses
                 "topP": 0.8,         # Balanced creativity vs speed
                 "topK": 40           # Balanced diversity vs speed
@@ -183,16 +321,72 @@ class AIHandler:
                 }
             ]
         }
+    
+    async def _wait_for_rate_limit(self, api_key_index, model_name):
+        """Tunggu token bucket untuk key + model ini saja. Return False jika antrian key terlalu panjang"""
+        waited = await self.rate_limiter.acquire(f"key{api_key_index + 1}:{model_name}")
+        if waited is None:
+            logger.warning(f"Rate limit queue full for API key #{api_key_index + 1} ({model_name}), skipping key")
+            return False
+        if waited > 0:
+            logger.info(f"Rate limiting: waited {waited:.1f}s for API key #{api_key_index + 1} ({model_name})")
+        return True
+    
+    async def _try_model_request(self, url, prompt, max_tokens, model_name, api_key_index, category=None):
+        """Satu attempt Gemini (key x model) sebagai span trace "gemini" """
+        with tracer.span("gemini", model=model_name, key=api_key_index + 1) as span:
+            result = await self._send_model_request(url, prompt, max_tokens, model_name, api_key_index, category)
+            if span:
+                span.set_attribute("ok", result != "MODEL_FAILED")
+            return result
+    
+    async def _send_model_request(self, url, prompt, max_tokens, model_name, api_key_index, category=None):
+        """Try a single model request with async retry logic and rate limiting.
+        CancelledError tidak ditangkap sehingga caller bisa membatalkan request."""
+        if not await self._wait_for_rate_limit(api_key_index, model_name):
+            return "MODEL_FAILED"
+        
+        headers = {
+            "Content-Type": "application/json"
+        }
+        data = self._build_request_body(prompt, max_tokens)
         
         # Retry logic for API calls - reduced to 1 retry only
         max_retries = 1
         request_start_time = time.time()
+        session = await self._get_session()
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout)
         
         for attempt in range(max_retries):
             try:
-                response = requests.post(url, headers=headers, json=data, timeout=30)
-                response.raise_for_status()
-                result = response.json()
+                async with self.scheduler.key_slot(api_key_index), session.post(url, headers=headers, json=data, timeout=timeout) as response:
+                    if response.status == 503 and attempt < max_retries - 1:
+                        # Service unavailable, retry with shorter backoff
+                        wait_time = 2  # Only 2 seconds for single retry
+                        logger.warning(f"Gemini API 503 error, retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})")
+                        await asyncio.sleep(wait_time)
+                        continue
+                    elif response.status == 429:
+                        # Rate limit exceeded, immediately switch to backup API
+                        logger.warning(f"Gemini API rate limit (429), switching to backup API key (attempt {attempt + 1}/{max_retries})")
+                        self.key_health.record(api_key_index, model_name, time.time() - request_start_time, False, 429,
+                                               self._parse_retry_after(response))
+                        return "MODEL_FAILED"  # Force switch to backup API
+                    elif response.status == 404:
+                        # Model not found - try next model
+                        logger.warning(f"Model {model_name} not found (404), trying next model")
+                        self.key_health.record(api_key_index, model_name, time.time() - request_start_time, False, 404)
+                        return "MODEL_FAILED"
+                    elif response.status >= 400:
+                        # Final attempt failed or other HTTP error
+                        logger.error(f"Gemini API HTTP error for {model_name}: {response.status} {response.reason}")
+                        self.key_health.record(api_key_index, model_name, time.time() - request_start_time, False, response.status)
+                        # Log failed API call
+                        response_time_ms = int((time.time() - request_start_time) * 1000)
+                        log_api_usage(category or "GENERAL", api_key_index, response_time_ms, success=False)
+                        return "MODEL_FAILED"
+                    
+                    result = await response.json(content_type=None)
                 
                 # Log successful API call
                 response_time_ms = int((time.time() - request_start_time) * 1000)
@@ -200,36 +394,23 @@ class AIHandler:
                 
                 break  # Success, exit retry loop
                 
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 503 and attempt < max_retries - 1:
-                    # Service unavailable, retry with shorter backoff
-                    wait_time = 2  # Only 2 seconds for single retry
-                    logger.warning(f"Gemini API 503 error, retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(wait_time)
-                    continue
-                elif e.response.status_code == 429:
-                    # Rate limit exceeded, immediately switch to backup API
-                    logger.warning(f"Gemini API rate limit (429), switching to backup API key (attempt {attempt + 1}/{max_retries})")
-                    return "MODEL_FAILED"  # Force switch to backup API
-                elif e.response.status_code == 404:
-                    # Model not found - try next model
-                    logger.warning(f"Model {model_name} not found (404), trying next model")
-                    return "MODEL_FAILED"
-                else:
-                    # Final attempt failed or other HTTP error
-                    logger.error(f"Gemini API HTTP error for {model_name}: {e}")
-                    # Log failed API call
-                    response_time_ms = int((time.time() - request_start_time) * 1000)
-                    log_api_usage(category or "GENERAL", api_key_index, response_time_ms, success=False)
-                    return "MODEL_FAILED"
+            except asyncio.TimeoutError:
+                logger.error(f"Gemini API timeout for model {model_name}")
+                self.key_health.record(api_key_index, model_name, time.time() - request_start_time, False, "timeout")
+                return "MODEL_FAILED"
+            except aiohttp.ClientConnectionError:
+                logger.error(f"Gemini API connection error for model {model_name}")
+                self.key_health.record(api_key_index, model_name, time.time() - request_start_time, False, "connection")
+                return "MODEL_FAILED"
             except Exception as e:
                 if attempt < max_retries - 1:
                     wait_time = (2 ** attempt) + 1
                     logger.warning(f"Gemini API error, retrying in {wait_time}s: {e}")
-                    time.sleep(wait_time)
+                    await asyncio.sleep(wait_time)
                     continue
                 else:
                     logger.error(f"Gemini API final error for {model_name}: {e}")
+                    self.key_health.record(api_key_index, model_name, time.time() - request_start_time, False, "error")
                     # Log failed API call
                     response_time_ms = int((time.time() - request_start_time) * 1000)
                     log_api_usage(category or "GENERAL", api_key_index, response_time_ms, success=False)
@@ -242,6 +423,24 @@ class AIHandler:
             log_api_usage(category or "GENERAL", api_key_index, response_time_ms, success=False)
             return "MODEL_FAILED"
         
+        parsed = self._parse_response(result, model_name)
+        # Response kosong/rusak dihitung error agar pasangan ini turun peringkat
+        self.key_health.record(api_key_index, model_name, time.time() - request_start_time, parsed != "MODEL_FAILED", 200)
+        if parsed != "MODEL_FAILED" and isinstance(result, dict):
+            self.token_usage.record(category, estimate_tokens(prompt), result.get("usageMetadata"),
+                                    min(max_tokens, self.max_output_tokens))
+        return parsed
+    
+    @staticmethod
+    def _parse_retry_after(response):
+        """Retry-After header (detik) jika Gemini mengirimkannya"""
+        try:
+            return float(response.headers.get("Retry-After", ""))
+        except (TypeError, ValueError):
+            return None
+    
+    def _parse_response(self, result, model_name):
+        """Extract text dari response generateContent, atau "MODEL_FAILED" """
         try:
             
             # Debug logging for troubleshooting
@@ -296,12 +495,6 @@ class AIHandler:
             
             return text.strip()
             
-        except requests.exceptions.Timeout:
-            logger.error(f"Gemini API timeout for model {model_name}")
-            return "MODEL_FAILED"
-        except requests.exceptions.ConnectionError:
-            logger.error(f"Gemini API connection error for model {model_name}")
-            return "MODEL_FAILED"
         except KeyError as e:
             logger.error(f"Gemini API response format error for {model_name}: {e}")
             return "MODEL_FAILED"
@@ -310,13 +503,7 @@ class AIHandler:
             return "MODEL_FAILED"
     
     def create_member_summary_prompt(self, info):
-        """Generate prompt untuk ringkasan member K-pop dengan input truncation"""
-        # Truncate input jika terlalu panjang (max 8000 karakter untuk safety)
-        max_input_length = 8000
-        if len(info) > max_input_length:
-            logger.warning(f"Input too long ({len(info)} chars), truncating to {max_input_length}")
-            info = info[:max_input_length] + "...[truncated]"
-        
+        """Generate prompt untuk ringkasan member K-pop (info sudah dipilih PromptBuilder)"""
         return f"""Buat info K-pop member berikut dengan emoji yang relevan dan tepat sasaran:
 Format:
 - 👤 **Nama**: [nama lengkap]
@@ -330,13 +517,7 @@ Aturan: Bahasa fun & natural Indonesia. Emoji relevan (🎤=vocal, 🥁=drum, 
 {info}"""
     
     def create_group_summary_prompt(self, info):
-        """Generate prompt untuk ringkasan grup K-pop dengan input truncation"""
-        # Truncate input jika terlalu panjang (max 8000 karakter untuk safety)
-        max_input_length = 8000
-        if len(info) > max_input_length:
-            logger.warning(f"Input too long ({len(info)} chars), truncating to {max_input_length}")
-            info = info[:max_input_length] + "...[truncated]"
-        
+        """Generate prompt untuk ringkasan grup K-pop (info sudah dipilih PromptBuilder)"""
         return f"""Buat info K-pop grup berikut dengan emoji yang relevan dan tepat sasaran:
 Format:
 - 🎤 **Debut**: [tanggal debut dan agensi]
@@ -353,30 +534,65 @@ Aturan: Bahasa fun & natural Indonesia. Emoji relevan (🎤=vocal, 🥁=drum, 
 
 {info}"""
     
-    async def generate_kpop_summary(self, category, info):
-        """Generate ringkasan K-pop berdasarkan kategori"""
+    def build_kpop_prompt(self, category, info):
+        """Pilih konteks paling relevan dalam input budget. Return (prompt, max_output_tokens)"""
+        with tracer.span("prompt_build", category=category) as span:
+            context, stats = self.prompt_builder.select_context(info, category)
+            if span:
+                span.set_attribute("context_tokens", stats["context_tokens"])
+        logger.info(f"Prompt context {category}: ~{stats['input_tokens']} -> ~{stats['context_tokens']} tokens "
+                    f"({stats['selected_sections']}/{stats['sections']} sections)")
+        
         if category == "MEMBER" or category == "MEMBER_GROUP":
-            prompt = self.create_member_summary_prompt(info)
+            prompt = self.create_member_summary_prompt(context)
         else:  # GROUP
-            prompt = self.create_group_summary_prompt(info)
+            prompt = self.create_group_summary_prompt(context)
         
-        return await self.chat_async(prompt, max_tokens=2000, category="KPOP")
+        return prompt, self.prompt_builder.output_budget(category, stats["context_tokens"])
+    
+    async def generate_kpop_summary(self, category, info):
+        """Generate ringkasan K-pop berdasarkan kategori"""
+        prompt, max_tokens = self.build_kpop_prompt(category, info)
+        return await self.chat_async(prompt, max_tokens=max_tokens, category="KPOP")
+    
+    async def generate_kpop_summary_stream(self, category, info):
+        """Streaming versi generate_kpop_summary - yield teks kumulatif"""
+        prompt, max_tokens = self.build_kpop_prompt(category, info)
+        async for text in self.stream_chat(prompt, max_tokens=max_tokens, category="KPOP"):
+            yield text
+    
+    FALLBACK_MESSAGES = (
+        "Maaf, AI sedang istirahat sebentar. Coba lagi ya! 💫",
+        "Lagi ada gangguan teknis nih. Tunggu sebentar ya! 🔧",
+        "AI lagi loading... Coba query lain dulu ya! ⏳"
+    )
+    BUSY_MESSAGES = (
+        "Lagi rame banget nih, antrian AI penuh. Coba lagi sebentar ya! 🚦",
+        "AI lagi sibuk melayani banyak request. Tunggu sebentar terus coba lagi ya! ⏳"
+    )
     
     def _get_fallback_response(self):
         """Generate fallback response when AI fails"""
-        fallback_messages = [
-            "Maaf, AI sedang istirahat sebentar. Coba lagi ya! 💫",
-            "Lagi ada gangguan teknis nih. Tunggu sebentar ya! 🔧",
-            "AI lagi loading... Coba query lain dulu ya! ⏳"
-        ]
-        import random
-        return random.choice(fallback_messages)
+        return random.choice(self.FALLBACK_MESSAGES)
+    
+    def _get_busy_response(self):
+        """Response cepat saat antrian AI penuh / request lewat deadline"""
+        return random.choice(self.BUSY_MESSAGES)
+    
+    def is_canned_response(self, text):
+        """True untuk pesan fallback/busy - jangan dicache sebagai jawaban"""
+        return text in self.FALLBACK_MESSAGES or text in self.BUSY_MESSAGES
     
     async def handle_general_query(self, user_input):
         """Handle pertanyaan umum non-K-pop dengan optimasi"""
         # Reduced max_tokens untuk response time yang lebih cepat
         return await self.chat_async(user_input, max_tokens=800, category="OBROLAN")
     
+    async def handle_general_query_stream(self, user_input):
+        """Streaming versi handle_general_query - yield teks kumulatif"""
+        async for text in self.stream_chat(user_input, max_tokens=800, category="OBROLAN"):
+            yield text
+    
     async def get_ai_response(self, prompt, max_tokens=1500):
         """Alias method for bias detector compatibility"""
         return await self.chat_async(prompt, max_tokens=max_tokens, category="BIAS")
@@ -0,0 +1,164 @@
+"""
+AI Scheduler Module - Antrian prioritas dan backpressure untuk request Gemini
+Semua kategori (!sn KPOP, obrolan, rekomendasi, bias fortune/love-match) berbagi API key yang sama.
+Scheduler membatasi request in-flight (slot per key), melayani antrian berdasarkan prioritas kategori,
+membuang request yang melewati deadline antrian, dan langsung menolak saat antrian penuh.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from core.logger import logger
+
+# Angka kecil = prioritas tinggi. Lookup member/grup tidak boleh kalah oleh burst command bias.
+CATEGORY_PRIORITIES = {
+    "KPOP": 0,
+    "REKOMENDASI": 1,
+    "OBROLAN": 2,
+    "GENERAL": 2,
+    "BIAS": 3,
+}
+# Batas waktu menunggu di antrian (detik) sebelum request di-drop
+CATEGORY_DEADLINES = {
+    "KPOP": 20.0,
+    "REKOMENDASI": 20.0,
+    "OBROLAN": 10.0,
+    "GENERAL": 10.0,
+    "BIAS": 15.0,
+}
+DEFAULT_PRIORITY = 2
+DEFAULT_DEADLINE = 15.0
+
+
+class AIBusyError(Exception):
+    """Antrian AI penuh atau request melewati deadline antrian"""
+
+    def __init__(self, category, reason):
+        super().__init__(f"AI scheduler busy for {category}: {reason}")
+        self.category = category
+        self.reason = reason
+
+
+class AIRequestScheduler:
+    """Priority queue + bounded concurrency. Slot global = num_keys x per_key_concurrency,
+    semaphore per key membatasi request paralel ke satu API key."""
+
+    def __init__(self, num_keys, per_key_concurrency=None, max_queue=None):
+        self.per_key_concurrency = per_key_concurrency or int(os.getenv("AI_PER_KEY_CONCURRENCY", "2"))
+        self.max_concurrency = max(1, num_keys) * self.per_key_concurrency
+        self.max_queue = max_queue or int(os.getenv("AI_MAX_QUEUE", "20"))
+        self._key_semaphores = [asyncio.Semaphore(self.per_key_concurrency) for _ in range(max(1, num_keys))]
+        self._active = 0
+        self._queue = []  # heap [(priority, seq, enqueued_at, deadline_at, category, future)]
+        self._seq = itertools.count()
+        self.stats = {
+            "admitted": 0,
+            "queued": 0,
+            "completed": 0,
+            "rejected_full": 0,
+            "dropped_deadline": 0,
+            "preempted": 0,
+            "total_wait": 0.0,
+            "max_depth": 0,
+        }
+
+    def _pending(self):
+        return [item for item in self._queue if not item[5].done()]
+
+    def queue_depth(self):
+        """Jumlah request menunggu per kategori"""
+        depth = {}
+        for item in self._pending():
+            depth[item[4]] = depth.get(item[4], 0) + 1
+        return depth
+
+    def _grant(self):
+        """Beri slot kosong ke request prioritas tertinggi yang belum lewat deadline"""
+        now = time.monotonic()
+        while self._queue and self._active < self.max_concurrency:
+            _, _, enqueued_at, deadline_at, category, future = heapq.heappop(self._queue)
+            if future.done():
+                continue
+            if now > deadline_at:
+                self.stats["dropped_deadline"] += 1
+                future.set_exception(AIBusyError(category, "deadline exceeded"))
+                continue
+            self._active += 1
+            self.stats["total_wait"] += now - enqueued_at
+            future.set_result(True)
+
+    def _release(self):
+        self._active -= 1
+        self.stats["completed"] += 1
+        self._grant()
+
+    def _make_room(self, priority):
+        """Antrian penuh: geser request prioritas terendah jika yang baru lebih penting"""
+        pending = self._pending()
+        if len(pending) < self.max_queue:
+            return True
+        victim = max(pending, key=lambda item: (item[0], item[1]))
+        if victim[0] <= priority:
+            return False
+        self.stats["preempted"] += 1
+        victim[5].set_exception(AIBusyError(victim[4], "preempted by higher priority request"))
+        return True
+
+    async def acquire(self, category):
+        category = category or "GENERAL"
+        if self._active < self.max_concurrency and not self._pending():
+            self._active += 1
+            self.stats["admitted"] += 1
+            return
+
+        priority = CATEGORY_PRIORITIES.get(category, DEFAULT_PRIORITY)
+        if not self._make_room(priority):
+            self.stats["rejected_full"] += 1
+            raise AIBusyError(category, "queue full")
+
+        deadline = CATEGORY_DEADLINES.get(category, DEFAULT_DEADLINE)
+        now = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), now, now + deadline, category, future))
+        self.stats["queued"] += 1
+        self.stats["max_depth"] = max(self.stats["max_depth"], len(self._pending()))
+
+        try:
+            await asyncio.wait_for(future, timeout=deadline)
+        except asyncio.TimeoutError:
+            self.stats["dropped_deadline"] += 1
+            raise AIBusyError(category, "deadline exceeded")
+        except asyncio.CancelledError:
+            # Slot sudah diberikan tepat sebelum caller dibatalkan - kembalikan
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self._release()
+            raise
+        self.stats["admitted"] += 1
+
+    @asynccontextmanager
+    async def slot(self, category):
+        """Context manager slot AI: raise AIBusyError tanpa menunggu saat antrian jenuh"""
+        await self.acquire(category)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def key_slot(self, key_index):
+        """Batasi request paralel ke satu API key"""
+        async with self._key_semaphores[key_index % len(self._key_semaphores)]:
+            yield
+
+    def get_metrics(self):
+        admitted = self.stats["admitted"]
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self.queue_depth(),
+            "max_queue": self.max_queue,
+            "avg_wait": round(self.stats["total_wait"] / admitted, 2) if admitted else 0.0,
+            **{key: value for key, value in self.stats.items() if key != "total_wait"},
+        }
@@ -0,0 +1,71 @@
+"""
+Hedging Module - Policy untuk hedged request Gemini
+Jika request utama belum selesai setelah delay adaptif (p90 latency sukses terakhir), AIHandler
+menembak model berikutnya secara paralel dan memakai response valid pertama.
+Budget dibatasi: setiap request utama menambah HEDGE_BUDGET_RATIO kredit, setiap hedge memakai 1 kredit,
+sehingga tambahan pemakaian quota maksimal ~HEDGE_BUDGET_RATIO dari total request.
+"""
+import os
+from collections import deque
+
+HEDGING_ENABLED = os.getenv("AI_HEDGING", "true").lower() == "true"
+HEDGE_BUDGET_RATIO = float(os.getenv("AI_HEDGE_BUDGET", "0.1"))
+HEDGE_MIN_DELAY = float(os.getenv("AI_HEDGE_MIN_DELAY", "1.5"))
+HEDGE_MAX_DELAY = float(os.getenv("AI_HEDGE_MAX_DELAY", "10"))
+HEDGE_DEFAULT_DELAY = 4.0  # Sebelum cukup sampel latency
+HEDGE_PERCENTILE = 0.9
+MAX_PARALLEL_ATTEMPTS = 2  # Request utama + 1 hedge
+MIN_SAMPLES = 10
+MAX_CREDITS = 5.0
+
+
+class HedgePolicy:
+    """Delay adaptif (percentile latency) + budget kredit untuk hedge"""
+
+    def __init__(self, enabled=HEDGING_ENABLED, budget_ratio=HEDGE_BUDGET_RATIO,
+                 min_delay=HEDGE_MIN_DELAY, max_delay=HEDGE_MAX_DELAY, window=200):
+        self.enabled = enabled
+        self.budget_ratio = budget_ratio
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._latencies = deque(maxlen=window)
+        self._credits = 1.0
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.denied = 0
+
+    def record_request(self):
+        self.requests += 1
+        self._credits = min(MAX_CREDITS, self._credits + self.budget_ratio)
+
+    def record_latency(self, latency):
+        self._latencies.append(latency)
+
+    def delay(self):
+        """Delay sebelum hedge: p90 latency sukses terakhir, di-clamp ke [min_delay, max_delay]"""
+        if len(self._latencies) < MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        ordered = sorted(self._latencies)
+        value = ordered[min(len(ordered) - 1, int(len(ordered) * HEDGE_PERCENTILE))]
+        return max(self.min_delay, min(self.max_delay, value))
+
+    def try_acquire(self):
+        """Ambil 1 kredit hedge. False jika budget habis"""
+        if self._credits < 1.0:
+            self.denied += 1
+            return False
+        self._credits -= 1.0
+        self.hedges += 1
+        return True
+
+    def summary(self):
+        return {
+            "enabled": self.enabled,
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "denied": self.denied,
+            "hedge_rate": round(self.hedges / self.requests * 100, 1) if self.requests else 0.0,
+            "delay": round(self.delay(), 2),
+        }
@@ -0,0 +1,132 @@
+"""
+Key Health Module - EWMA latency dan error-rate per (API key, model) Gemini
+Dipakai AIHandler untuk mengarahkan request ke pasangan key/model tersehat, dan mengkarantina
+pasangan yang berulang kali kena 429 sampai window quota-nya reset (quota Gemini per key per model).
+"""
+import os
+import time
+from core.metrics import GEMINI_LATENCY, GEMINI_REQUESTS
+
+EWMA_ALPHA = float(os.getenv("AI_HEALTH_EWMA_ALPHA", "0.3"))
+# Latency awal (detik) untuk pasangan yang belum pernah dipakai - optimis agar tetap dieksplorasi
+PRIOR_LATENCY = 2.0
+ERROR_PENALTY = 4.0  # score = latency x (1 + error_rate x penalty)
+QUARANTINE_AFTER_429 = int(os.getenv("AI_QUARANTINE_AFTER_429", "2"))
+QUARANTINE_WINDOW = 60.0  # Quota Gemini per menit
+MAX_QUARANTINE = 300.0
+
+
+class PairHealth:
+    """Statistik satu pasangan (key, model)"""
+
+    __slots__ = ("latency", "error_rate", "samples", "successes", "failures", "last_status", "last_used")
+
+    def __init__(self):
+        self.latency = PRIOR_LATENCY
+        self.error_rate = 0.0
+        self.samples = 0
+        self.successes = 0
+        self.failures = 0
+        self.last_status = None
+        self.last_used = 0.0
+
+    def update(self, latency, success, status):
+        error = 0.0 if success else 1.0
+        if self.samples == 0:
+            self.latency = latency if success else max(latency, PRIOR_LATENCY)
+            self.error_rate = error
+        else:
+            # Latency request gagal (timeout, 5xx) tetap dihitung: pasangan lambat harus turun peringkat
+            self.latency = EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.latency
+            self.error_rate = EWMA_ALPHA * error + (1 - EWMA_ALPHA) * self.error_rate
+        self.samples += 1
+        if success:
+            self.successes += 1
+        else:
+            self.failures += 1
+        self.last_status = status
+        self.last_used = time.time()
+
+    def score(self):
+        return self.latency * (1 + self.error_rate * ERROR_PENALTY)
+
+
+class KeyHealthTracker:
+    """Health table per (key_index, model) + karantina per pasangan untuk 429 beruntun"""
+
+    def __init__(self, num_keys, models):
+        self.num_keys = num_keys
+        self.models = list(models)
+        self._pairs = {}  # {(key_index, model): PairHealth}
+        self._consecutive_429 = {}  # {(key_index, model): count}
+        self._quarantined_until = {}  # {(key_index, model): epoch}
+
+    def _pair(self, key_index, model):
+        pair = self._pairs.get((key_index, model))
+        if pair is None:
+            pair = self._pairs[(key_index, model)] = PairHealth()
+        return pair
+
+    def record(self, key_index, model, latency, success, status=None, retry_after=None):
+        """Catat hasil satu request. status 429 memicu hitungan karantina pasangan (key, model).
+        Hitungan 429 hanya direset oleh request sukses: setelah window habis, 429 berikutnya
+        langsung karantina ulang dengan window lebih panjang."""
+        self._pair(key_index, model).update(latency, success, status)
+        GEMINI_LATENCY.observe(key_index + 1, model, value=latency)
+        GEMINI_REQUESTS.inc(key_index + 1, model, status if status is not None else ("ok" if success else "error"))
+        pair_key = (key_index, model)
+        if status == 429:
+            count = self._consecutive_429.get(pair_key, 0) + 1
+            self._consecutive_429[pair_key] = count
+            if count >= QUARANTINE_AFTER_429:
+                window = retry_after or QUARANTINE_WINDOW * 2 ** (count - QUARANTINE_AFTER_429)
+                self._quarantined_until[pair_key] = time.time() + min(window, MAX_QUARANTINE)
+        elif success:
+            self._consecutive_429.pop(pair_key, None)
+            self._quarantined_until.pop(pair_key, None)
+
+    def is_quarantined(self, key_index, model, now=None):
+        """True selama window karantina pasangan belum habis (tanpa mengubah state)"""
+        return (now or time.time()) < self._quarantined_until.get((key_index, model), 0)
+
+    def ranked_pairs(self, preferred_key=None, preferred_bonus=0.8, model_step=0.1):
+        """Semua pasangan (key_index, model) terurut dari yang tersehat.
+        Key kategori dan model urutan awal mendapat sedikit bonus agar beban tetap terdistribusi.
+        Jika semua pasangan dikarantina, pasangan dengan karantina paling cepat selesai dipakai sebagai last resort."""
+        now = time.time()
+        all_candidates = [
+            (key_index, position, model)
+            for key_index in range(self.num_keys)
+            for position, model in enumerate(self.models)
+        ]
+        candidates = [item for item in all_candidates if not self.is_quarantined(item[0], item[2], now)]
+        if not candidates and all_candidates:
+            candidates = [min(all_candidates, key=lambda item: self._quarantined_until.get((item[0], item[2]), 0))]
+
+        def weighted_score(item):
+            key_index, model_position, model = item
+            score = self._pair(key_index, model).score() * (1 + model_position * model_step)
+            if key_index == preferred_key:
+                score *= preferred_bonus
+            return score
+
+        return [(key_index, model) for key_index, _, model in sorted(candidates, key=weighted_score)]
+
+    def snapshot(self):
+        """Health table untuk monitoring: list dict per pasangan yang pernah dipakai"""
+        now = time.time()
+        rows = []
+        for (key_index, model), pair in sorted(self._pairs.items()):
+            if not pair.samples:
+                continue
+            until = self._quarantined_until.get((key_index, model), 0)
+            rows.append({
+                "key": key_index + 1,
+                "model": model,
+                "latency": round(pair.latency, 2),
+                "error_rate": round(pair.error_rate * 100, 1),
+                "samples": pair.samples,
+                "last_status": pair.last_status,
+                "quarantine_left": max(0, int(until - now)),
+            })
+        return rows
@@ -0,0 +1,186 @@
+"""
+Prompt Builder Module - Rakit konteks summary K-pop dalam token budget
+Info hasil scraping dipecah jadi section, diranking berdasarkan relevansi ke kategori
+(fakta kelahiran/posisi untuk MEMBER, debut/discography untuk GROUP), lalu diisi sampai
+input budget penuh. Teks tanpa tanda baca ("Label: value Label: value", whitespace sudah di-collapse
+_clean_text) dipecah per kata. Output budget (maxOutputTokens) diskalakan dari kategori dan jumlah konteks.
+"""
+import os
+import re
+import threading
+from utils.text_dedup import estimate_tokens, information_density
+
+INPUT_TOKEN_BUDGET = int(os.getenv("PROMPT_INPUT_TOKEN_BUDGET", "1500"))
+MAX_SECTION_TOKENS = 80  # Section lebih panjang dipecah per kalimat (granularitas ranking)
+
+# Keyword relevan per kategori summary: {keyword: bobot}
+CATEGORY_KEYWORDS = {
+    "MEMBER": {
+        "birthday": 3, "birth": 3, "born": 3, "lahir": 3, "birth name": 3, "stage name": 2,
+        "position": 3, "posisi": 3, "zodiac": 1, "height": 1, "mbti": 1, "nationality": 1,
+        "fun fact": 2, "trivia": 2, "rumor": 2, "dating": 1,
+        "instagram": 2, "twitter": 1, "tiktok": 1, "youtube": 1,
+    },
+    "GROUP": {
+        "debut": 3, "debuted": 3, "agency": 2, "entertainment": 1, "label": 1,
+        "member": 2, "members": 2, "leader": 2, "position": 1,
+        "album": 3, "mini album": 3, "single": 2, "discography": 3, "title track": 2, "comeback": 2,
+        "award": 2, "won": 1, "daesang": 2, "fandom": 3, "fan name": 3,
+        "instagram": 2, "twitter": 1, "tiktok": 1, "youtube": 1,
+    },
+}
+CATEGORY_KEYWORDS["MEMBER_GROUP"] = CATEGORY_KEYWORDS["MEMBER"]
+
+# Output budget dasar per kategori = cap lama (800); konteks tipis hanya turun sampai MIN_OUTPUT_TOKENS
+# agar format lengkap (nama, lahir, posisi, fakta, sosmed) tidak terpotong di tengah
+OUTPUT_TOKEN_BUDGETS = {"MEMBER": 800, "MEMBER_GROUP": 800, "GROUP": 800}
+MIN_OUTPUT_TOKENS = 512
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\s+(?=•)")
+
+
+def split_words(text, max_tokens=MAX_SECTION_TOKENS):
+    """Pecah text di batas kata menjadi potongan <= max_tokens (kata super panjang dipotong paksa)"""
+    max_chars = max_tokens * 4
+    chunks = []
+    chunk = ""
+    for word in text.split():
+        while len(word) > max_chars:
+            if chunk:
+                chunks.append(chunk)
+                chunk = ""
+            chunks.append(word[:max_chars])
+            word = word[max_chars:]
+        if chunk and estimate_tokens(f"{chunk} {word}") > max_tokens:
+            chunks.append(chunk)
+            chunk = ""
+        chunk = f"{chunk} {word}".strip()
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def truncate_to_budget(text, max_tokens):
+    """Potong text di batas kata agar muat max_tokens (fallback jika tidak ada section terpilih)"""
+    result = ""
+    for chunk in split_words(text, MAX_SECTION_TOKENS):
+        if estimate_tokens(f"{result} {chunk}") > max_tokens:
+            break
+        result = f"{result} {chunk}".strip()
+    return result
+
+
+def split_sections(info):
+    """Pecah info menjadi section: paragraf, lalu kalimat untuk paragraf yang terlalu panjang"""
+    sections = []
+    for paragraph in re.split(r"\n\s*\n", info or ""):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= MAX_SECTION_TOKENS:
+            sections.append(paragraph)
+            continue
+        chunk = ""
+        for sentence in _SENTENCE_SPLIT.split(paragraph):
+            if estimate_tokens(sentence) > MAX_SECTION_TOKENS:
+                # Kalimat tanpa batas .!? (profil "Label: value ...") - pecah per kata
+                if chunk:
+                    sections.append(chunk)
+                    chunk = ""
+                sections.extend(split_words(sentence))
+                continue
+            if chunk and estimate_tokens(chunk + " " + sentence) > MAX_SECTION_TOKENS:
+                sections.append(chunk)
+                chunk = ""
+            chunk = f"{chunk} {sentence}".strip()
+        if chunk:
+            sections.append(chunk)
+    return sections
+
+
+def relevance_score(section, category, position=0):
+    """Skor relevansi section: keyword kategori per token + information density + prior urutan source"""
+    keywords = CATEGORY_KEYWORDS.get(category, CATEGORY_KEYWORDS["GROUP"])
+    lowered = section.lower()
+    hits = sum(weight for keyword, weight in keywords.items() if keyword in lowered)
+    tokens = estimate_tokens(section)
+    # Source di awal (kprofiles/entity store) biasanya paling akurat
+    position_prior = 1.0 / (1 + position * 0.05)
+    return (hits / max(tokens, 20) ** 0.5 + information_density(section) * 0.5) * position_prior
+
+
+class PromptBuilder:
+    """Pilih section paling relevan yang muat di input budget"""
+
+    def __init__(self, input_budget=INPUT_TOKEN_BUDGET):
+        self.input_budget = input_budget
+
+    def select_context(self, info, category):
+        """Return (context_text, stats) - section terpilih dalam urutan aslinya"""
+        sections = split_sections(info)
+        ranked = sorted(
+            enumerate(sections),
+            key=lambda item: relevance_score(item[1], category, item[0]),
+            reverse=True,
+        )
+        selected = []
+        used_tokens = 0
+        for position, section in ranked:
+            tokens = estimate_tokens(section)
+            if used_tokens + tokens > self.input_budget:
+                continue
+            selected.append((position, section))
+            used_tokens += tokens
+        selected.sort()
+        context = "\n\n".join(section for _, section in selected)
+        if not context and (info or "").strip():
+            # Jangan pernah kirim prompt tanpa data: fallback truncate seperti sebelum ada ranking
+            context = truncate_to_budget(info, self.input_budget)
+            used_tokens = estimate_tokens(context)
+        stats = {
+            "input_tokens": estimate_tokens(info or ""),
+            "context_tokens": used_tokens,
+            "sections": len(sections),
+            "selected_sections": len(selected),
+        }
+        return context, stats
+
+    def output_budget(self, category, context_tokens):
+        """maxOutputTokens: konteks sedikit -> summary pendek (tidak ada yang perlu dirangkum panjang)"""
+        base = OUTPUT_TOKEN_BUDGETS.get(category, OUTPUT_TOKEN_BUDGETS["GROUP"])
+        fill_ratio = min(1.0, context_tokens / self.input_budget) if self.input_budget else 1.0
+        return max(MIN_OUTPUT_TOKENS, int(base * (0.6 + 0.4 * fill_ratio)))
+
+
+class TokenUsage:
+    """Akumulasi token per kategori: estimasi yang dikirim vs usageMetadata dari Gemini"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._usage = {}  # {category: {"requests", "estimated_prompt", "prompt", "output", "max_output"}}
+
+    def record(self, category, estimated_prompt_tokens, usage_metadata, max_output_tokens):
+        usage_metadata = usage_metadata or {}
+        with self._lock:
+            entry = self._usage.setdefault(category or "GENERAL", {
+                "requests": 0, "estimated_prompt": 0, "prompt": 0, "output": 0, "max_output": 0,
+            })
+            entry["requests"] += 1
+            entry["estimated_prompt"] += estimated_prompt_tokens
+            entry["prompt"] += usage_metadata.get("promptTokenCount", estimated_prompt_tokens)
+            entry["output"] += usage_metadata.get("candidatesTokenCount", 0)
+            entry["max_output"] += max_output_tokens
+
+    def summary(self):
+        """Rata-rata token per request per kategori"""
+        with self._lock:
+            return {
+                category: {
+                    "requests": entry["requests"],
+                    "avg_estimated_prompt": round(entry["estimated_prompt"] / entry["requests"]),
+                    "avg_prompt": round(entry["prompt"] / entry["requests"]),
+                    "avg_output": round(entry["output"] / entry["requests"]),
+                    "avg_max_output": round(entry["max_output"] / entry["requests"]),
+                }
+                for category, entry in self._usage.items() if entry["requests"]
+            }
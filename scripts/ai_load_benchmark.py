@@ -0,0 +1,139 @@
+"""
+Load test AIHandler terhadap Gemini stand-in lokal (tanpa quota asli)
+Menjalankan campuran request summary (KPOP), casual (OBROLAN) dan bias (BIAS) secara concurrent, lalu
+melaporkan throughput, p50/p90/p99 per jenis dan retry amplification (request upstream / request logis).
+
+    python scripts/ai_load_benchmark.py --standin --requests 300 --concurrency 30 --error-429 0.05
+    python scripts/ai_load_benchmark.py --base-url http://127.0.0.1:8089/v1beta   # stand-in terpisah
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+# Add parent directory to Python path agar bisa import core/features
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.gemini_standin import add_standin_arguments, build_config, create_app
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SAMPLE_MEMBER_INFO = """Stage Name: Dita
+Birth Name: Dita Karang
+Birthday: December 25, 1996
+Position: Main Dancer, Vocalist
+Nationality: Indonesian
+Instagram: @hiitsdita"""
+
+SAMPLE_CASUAL = ["halo min apa kabar", "rekomendasi lagu buat belajar dong", "siapa bias kamu?", "lagi bosen nih"]
+
+SAMPLE_BIAS_PROMPT = "Buat ramalan fortune K-pop singkat dan fun untuk fans bernama {name} dengan bias Dita."
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def run_request(ai_handler, kind, index):
+    if kind == "summary":
+        return await ai_handler.generate_kpop_summary("MEMBER", SAMPLE_MEMBER_INFO)
+    if kind == "casual":
+        return await ai_handler.handle_general_query(random.choice(SAMPLE_CASUAL))
+    return await ai_handler.get_ai_response(SAMPLE_BIAS_PROMPT.format(name=f"user{index}"))
+
+
+async def fetch_upstream_stats(session, stats_url):
+    async with session.get(stats_url) as response:
+        return await response.json()
+
+
+async def run_benchmark(args):
+    import aiohttp
+    from aiohttp import web
+    from features.social_media.ai_handler import AIHandler
+
+    runner = None
+    if args.standin:
+        runner = web.AppRunner(create_app(build_config(args)))
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", args.port).start()
+        logger.info(f"🚀 In-process stand-in on {args.base_url}")
+
+    ai_handler = AIHandler()
+    stats_url = args.base_url.rsplit("/v1beta", 1)[0] + "/__stats"
+    mix = [(kind, float(weight)) for kind, weight in (item.split("=") for item in args.mix.split(","))]
+    kinds = random.choices([kind for kind, _ in mix], weights=[weight for _, weight in mix], k=args.requests)
+    results = {kind: [] for kind, _ in mix}  # {kind: [(latency, ok)]}
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def worker(index, kind):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await run_request(ai_handler, kind, index)
+            results[kind].append((time.perf_counter() - start, bool(response) and "[standin]" in response))
+
+    async with aiohttp.ClientSession() as session:
+        await session.post(stats_url.replace("__stats", "__reset"))
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(index, kind) for index, kind in enumerate(kinds)))
+        elapsed = time.perf_counter() - start
+        upstream = await fetch_upstream_stats(session, stats_url)
+
+    await ai_handler.close()
+    if runner:
+        await runner.cleanup()
+
+    print(f"\n📊 AI load benchmark: {args.requests} requests, concurrency {args.concurrency}, {elapsed:.1f}s")
+    print(f"{'kind':<10}{'count':>7}{'ok':>7}{'p50':>9}{'p90':>9}{'p99':>9}")
+    all_latencies = []
+    total_ok = 0
+    for kind, samples in results.items():
+        latencies = [latency for latency, _ in samples]
+        ok = sum(1 for _, success in samples if success)
+        all_latencies.extend(latencies)
+        total_ok += ok
+        print(f"{kind:<10}{len(samples):>7}{ok:>7}{percentile(latencies, 0.5):>8.2f}s"
+              f"{percentile(latencies, 0.9):>8.2f}s{percentile(latencies, 0.99):>8.2f}s")
+    print(f"{'all':<10}{len(all_latencies):>7}{total_ok:>7}{percentile(all_latencies, 0.5):>8.2f}s"
+          f"{percentile(all_latencies, 0.9):>8.2f}s{percentile(all_latencies, 0.99):>8.2f}s")
+
+    amplification = upstream["requests"] / args.requests if args.requests else 0.0
+    print(f"\n⚡ Throughput: {args.requests / elapsed:.1f} req/s ({total_ok / elapsed:.1f} ok/s)")
+    print(f"🔁 Retry amplification: {amplification:.2f}x ({upstream['requests']} upstream, "
+          f"{upstream['cancelled']} cancelled) status {upstream['by_status']}")
+    print(f"🪁 Hedging: {ai_handler.hedge_policy.summary()}")
+    print(f"🚦 Scheduler: {ai_handler.scheduler.get_metrics()}")
+
+
+if __name__ == "__main__":
+    parser = add_standin_arguments(argparse.ArgumentParser(description="AIHandler load benchmark"))
+    parser.add_argument("--standin", action="store_true", help="Jalankan stand-in di process yang sama")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--base-url", default=None, help="Default http://127.0.0.1:<port>/v1beta")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--mix", default="summary=0.4,casual=0.4,bias=0.2")
+    parser.add_argument("--keys", type=int, default=3, help="Jumlah API key dummy (key asli di env diabaikan)")
+    parser.add_argument("--rpm", type=int, default=None, help="Override GEMINI_RPM per key/model")
+    args = parser.parse_args()
+
+    args.base_url = args.base_url or f"http://127.0.0.1:{args.port}/v1beta"
+    # Env harus diset sebelum AIHandler dibuat - jangan pernah kirim key asli ke stand-in
+    os.environ["GEMINI_BASE_URL"] = args.base_url
+    for i in range(1, 6):
+        os.environ.pop(f"GEMINI_API_KEY_{i}", None)
+    os.environ.pop("GEMINI_API_KEY", None)
+    for i in range(1, args.keys + 1):
+        os.environ[f"GEMINI_API_KEY_{i}"] = f"standin-key-{i:04d}"
+    if args.rpm:
+        os.environ["GEMINI_RPM"] = str(args.rpm)
+
+    asyncio.run(run_benchmark(args))
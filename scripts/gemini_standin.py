@@ -0,0 +1,205 @@
+"""
+Stand-in lokal untuk Gemini generateContent / streamGenerateContent
+Dipakai untuk load test AIHandler tanpa memakai quota asli:
+    python scripts/gemini_standin.py --port 8089 --latency lognormal:0.8,0.5 --error-429 0.05
+    GEMINI_BASE_URL=http://127.0.0.1:8089/v1beta python core/main.py
+Latency: fixed:<detik> | uniform:<min>,<max> | lognormal:<median>,<sigma>, bisa per model via --model-latency.
+GET /__stats menampilkan jumlah request per model/key/status, POST /__reset mengosongkan counter.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+from aiohttp import web
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RESPONSE_TEXT = (
+    "[standin] ✨ Ini info tentang {model}: respons sintetis dari Gemini stand-in lokal. "
+    "Dipakai untuk mengukur throughput, latency dan retry amplification AIHandler tanpa quota asli."
+)
+
+
+def parse_latency(spec):
+    """Parse spesifikasi distribusi latency -> callable tanpa argumen yang return detik"""
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",") if value]
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        low, high = values
+        return lambda: random.uniform(low, high)
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda: random.lognormvariate(math.log(median), sigma)
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class StandinConfig:
+    def __init__(self, latency="lognormal:0.8,0.5", model_latency=None, error_429=0.0, error_500=0.0,
+                 stream_chunks=8, retry_after=None):
+        self.latency = parse_latency(latency)
+        self.model_latency = {model: parse_latency(spec) for model, spec in (model_latency or {}).items()}
+        self.error_429 = error_429
+        self.error_500 = error_500
+        self.stream_chunks = stream_chunks
+        self.retry_after = retry_after
+
+    def sample_latency(self, model):
+        return max(0.0, self.model_latency.get(model, self.latency)())
+
+
+class StandinStats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started_at = time.time()
+        self.requests = 0
+        self.by_model = {}
+        self.by_key = {}
+        self.by_status = {}
+        self.cancelled = 0
+
+    def record(self, model, key, status):
+        self.requests += 1
+        self.by_model[model] = self.by_model.get(model, 0) + 1
+        self.by_key[key] = self.by_key.get(key, 0) + 1
+        self.by_status[str(status)] = self.by_status.get(str(status), 0) + 1
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "cancelled": self.cancelled,
+            "by_model": self.by_model,
+            "by_key": self.by_key,
+            "by_status": self.by_status,
+            "uptime": round(time.time() - self.started_at, 1),
+        }
+
+
+def _response_body(model, prompt, text):
+    prompt_tokens = max(1, len(prompt) // 4)
+    return {
+        "candidates": [{
+            "content": {"parts": [{"text": text}], "role": "model"},
+            "finishReason": "STOP",
+            "index": 0,
+        }],
+        "usageMetadata": {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": max(1, len(text) // 4),
+            "totalTokenCount": prompt_tokens + max(1, len(text) // 4),
+        },
+        "modelVersion": model,
+    }
+
+
+def _error_body(status, message, headers=None):
+    return web.json_response({"error": {"code": status, "message": message, "status": "STANDIN_ERROR"}},
+                             status=status, headers=headers)
+
+
+def create_app(config=None):
+    """aiohttp Application stand-in. config: StandinConfig"""
+    config = config or StandinConfig()
+    stats = StandinStats()
+
+    async def handle_model(request):
+        model, _, action = request.match_info["model_action"].partition(":")
+        key = request.query.get("key", "none")[-4:]
+        try:
+            payload = await request.json()
+            prompt = payload["contents"][0]["parts"][0]["text"]
+        except (ValueError, KeyError, IndexError):
+            stats.record(model, key, 400)
+            return _error_body(400, "Invalid generateContent payload")
+
+        roll = random.random()
+        if roll < config.error_429:
+            stats.record(model, key, 429)
+            headers = {"Retry-After": str(config.retry_after)} if config.retry_after else None
+            return _error_body(429, "Resource has been exhausted (stand-in)", headers)
+        if roll < config.error_429 + config.error_500:
+            await asyncio.sleep(config.sample_latency(model) / 2)
+            stats.record(model, key, 500)
+            return _error_body(500, "Internal error (stand-in)")
+
+        text = RESPONSE_TEXT.format(model=model)
+        latency = config.sample_latency(model)
+        try:
+            if action == "streamGenerateContent":
+                return await _stream(request, model, prompt, text, latency)
+            await asyncio.sleep(latency)
+        except asyncio.CancelledError:
+            # Client membatalkan (mis. hedge yang kalah)
+            stats.cancelled += 1
+            raise
+        stats.record(model, key, 200)
+        return web.json_response(_response_body(model, prompt, text))
+
+    async def _stream(request, model, prompt, text, latency):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        chunks = max(1, config.stream_chunks)
+        size = math.ceil(len(text) / chunks)
+        for index in range(chunks):
+            await asyncio.sleep(latency / chunks)
+            body = _response_body(model, prompt, text[index * size:(index + 1) * size])
+            await response.write(f"data: {json.dumps(body, ensure_ascii=False)}\r\n\r\n".encode("utf-8"))
+        stats.record(model, request.query.get("key", "none")[-4:], 200)
+        await response.write_eof()
+        return response
+
+    async def handle_stats(request):
+        return web.json_response(stats.to_dict())
+
+    async def handle_reset(request):
+        stats.reset()
+        return web.json_response({"status": "reset"})
+
+    app = web.Application()
+    app["stats"] = stats
+    app.router.add_post("/v1beta/models/{model_action}", handle_model)
+    app.router.add_get("/__stats", handle_stats)
+    app.router.add_post("/__reset", handle_reset)
+    return app
+
+
+def build_config(args):
+    model_latency = dict(item.split("=", 1) for item in args.model_latency)
+    return StandinConfig(
+        latency=args.latency,
+        model_latency=model_latency,
+        error_429=args.error_429,
+        error_500=args.error_500,
+        stream_chunks=args.stream_chunks,
+        retry_after=args.retry_after,
+    )
+
+
+def add_standin_arguments(parser):
+    parser.add_argument("--latency", default="lognormal:0.8,0.5", help="fixed:S | uniform:A,B | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SPEC",
+                        help="Override latency per model, mis. gemini-2.0-flash-exp=lognormal:3,0.8")
+    parser.add_argument("--error-429", type=float, default=0.0, help="Probabilitas response 429")
+    parser.add_argument("--error-500", type=float, default=0.0, help="Probabilitas response 500")
+    parser.add_argument("--stream-chunks", type=int, default=8, help="Jumlah event SSE per stream")
+    parser.add_argument("--retry-after", type=int, default=None, help="Header Retry-After (detik) pada 429")
+    return parser
+
+
+if __name__ == "__main__":
+    parser = add_standin_arguments(argparse.ArgumentParser(description="Local Gemini API stand-in"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    args = parser.parse_args()
+
+    logger.info(f"🚀 Gemini stand-in on http://{args.host}:{args.port}/v1beta (latency {args.latency}, "
+                f"429 {args.error_429:.0%}, 500 {args.error_500:.0%})")
+    web.run_app(create_app(build_config(args)), host=args.host, port=args.port, print=None)
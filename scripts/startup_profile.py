@@ -0,0 +1,97 @@
+"""
+Startup profile + budget check (tanpa connect ke Discord)
+Menjalankan startup bot (BotCore, CommandsHandler, warm-up subsystem) di child process dengan
+`python -X importtime`, lalu mencetak report ranking import / fase init / network fetch.
+Exit code 1 jika ada budget yang terlampaui - dipakai sebagai gate CI.
+
+    python scripts/startup_profile.py
+    python scripts/startup_profile.py --budget total=30 --budget import:pandas=3 --budget phase:gacha_load=5
+    STARTUP_BUDGETS="total=30,phase:db_load=10" python scripts/startup_profile.py
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Add parent directory to Python path agar bisa import core/features
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+RESULT_MARKER = "__STARTUP_PROFILE__"
+
+
+def run_child():
+    """Startup di process ini (dipanggil dengan -X importtime oleh parent)"""
+    start = time.perf_counter()
+    from core.startup_profiler import startup_profiler
+    startup_profiler.enabled = True
+    from core.bot_core import BotCore
+    from core.commands import CommandsHandler
+    startup_profiler.mark("imports_done")
+
+    with startup_profiler.phase("bot_core"):
+        bot_core = BotCore()
+    with startup_profiler.phase("commands_handler"):
+        commands_handler = CommandsHandler(bot_core)
+    # Warm-up subsystem lazy secara sinkron (di bot asli terjadi setelah on_ready)
+    for key in ("social_media", "maintenance", "gacha", "bias"):
+        commands_handler.subsystems[key].get()
+    startup_profiler.mark("startup_done")
+
+    result = {
+        "entries": startup_profiler.entries,
+        "marks": startup_profiler.marks,
+        "total": time.perf_counter() - start,
+        "subsystems": commands_handler.subsystems.status(),
+    }
+    print(RESULT_MARKER + json.dumps(result))
+
+
+def run_parent(args):
+    from core.startup_profiler import check_budgets, format_report, parse_budgets, parse_importtime
+
+    env = dict(os.environ, STARTUP_PROFILE="true", SUBSYSTEM_WARMUP="false")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child"],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True,
+    )
+    result_lines = [line for line in completed.stdout.splitlines() if line.startswith(RESULT_MARKER)]
+    if completed.returncode != 0 or not result_lines:
+        print(completed.stdout[-2000:])
+        print(completed.stderr[-4000:], file=sys.stderr)
+        print("❌ Startup failed - no profile collected", file=sys.stderr)
+        return 2
+
+    result = json.loads(result_lines[-1][len(RESULT_MARKER):])
+    entries = parse_importtime(completed.stderr, depth=args.import_depth) + result["entries"]
+    print(format_report(entries, result["marks"], top=args.top))
+    print(f"  total startup: {result['total']:.2f}s")
+    for key, status in result["subsystems"].items():
+        print(f"  subsystem {key}: {status['state']}" + (f" ({status['error']})" if status["error"] else ""))
+
+    budgets = parse_budgets(os.getenv("STARTUP_BUDGETS", ""))
+    for spec in args.budget:
+        budgets.update(parse_budgets(spec))
+    violations = check_budgets(entries, budgets, result["total"])
+    for key, actual, budget in violations:
+        print(f"❌ Budget exceeded: {key} {actual:.2f}s > {budget:.2f}s", file=sys.stderr)
+    if budgets and not violations:
+        print(f"✅ All {len(budgets)} startup budgets met")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Startup profiler dengan budget check")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--budget", action="append", default=[],
+                        help="kind:name=detik atau total=detik (bisa diulang / dipisah koma)")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--import-depth", type=int, default=0, help="Level nesting import yang dilaporkan")
+    args = parser.parse_args()
+
+    if args.child:
+        run_child()
+    else:
+        sys.exit(run_parent(args))
@@ -0,0 +1,179 @@
+"""
+Cache Codec Module - Kompresi dan header biner untuk value Redis
+Value besar (ringkasan, raw scrape text) dikompres zlib/zstd dengan header kecil:
+MAGIC(3) | version(1) | encoding(1) | soft_expiry(4, epoch detik, 0 = tidak ada)
+Value kecil tanpa soft-expiry disimpan plain agar kompatibel dengan data lama.
+"""
+import os
+import struct
+import threading
+import time
+import zlib
+from core.logger import logger
+
+# Optional zstd dengan graceful fallback ke zlib
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+MAGIC = b"\x00SN"  # Teks UTF-8 plain tidak pernah diawali NUL
+VERSION = 1
+HEADER = struct.Struct(">3sBBI")
+
+ENCODING_RAW = 0
+ENCODING_ZLIB = 1
+ENCODING_ZSTD = 2
+ENCODING_NAMES = {ENCODING_RAW: "raw", ENCODING_ZLIB: "zlib", ENCODING_ZSTD: "zstd"}
+
+# Value di bawah threshold tidak sebanding dengan overhead kompresi
+MIN_COMPRESS_SIZE = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "512"))
+PREFERRED_ENCODING = ENCODING_ZSTD if ZSTD_AVAILABLE and os.getenv("CACHE_CODEC", "zstd").lower() == "zstd" else ENCODING_ZLIB
+
+_zstd_compressor = zstandard.ZstdCompressor(level=6) if ZSTD_AVAILABLE else None
+_zstd_decompressor = zstandard.ZstdDecompressor() if ZSTD_AVAILABLE else None
+
+
+class CodecStats:
+    """Counter penghematan memory (shared oleh semua client di process ini)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.writes = 0
+        self.compressed_writes = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+
+    def record(self, raw_size, stored_size, compressed):
+        with self._lock:
+            self.writes += 1
+            self.raw_bytes += raw_size
+            self.stored_bytes += stored_size
+            if compressed:
+                self.compressed_writes += 1
+
+    def summary(self):
+        saved = self.raw_bytes - self.stored_bytes
+        ratio = (self.stored_bytes / self.raw_bytes) if self.raw_bytes else 1.0
+        return {
+            "writes": self.writes,
+            "compressed_writes": self.compressed_writes,
+            "raw_bytes": self.raw_bytes,
+            "stored_bytes": self.stored_bytes,
+            "saved_bytes": saved,
+            "ratio": round(ratio, 3),
+            "encoding": ENCODING_NAMES[PREFERRED_ENCODING],
+        }
+
+
+codec_stats = CodecStats()
+
+
+def encode_value(value, soft_ttl=None):
+    """Encode str/bytes ke format cache. Return bytes siap disimpan ke Redis"""
+    if isinstance(value, str):
+        payload = value.encode("utf-8")
+    elif isinstance(value, bytes):
+        payload = value
+    else:
+        payload = str(value).encode("utf-8")
+
+    soft_expiry = int(time.time() + soft_ttl) if soft_ttl else 0
+
+    if len(payload) < MIN_COMPRESS_SIZE and not soft_expiry:
+        codec_stats.record(len(payload), len(payload), False)
+        return payload
+
+    encoding = ENCODING_RAW
+    body = payload
+    if len(payload) >= MIN_COMPRESS_SIZE:
+        if PREFERRED_ENCODING == ENCODING_ZSTD:
+            compressed = _zstd_compressor.compress(payload)
+        else:
+            compressed = zlib.compress(payload, 6)
+        # Simpan raw jika kompresi tidak menghemat
+        if len(compressed) < len(payload):
+            encoding = PREFERRED_ENCODING
+            body = compressed
+
+    encoded = HEADER.pack(MAGIC, VERSION, encoding, soft_expiry) + body
+    codec_stats.record(len(payload), len(encoded), encoding != ENCODING_RAW)
+    return encoded
+
+
+def decode_value(raw):
+    """Decode value dari Redis. Return (payload_bytes, meta) - value legacy/plain dikembalikan apa adanya"""
+    if raw is None:
+        return None, None
+    if isinstance(raw, str):
+        return raw.encode("utf-8"), {"encoding": "plain", "soft_expiry": 0}
+    if len(raw) < HEADER.size or not raw.startswith(MAGIC):
+        return raw, {"encoding": "plain", "soft_expiry": 0}
+
+    _, version, encoding, soft_expiry = HEADER.unpack_from(raw)
+    body = raw[HEADER.size:]
+    if version != VERSION:
+        logger.warning(f"Unknown cache codec version {version}, returning raw value")
+        return raw, {"encoding": "unknown", "soft_expiry": 0}
+
+    if encoding == ENCODING_ZLIB:
+        body = zlib.decompress(body)
+    elif encoding == ENCODING_ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Cache value encoded with zstd but zstandard is not installed")
+        body = _zstd_decompressor.decompress(body)
+
+    return body, {"encoding": ENCODING_NAMES.get(encoding, "unknown"), "soft_expiry": soft_expiry}
+
+
+class CompressedRedis:
+    """Wrapper redis client: encode di set/setex, decode transparan di get/mget.
+    Command lain diteruskan langsung ke client asli."""
+
+    def __init__(self, client, decode_responses=False):
+        self._client = client
+        self.decode_responses = decode_responses
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    @property
+    def raw_client(self):
+        return self._client
+
+    def _output(self, payload):
+        if payload is None:
+            return None
+        return payload.decode("utf-8", errors="replace") if self.decode_responses else payload
+
+    def get(self, key):
+        payload, _ = decode_value(self._client.get(key))
+        return self._output(payload)
+
+    def get_with_meta(self, key):
+        """Get + status soft-expiry: return (value, is_stale)"""
+        payload, meta = decode_value(self._client.get(key))
+        if payload is None:
+            return None, False
+        soft_expiry = meta.get("soft_expiry", 0)
+        return self._output(payload), bool(soft_expiry and time.time() > soft_expiry)
+
+    def mget(self, keys, *args):
+        return [self._output(decode_value(raw)[0]) for raw in self._client.mget(keys, *args)]
+
+    def set(self, key, value, ex=None, px=None, nx=False, xx=False, soft_ttl=None, **kwargs):
+        return self._client.set(key, encode_value(value, soft_ttl), ex=ex, px=px, nx=nx, xx=xx, **kwargs)
+
+    def setex(self, key, time_seconds, value, soft_ttl=None):
+        return self._client.setex(key, time_seconds, encode_value(value, soft_ttl))
+
+    def codec_stats(self):
+        return codec_stats.summary()
+
+
+def wrap_redis(client, decode_responses=False):
+    """Bungkus redis client dengan codec (idempotent)"""
+    if client is None or isinstance(client, CompressedRedis):
+        return client
+    return CompressedRedis(client, decode_responses=decode_responses)
@@ -0,0 +1,111 @@
+"""
+Cache Invalidation Module - Clear cache per namespace/entity tanpa FLUSHDB
+FLUSHDB memblokir Redis untuk seluruh keyspace dan ikut menghapus state sn_monitor:* (social media monitor).
+Clear namespace = bump generation (O(1), key lama langsung tidak terbaca), lalu key generation lama
+di-reclaim di background via SCAN + UNLINK di thread terpisah (tidak memblokir event loop).
+"""
+import asyncio
+from core.logger import logger
+from utils.cache_keys import NAMESPACE_VERSIONS, entity_slug, namespace_generations, namespace_prefix
+
+# Namespace Redis yang dibersihkan oleh !sn clearcache
+CLEARABLE_NAMESPACES = ("summary", "casual", "kpop_info")
+# Namespace yang key-nya memuat entity slug
+ENTITY_NAMESPACES = ("summary", "kpop_info")
+# Format key sebelum cache_keys (hash() per process) - tidak akan pernah hit lagi
+LEGACY_PATTERNS = ("MEMBER:*", "GROUP:*", "MEMBER_GROUP:*", "casual:*", "kpop_info:*")
+
+SCAN_BATCH_SIZE = 500
+
+_background_tasks = set()
+
+
+def _raw(redis_client):
+    return getattr(redis_client, "raw_client", redis_client)
+
+
+def reclaim_keys(redis_client, patterns, batch_size=SCAN_BATCH_SIZE):
+    """SCAN + UNLINK (blocking, jalankan di thread). Return jumlah key yang dihapus"""
+    client = _raw(redis_client)
+    deleted = 0
+    for pattern in patterns:
+        batch = []
+        for key in client.scan_iter(match=pattern, count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                deleted += client.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += client.unlink(*batch)
+    return deleted
+
+
+async def reclaim_in_background(redis_client, patterns):
+    """Physical reclaim di thread pool - event loop tetap responsif"""
+    try:
+        deleted = await asyncio.to_thread(reclaim_keys, redis_client, list(patterns))
+        logger.info(f"🧹 Cache reclaim: {deleted} keys unlinked ({', '.join(patterns)})")
+        return deleted
+    except Exception as e:
+        logger.error(f"Cache reclaim error: {e}")
+        return 0
+
+
+def _schedule(coro):
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+def bump_namespaces(namespaces):
+    """Bump generation tiap namespace (GET + INCR Redis, blocking). Return ({namespace: new_generation}, patterns lama)"""
+    generations = {}
+    patterns = []
+    for namespace in namespaces:
+        old_generation, new_generation = namespace_generations.bump(namespace)
+        generations[namespace] = new_generation
+        patterns.append(f"{namespace_prefix(namespace, generation=old_generation)}:*")
+    return generations, patterns
+
+
+async def clear_namespaces(redis_client, namespaces=CLEARABLE_NAMESPACES, include_legacy=True):
+    """Clear logis (bump generation di thread) lalu jadwalkan reclaim key generation lama.
+    Return {namespace: new_generation}"""
+    generations, patterns = await asyncio.to_thread(bump_namespaces, namespaces)
+    if include_legacy:
+        patterns.extend(LEGACY_PATTERNS)
+    if redis_client is not None:
+        _schedule(reclaim_in_background(redis_client, patterns))
+    logger.info(f"Cache namespaces cleared: {generations}")
+    return generations
+
+
+def entity_patterns(name, namespaces=ENTITY_NAMESPACES):
+    """Pattern SCAN untuk satu entity: hanya slug persis ("dita:" cocok, "dita-secret-number:" tidak)"""
+    slug = entity_slug(name)
+    patterns = []
+    for namespace in namespaces:
+        if namespace not in NAMESPACE_VERSIONS:
+            continue
+        prefix = namespace_prefix(namespace)
+        patterns.append(f"{prefix}:{slug}:*")
+    return patterns
+
+
+def invalidate_local(redis_client, patterns):
+    """Buang entry L1 worker ini (utils/local_cache.py) yang cocok dengan pattern SCAN"""
+    invalidate_prefix = getattr(redis_client, "invalidate_prefix", None)
+    if invalidate_prefix is None:
+        return
+    for pattern in patterns:
+        invalidate_prefix(pattern.rstrip("*"))
+
+
+async def clear_entity(redis_client, name, namespaces=ENTITY_NAMESPACES):
+    """Hapus cache satu entity (summary + raw scraping). Return jumlah key yang dihapus"""
+    if redis_client is None:
+        return 0
+    patterns = entity_patterns(name, namespaces)
+    invalidate_local(redis_client, patterns)
+    return await reclaim_in_background(redis_client, patterns)
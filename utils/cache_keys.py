@@ -0,0 +1,115 @@
+"""
+Cache Keys Module - Skema cache key yang stabil dan berversi untuk semua pemakai cache
+hash() Python di-salt per process (PYTHONHASHSEED), sehingga key berbasis hash() berubah di setiap
+restart/deploy dan tidak pernah sama antar process. Semua key dibangun dari digest blake2b:
+    {prefix}:{namespace}:v{schema_version}.g{generation}[:{entity_slug}]:{digest}
+Naikkan schema version namespace jika format value yang disimpan berubah. Generation disimpan di Redis
+dan di-bump untuk clear logis satu namespace dalam O(1) (lihat utils/cache_invalidation.py).
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from core.logger import logger
+
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "sn")
+DIGEST_SIZE = 16  # bytes -> 32 hex chars
+
+# Namespace -> schema version
+NAMESPACE_VERSIONS = {
+    "summary": 1,      # Ringkasan AI member/grup (CommandsHandler._handle_kpop_query)
+    "casual": 1,       # Respons obrolan casual
+    "kpop_info": 1,    # Raw hasil scraping DataFetcher
+}
+
+# Generation lokal di-refresh dari Redis tiap N detik (bump dari process lain terlihat setelah ini)
+GENERATION_REFRESH = float(os.getenv("CACHE_NAMESPACE_REFRESH", "5"))
+
+_PART_SEPARATOR = "\x1f"
+
+
+class NamespaceGenerations:
+    """Generation counter per namespace di Redis ({prefix}:nsgen:{namespace}) dengan cache lokal singkat"""
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+        self._local = {}  # {namespace: (generation, fetched_at)}
+
+    def attach(self, redis_client):
+        """Pakai redis client pertama yang tersedia (raw client, tanpa codec)"""
+        if self._client is None and redis_client is not None:
+            self._client = getattr(redis_client, "raw_client", redis_client)
+
+    @staticmethod
+    def redis_key(namespace):
+        return f"{CACHE_KEY_PREFIX}:nsgen:{namespace}"
+
+    def get(self, namespace):
+        now = time.monotonic()
+        cached = self._local.get(namespace)
+        if cached and now - cached[1] < GENERATION_REFRESH:
+            return cached[0]
+        generation = cached[0] if cached else 0
+        if self._client is not None:
+            try:
+                raw = self._client.get(self.redis_key(namespace))
+                generation = int(raw) if raw else 0
+            except Exception as e:
+                logger.warning(f"Cache generation read error for {namespace}: {e}")
+        with self._lock:
+            self._local[namespace] = (generation, now)
+        return generation
+
+    def bump(self, namespace):
+        """Naikkan generation namespace. Return (old_generation, new_generation)"""
+        old_generation = self.get(namespace)
+        new_generation = old_generation + 1
+        if self._client is not None:
+            try:
+                new_generation = int(self._client.incr(self.redis_key(namespace)))
+            except Exception as e:
+                logger.warning(f"Cache generation bump error for {namespace}, bumping locally: {e}")
+        with self._lock:
+            self._local[namespace] = (new_generation, time.monotonic())
+        return old_generation, new_generation
+
+
+namespace_generations = NamespaceGenerations()
+
+
+def stable_digest(*parts, size=DIGEST_SIZE):
+    """Digest hex blake2b deterministik dari parts (tidak bergantung PYTHONHASHSEED)"""
+    payload = _PART_SEPARATOR.join("" if part is None else str(part) for part in parts)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=size).hexdigest()
+
+
+def stable_int(*parts):
+    """Integer deterministik dari parts - pengganti hash() untuk seed/pemilihan yang konsisten"""
+    return int.from_bytes(hashlib.blake2b(_PART_SEPARATOR.join(str(part) for part in parts).encode("utf-8"),
+                                          digest_size=8).digest(), "big")
+
+
+def entity_slug(name, max_length=48):
+    """Slug nama entity yang terbaca di key ("Secret Number" -> "secret-number")"""
+    slug = re.sub(r"[^\w]+", "-", (name or "").strip().lower()).strip("-")
+    return slug[:max_length] or "_"
+
+
+def namespace_prefix(namespace, entity=None, generation=None):
+    """Prefix key untuk satu namespace (atau satu entity di namespace) - dipakai untuk SCAN pattern"""
+    version = NAMESPACE_VERSIONS.get(namespace, 1)
+    if generation is None:
+        generation = namespace_generations.get(namespace)
+    prefix = f"{CACHE_KEY_PREFIX}:{namespace}:v{version}.g{generation}"
+    if entity is not None:
+        prefix += f":{entity_slug(entity)}"
+    return prefix
+
+
+def cache_key(namespace, *parts, entity=None):
+    """Build cache key stabil. entity (opsional) disisipkan sebagai slug agar bisa di-invalidate per entity"""
+    if namespace not in NAMESPACE_VERSIONS:
+        raise ValueError(f"Unknown cache namespace: {namespace}")
+    return f"{namespace_prefix(namespace, entity)}:{stable_digest(namespace, *parts)}"
@@ -0,0 +1,148 @@
+"""
+Conversation Store Module - Memory percakapan per user dengan batas TTL dan LRU
+Backend in-memory: OrderedDict (LRU global max_users) + TTL per user, pesan per user dibatasi.
+Backend Redis (opsional, CONVERSATION_REDIS=true): list per user dengan RPUSH + LTRIM + EXPIRE,
+sehingga konteks bertahan saat restart dan terlihat dari semua process/shard.
+Dari event loop pakai varian *_async: operasi Redis (blocking) dijalankan di thread.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from core.logger import logger
+
+CONVERSATION_TTL = int(os.getenv("CONVERSATION_TTL", "1800"))  # 30 menit tanpa aktivitas
+CONVERSATION_MAX_USERS = int(os.getenv("CONVERSATION_MAX_USERS", "5000"))
+MAX_MESSAGE_CHARS = 500  # Pesan panjang dipotong - konteks cukup ringkas
+
+
+class ConversationStore:
+    """Per-user message list: Redis list -> in-memory LRU/TTL"""
+
+    REDIS_PREFIX = "sn:conv:"
+
+    def __init__(self, redis_client=None, max_messages=6, ttl=CONVERSATION_TTL, max_users=CONVERSATION_MAX_USERS):
+        self.redis_client = getattr(redis_client, "raw_client", redis_client)
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # {user_id: {"messages": [...], "updated_at": epoch}}
+        self._redis_users = OrderedDict()  # {user_id: updated_at} - user aktif yang ditulis process ini
+        self.evictions = 0
+
+    @property
+    def backend(self):
+        return "redis" if self.redis_client else "memory"
+
+    def _key(self, user_id):
+        return f"{self.REDIS_PREFIX}{user_id}"
+
+    def _prune(self, now):
+        """Buang user expired lalu LRU sampai di bawah max_users (dipanggil dengan lock)"""
+        while self._memory:
+            user_id, entry = next(iter(self._memory.items()))
+            if now - entry["updated_at"] <= self.ttl and len(self._memory) <= self.max_users:
+                break
+            del self._memory[user_id]
+            self.evictions += 1
+        while self._redis_users:
+            user_id, updated_at = next(iter(self._redis_users.items()))
+            if now - updated_at <= self.ttl and len(self._redis_users) <= self.max_users:
+                break
+            del self._redis_users[user_id]
+
+    def add(self, user_id, role, content):
+        message = {"role": role, "content": (content or "")[:MAX_MESSAGE_CHARS]}
+        now = time.time()
+        if self.redis_client:
+            try:
+                key = self._key(user_id)
+                pipe = self.redis_client.pipeline()
+                pipe.rpush(key, json.dumps(message, ensure_ascii=False))
+                pipe.ltrim(key, -self.max_messages, -1)
+                pipe.expire(key, self.ttl)
+                pipe.execute()
+                with self._lock:
+                    self._redis_users[user_id] = now
+                    self._redis_users.move_to_end(user_id)
+                    self._prune(now)
+                return
+            except Exception as e:
+                logger.warning(f"Conversation store Redis write error, using memory: {e}")
+
+        with self._lock:
+            entry = self._memory.pop(user_id, None)
+            if entry is None or now - entry["updated_at"] > self.ttl:
+                entry = {"messages": [], "updated_at": now}
+            entry["messages"].append(message)
+            entry["messages"] = entry["messages"][-self.max_messages:]
+            entry["updated_at"] = now
+            self._memory[user_id] = entry
+            self._prune(now)
+
+    def get(self, user_id):
+        """Pesan terakhir user (list dict role/content), kosong jika expired"""
+        if self.redis_client:
+            try:
+                return [json.loads(raw) for raw in self.redis_client.lrange(self._key(user_id), 0, -1)]
+            except Exception as e:
+                logger.warning(f"Conversation store Redis read error, using memory: {e}")
+
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(user_id)
+            if entry is None:
+                return []
+            if now - entry["updated_at"] > self.ttl:
+                del self._memory[user_id]
+                self.evictions += 1
+                return []
+            self._memory.move_to_end(user_id)
+            return list(entry["messages"])
+
+    def clear(self, user_id):
+        if self.redis_client:
+            try:
+                self.redis_client.delete(self._key(user_id))
+            except Exception as e:
+                logger.warning(f"Conversation store Redis delete error: {e}")
+        with self._lock:
+            self._memory.pop(user_id, None)
+            self._redis_users.pop(user_id, None)
+
+    async def add_async(self, user_id, role, content):
+        if self.redis_client:
+            return await asyncio.to_thread(self.add, user_id, role, content)
+        return self.add(user_id, role, content)
+
+    async def get_async(self, user_id):
+        if self.redis_client:
+            return await asyncio.to_thread(self.get, user_id)
+        return self.get(user_id)
+
+    async def clear_async(self, user_id):
+        if self.redis_client:
+            return await asyncio.to_thread(self.clear, user_id)
+        return self.clear(user_id)
+
+    def memory_report(self):
+        """Ringkasan pemakaian memory (in-process) dan user aktif"""
+        with self._lock:
+            self._prune(time.time())
+            messages = sum(len(entry["messages"]) for entry in self._memory.values())
+            content_bytes = sum(
+                len(message["content"].encode("utf-8"))
+                for entry in self._memory.values() for message in entry["messages"]
+            )
+            return {
+                "backend": self.backend,
+                "users": len(self._redis_users) if self.redis_client else len(self._memory),
+                "messages": messages,
+                "approx_bytes": content_bytes + messages * 120 + len(self._memory) * 200,  # + overhead dict/list
+                "max_users": self.max_users,
+                "ttl": self.ttl,
+                "evictions": self.evictions,
+            }
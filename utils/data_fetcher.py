@@ -2,6 +2,7 @@
 Data Fetcher Module - Menangani scraping dan API calls untuk informasi K-pop
 """
 import os
+import contextvars
 import requests
 from bs4 import BeautifulSoup
 import re
@@ -15,6 +16,14 @@ from datetime import datetime, timedelta
 from io import BytesIO
 from urllib.parse import urljoin
 from core.logger import logger
+from utils.cache_codec import wrap_redis
+from utils.local_cache import wrap_local_cache
+from utils.cache_invalidation import entity_patterns, invalidate_local
+from core.tracing import tracer
+from core.metrics import SCRAPE_LATENCY, SCRAPE_RESULTS, record_cache
+from utils.text_dedup import dedupe_paragraphs
+from utils.cache_keys import cache_key as build_cache_key, namespace_generations
+from utils.entity_store import EntityStore, extract_profile_facts, REQUIRED_FIELDS
 
 try:
     from features.analytics.analytics import BotAnalytics
@@ -25,22 +34,30 @@ except ImportError:
         def track_daily_usage(self): pass
     analytics = BotAnalytics()
 
+# Hasil scraping per source untuk fact extraction, per pemanggilan fetch_kpop_info
+# (task gather menyalin context, jadi query identik yang berjalan bersamaan tidak saling menimpa)
+_scraped_sources = contextvars.ContextVar("sn_scraped_sources", default=None)  # [(priority, domain, results)]
+
 class DataFetcher:
-    def __init__(self, kpop_df=None):
+    def __init__(self, kpop_df=None, db_engine=None):
         self.NEWS_API_KEY = os.getenv("NEWS_API_KEY")
         self.CSE_API_KEYS = [os.getenv(f"CSE_API_KEY_{i}") for i in range(1, 4)]
         self.CSE_IDS = [os.getenv(f"CSE_ID_{i}") for i in range(1, 4)]
-        self.kpop_df = kpop_df  # Database untuk fallback info
+        self.kpop_df = kpop_df  # Database untuk fallback info (setter membangun name index)
         
         # Redis cache setup
         self.redis_client = None
         try:
             redis_url = os.getenv("REDIS_URL")
             if redis_url:
-                self.redis_client = redis.from_url(redis_url, decode_responses=True)
+                self.redis_client = wrap_local_cache(wrap_redis(redis.from_url(redis_url), decode_responses=True))
+                namespace_generations.attach(self.redis_client)
         except Exception as e:
             logger.warning(f"Redis cache not available: {e}")
         
+        # Structured per-entity fact store (PostgreSQL -> Redis -> memory)
+        self.entity_store = EntityStore(engine=db_engine, redis_client=self.redis_client)
+        
         # Performance tracking
         self.site_performance = {}
         self.session = None
@@ -389,18 +406,106 @@ class DataFetcher:
             "newjeans minji": "Minji_(NewJeans)"
         }
     
+    @property
+    def kpop_df(self):
+        return self._kpop_df
+    
+    @kpop_df.setter
+    def kpop_df(self, df):
+        self._kpop_df = df
+        self._build_name_index()
+    
+    def _build_name_index(self):
+        """Bangun lowercase name -> row index sekali, agar lookup per query tidak scan DataFrame"""
+        self._records = []              # Precomputed member records (dict per row)
+        self._stage_name_index = {}     # stage name lower -> [record idx]
+        self._group_index = {}          # group lower -> [record idx]
+        self._group_names = {}          # group lower -> nama grup asli
+        self._name_token_index = {}     # token full/korean name lower -> {record idx}
+        
+        if self._kpop_df is None or self._kpop_df.empty:
+            return
+        
+        def clean(value):
+            if value is None or (isinstance(value, float) and value != value):  # NaN
+                return ''
+            return str(value).strip()
+        
+        columns = ['Stage Name', 'Group', 'Full Name', 'Korean Stage Name']
+        available = [col for col in columns if col in self._kpop_df.columns]
+        for raw in self._kpop_df[available].to_dict('records'):
+            record = {col: clean(raw.get(col)) for col in columns}
+            idx = len(self._records)
+            self._records.append(record)
+            
+            stage_lower = record['Stage Name'].lower()
+            if stage_lower:
+                self._stage_name_index.setdefault(stage_lower, []).append(idx)
+            
+            group_lower = record['Group'].lower()
+            if group_lower:
+                self._group_index.setdefault(group_lower, []).append(idx)
+                self._group_names.setdefault(group_lower, record['Group'])
+            
+            for name in (record['Full Name'], record['Korean Stage Name']):
+                for token in name.lower().split():
+                    self._name_token_index.setdefault(token, set()).add(idx)
+        
+        logger.info(f"DataFetcher name index built: {len(self._stage_name_index)} stage names, {len(self._group_index)} groups")
+    
+    def _members_by_stage_name(self, name):
+        """Record member dengan stage name persis (case-insensitive)"""
+        return [self._records[idx] for idx in self._stage_name_index.get(name.lower().strip(), [])]
+    
+    def _members_by_group(self, group):
+        """Record member dari grup persis (case-insensitive)"""
+        return [self._records[idx] for idx in self._group_index.get(group.lower().strip(), [])]
+    
+    def _members_by_real_name(self, query):
+        """Record member yang Full Name / Korean Stage Name mengandung query.
+        Fast path token index (kata utuh); jika kosong fallback scan substring seperti str.contains
+        (nama parsial "soo" tetap cocok dengan "Kim Jisoo")."""
+        query_lower = query.lower().strip()
+        tokens = query_lower.split()
+        if not tokens:
+            return []
+        
+        def contains(record):
+            return query_lower in record['Full Name'].lower() or query_lower in record['Korean Stage Name'].lower()
+        
+        candidates = set(self._name_token_index.get(tokens[0], set()))
+        for token in tokens[1:]:
+            candidates &= self._name_token_index.get(token, set())
+        matches = [self._records[idx] for idx in sorted(candidates) if contains(self._records[idx])]
+        if matches:
+            return matches
+        return [record for record in self._records if contains(record)]
+    
     async def fetch_kpop_info(self, query):
         """Fetch comprehensive K-pop information with optimized caching and async processing"""
+        scraped_sources = []
+        sources_token = _scraped_sources.set(scraped_sources)
         try:
             logger.info(f"Starting optimized data fetch for: {query}")
             
             # Check cache first
-            cache_key = f"kpop_info:{query.lower()}"
-            cached_result = self._get_from_cache(cache_key)
+            cache_key = build_cache_key("kpop_info", query.lower(), entity=query)
+            with tracer.span("cache_lookup", namespace="kpop_info") as span:
+                cached_result = self._get_from_cache(cache_key)
+                if span:
+                    span.set_attribute("hit", bool(cached_result))
+            record_cache("kpop_info", bool(cached_result))
             if cached_result:
                 logger.info(f"Cache hit for query: {query}")
                 return cached_result
             
+            # Check structured entity store - scrape hanya jika field wajib hilang/basi
+            entity_key, entity_type = self._get_entity_key(query)
+            stored_text = await asyncio.to_thread(self._build_context_from_store, query, entity_key, entity_type)
+            if stored_text:
+                self._save_to_cache(cache_key, stored_text)
+                return stored_text
+            
             start_time = time.time()
             all_results = []
             
@@ -409,7 +514,8 @@ class DataFetcher:
             
             # 1. Async website scraping with early termination
             try:
-                website_results = await self._scrape_websites_async(query, sorted_sites)
+                with tracer.span("scrape", query=query):
+                    website_results = await self._scrape_websites_async(query, sorted_sites)
                 all_results.extend(website_results)
                 logger.info(f"Async scraping completed: {len(website_results)} results")
             except Exception as e:
@@ -418,14 +524,16 @@ class DataFetcher:
             # Always try to get more sources untuk akurasi maksimal
             # 2. Google Custom Search
             try:
-                cse_results = await self._fetch_from_cse(query)
+                with tracer.span("cse"):
+                    cse_results = await self._fetch_from_cse(query)
                 all_results.extend(cse_results)
             except Exception as e:
                 logger.error(f"CSE fetch failed: {e}")
             
             # 3. NewsAPI
             try:
-                news_results = await self._fetch_from_newsapi(query)
+                with tracer.span("newsapi"):
+                    news_results = await self._fetch_from_newsapi(query)
                 all_results.extend(news_results)
             except Exception as e:
                 logger.error(f"NewsAPI fetch failed: {e}")
@@ -442,24 +550,32 @@ class DataFetcher:
             # Enhanced trivia/facts extraction untuk semua member
             try:
                 if len(all_results) > 0:  # Only if we have some results
-                    trivia_results = await self.scrape_member_trivia(query, self._extract_group_name_from_query(query))
+                    with tracer.span("trivia"):
+                        trivia_results = await self.scrape_member_trivia(query, self._extract_group_name_from_query(query))
                     if trivia_results.get('success') and trivia_results.get('facts'):
                         # Ambil 1-4 facts terbaik
                         selected_facts = trivia_results['facts'][:4]
                         facts_text = "\n\n🎭 **Fun Facts & Trivia:**\n" + "\n".join([f"• {fact}" for fact in selected_facts])
                         all_results.append(facts_text)
+                        trivia_domain = trivia_results.get('trivia_url', '').split('/')[2] if trivia_results.get('trivia_url') else 'fandom.com'
+                        await asyncio.to_thread(self.entity_store.save_facts, entity_key,
+                                                {"fun_facts": "\n".join(selected_facts)}, trivia_domain)
                         logger.info(f"Added {len(selected_facts)} trivia facts for {query}")
             except Exception as e:
                 logger.error(f"Trivia extraction failed: {e}")
             
-            # Clean and combine results
-            final_text = self._clean_text(all_results)
+            # Simpan fakta terstruktur per source untuk query berikutnya
+            await asyncio.to_thread(self._store_scraped_facts, entity_key, scraped_sources)
             
-            # Enhanced birth date extraction dari hasil scraping
-            final_text = self._enhance_birth_date_extraction(final_text, query)
-            
-            # Enhance with discography information if needed
-            final_text = self._enhance_discography_content(final_text, query)
+            with tracer.span("clean", results=len(all_results)):
+                # Clean and combine results
+                final_text = self._clean_text(all_results)
+                
+                # Enhanced birth date extraction dari hasil scraping
+                final_text = self._enhance_birth_date_extraction(final_text, query)
+                
+                # Enhance with discography information if needed
+                final_text = self._enhance_discography_content(final_text, query)
             
             # Cache the result
             self._save_to_cache(cache_key, final_text)
@@ -473,6 +589,88 @@ class DataFetcher:
             logger.error(f"Critical error in fetch_kpop_info: {e}")
             # Return fallback response
             return f"**{query}**\n\nMaaf, terjadi kesalahan saat mengambil informasi. Silakan coba lagi nanti."
+        finally:
+            _scraped_sources.reset(sources_token)
+    
+    @staticmethod
+    def _entity_slug(value):
+        return re.sub(r"\s+", " ", str(value).lower()).strip()
+    
+    def _resolve_member_record(self, member_name, group_name):
+        """Record member unik: stage name persis, atau (jika grup diketahui) stage name terpanjang di awal
+        nama - enhanced query "Stage Full Korean from Group" diawali stage name"""
+        words = member_name.split()
+        sizes = range(len(words), 0, -1) if group_name else [len(words)]
+        for size in sizes:
+            candidates = self._members_by_stage_name(" ".join(words[:size]))
+            if group_name:
+                candidates = [record for record in candidates if record['Group'].lower() == group_name.lower().strip()]
+            if len(candidates) == 1:
+                return candidates[0]
+            if candidates:
+                return None  # Ambigu (nama sama di beberapa grup)
+        return None
+    
+    def _get_entity_key(self, query):
+        """Canonical entity key + type untuk entity store: satu key per idol ("member:<stage name>@<grup>")
+        untuk nama saja, "Member Group" maupun enhanced query, agar write dan clearcache memakai key sama"""
+        slug = self._entity_slug
+        member_name, group_name = self._parse_member_group_query(query)
+        if not group_name and query.lower().strip() in self._group_index:
+            return f"group:{slug(query)}", "group"
+        
+        record = self._resolve_member_record(member_name, group_name)
+        if record and record['Group']:
+            return f"member:{slug(record['Stage Name'])}@{slug(record['Group'])}", "member"
+        if group_name:
+            return f"member:{slug(member_name)}@{slug(group_name)}", "member"
+        return f"member:{slug(member_name)}", "member"
+    
+    def invalidate_entity(self, query):
+        """Hapus fakta tersimpan entity agar query berikutnya scraping ulang (blocking - panggil via to_thread)"""
+        entity_key, _ = self._get_entity_key(query)
+        self.entity_store.delete_facts(entity_key)
+        member_name, group_name = self._parse_member_group_query(query)
+        if entity_key.startswith("member:") and not group_name:
+            # Nama tanpa grup: hapus juga fakta nama ambigu ("member:<nama>" dan semua "member:<nama>@<grup>")
+            self.entity_store.delete_facts(f"member:{self._entity_slug(member_name)}", include_variants=True)
+        invalidate_local(self.redis_client, entity_patterns(query, ("kpop_info",)))
+        return entity_key
+    
+    def _build_context_from_store(self, query, entity_key, entity_type):
+        """Rakit konteks AI dari fakta tersimpan jika semua field wajib masih fresh"""
+        try:
+            stored_facts = self.entity_store.get_fresh_facts(entity_key)
+            if not stored_facts or any(field not in stored_facts for field in REQUIRED_FIELDS[entity_type]):
+                return None
+            
+            context = self.entity_store.build_context(query, stored_facts)
+            database_info = self._get_database_info(query)
+            if database_info:
+                context = f"{context}\n\n{database_info}"
+            
+            logger.info(f"Entity store hit for {entity_key}: {len(stored_facts)} fresh fields, scraping skipped")
+            return context
+        except Exception as e:
+            logger.error(f"Entity store lookup failed for {entity_key}: {e}")
+            return None
+    
+    def _store_scraped_facts(self, entity_key, scraped_sources):
+        """Extract fakta profil dari hasil scraping dan simpan per source (prioritas tertinggi menang)"""
+        try:
+            seen_fields = set()
+            for _, domain, results in sorted(scraped_sources, key=lambda item: item[0], reverse=True):
+                facts = {
+                    field: value for field, value in extract_profile_facts(results).items()
+                    if field not in seen_fields
+                }
+                if facts:
+                    seen_fields.update(facts)
+                    self.entity_store.save_facts(entity_key, facts, domain)
+            if seen_fields:
+                logger.info(f"Stored {len(seen_fields)} structured fields for {entity_key}")
+        except Exception as e:
+            logger.error(f"Structured fact extraction failed for {entity_key}: {e}")
     
     async def _scrape_websites_async(self, query, sorted_sites):
         """Optimized async scraping dengan TOP 3 MAIN SOURCES prioritas tertinggi"""
@@ -555,30 +753,48 @@ class DataFetcher:
                     return []
                 
                 site_timeout = site.get('timeout', 5)
+                site_start = time.perf_counter()
                 
-                async with self.session.get(
-                    url, 
-                    timeout=aiohttp.ClientTimeout(total=site_timeout),
-                    headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
-                ) as response:
-                    if response.status != 200:
-                        return []
-                    
-                    html = await response.text()
-                    soup = BeautifulSoup(html, "html.parser")
+                with tracer.span("scrape_site", site=url.split('/')[2]) as span:
+                    async with self.session.get(
+                        url, 
+                        timeout=aiohttp.ClientTimeout(total=site_timeout),
+                        headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+                    ) as response:
+                        if span:
+                            span.set_attribute("status", response.status)
+                        if response.status != 200:
+                            SCRAPE_RESULTS.inc(url.split('/')[2], "http_error")
+                            SCRAPE_LATENCY.observe(url.split('/')[2], value=time.perf_counter() - site_start)
+                            return []
+                        
+                        html = await response.text()
                     
-                    # Extract content berdasarkan site type
-                    site_results = self._extract_site_content(soup, site, url, query)
+                    with tracer.span("parse", bytes=len(html)):
+                        soup = BeautifulSoup(html, "html.parser")
+                        
+                        # Extract content berdasarkan site type
+                        site_results = self._extract_site_content(soup, site, url, query)
                     
                     # Track performance
                     site_domain = url.split('/')[2]
                     self._update_site_performance(site_domain, True, len(site_results))
+                    SCRAPE_RESULTS.inc(site_domain, "ok" if site_results else "empty")
+                    SCRAPE_LATENCY.observe(site_domain, value=time.perf_counter() - site_start)
+                    
+                    # Simpan hasil per source untuk structured fact extraction
+                    scraped_sources = _scraped_sources.get()
+                    if site_results and scraped_sources is not None:
+                        scraped_sources.append((site.get('priority', 0.5), site_domain, site_results))
                     
                     return site_results
                     
             except Exception as e:
                 site_domain = url.split('/')[2] if 'url' in locals() else 'unknown'
                 self._update_site_performance(site_domain, False, 0)
+                SCRAPE_RESULTS.inc(site_domain, "error")
+                if 'site_start' in locals():
+                    SCRAPE_LATENCY.observe(site_domain, value=time.perf_counter() - site_start)
                 logger.error(f"Async scraping failed for {site_domain}: {e}")
                 return []
     
@@ -1342,8 +1558,16 @@ class DataFetcher:
         return results
     
     def _clean_text(self, results):
-        """Bersihkan dan gabungkan teks hasil scraping"""
-        combined_text = " ".join(results)
+        """Bersihkan dan gabungkan teks hasil scraping (near-duplicate paragraf dibuang dulu).
+        Tidak di-trim ke budget di sini - PromptBuilder memilih konteks per kategori."""
+        paragraphs, dedup_stats = dedupe_paragraphs(results)
+        if dedup_stats["input_paragraphs"] != dedup_stats["output_paragraphs"]:
+            logger.info(
+                f"Dedup: {dedup_stats['input_paragraphs']} -> {dedup_stats['output_paragraphs']} paragraphs "
+                f"({dedup_stats['exact_duplicates']} exact, {dedup_stats['near_duplicates']} near dup, "
+                f"~{dedup_stats['output_tokens']} tokens)"
+            )
+        combined_text = " ".join(paragraphs)
         
         # Hapus URL
         clean_text = re.sub(r"http\S+", "", combined_text)
@@ -1469,8 +1693,8 @@ class DataFetcher:
         # Handle "secret" ambiguity: SECRET vs SECRET NUMBER
         if group_hint_lower == 'secret':
             # Check if member exists in either SECRET or SECRET NUMBER
-            secret_members = self.kpop_df[self.kpop_df['Group'] == 'SECRET']['Stage Name'].str.lower().tolist()
-            secret_number_members = self.kpop_df[self.kpop_df['Group'] == 'SECRET NUMBER']['Stage Name'].str.lower().tolist()
+            secret_members = [m['Stage Name'].lower() for m in self._members_by_group('SECRET')]
+            secret_number_members = [m['Stage Name'].lower() for m in self._members_by_group('SECRET NUMBER')]
             
             if member_name_lower in secret_members:
                 return 'SECRET'
@@ -1482,14 +1706,14 @@ class DataFetcher:
         
         # Handle other potential ambiguities
         # Check if group_hint matches any group in database (case-insensitive)
-        matching_groups = self.kpop_df[self.kpop_df['Group'].str.lower().str.contains(group_hint_lower, na=False)]['Group'].unique()
+        matching_groups = [group for lower, group in self._group_names.items() if group_hint_lower in lower]
         
         if len(matching_groups) == 1:
             return matching_groups[0]
         elif len(matching_groups) > 1:
             # Multiple matches - check which one contains the member
             for group in matching_groups:
-                group_members = self.kpop_df[self.kpop_df['Group'] == group]['Stage Name'].str.lower().tolist()
+                group_members = [m['Stage Name'].lower() for m in self._members_by_group(group)]
                 if member_name_lower in group_members:
                     return group
             
@@ -1506,16 +1730,16 @@ class DataFetcher:
         query_lower = query.lower().strip()
         
         # Try to find member in database
-        matches = self.kpop_df[self.kpop_df['Stage Name'].str.lower() == query_lower]
+        matches = self._members_by_stage_name(query_lower)
         
-        if matches.empty:
+        if not matches:
             return None
         elif len(matches) == 1:
             # Single match - return the group
-            return matches.iloc[0]['Group']
+            return matches[0]['Group'] or None
         else:
             # Multiple matches - use popularity/recency priority
-            groups = matches['Group'].unique()
+            groups = list(dict.fromkeys(m['Group'] for m in matches))
             
             # Priority groups (more popular/recent first)
             priority_groups = [
@@ -1529,9 +1753,8 @@ class DataFetcher:
                 if priority_group in groups:
                     return priority_group
             
-            # If no priority group, return first alphabetically (filter out NaN)
-            import pandas as pd
-            valid_groups = [g for g in groups if pd.notna(g) and str(g).strip()]
+            # If no priority group, return first alphabetically (filter out empty)
+            valid_groups = [g for g in groups if g]
             if valid_groups:
                 return sorted(valid_groups)[0]
             else:
@@ -1597,10 +1820,10 @@ class DataFetcher:
         query_lower = query.lower()
         
         # Search for group matches with discography enhancement
-        group_matches = self.kpop_df[self.kpop_df['Group'].str.lower() == query_lower]
-        if not group_matches.empty:
-            group_name = group_matches.iloc[0]['Group']
-            members = group_matches['Stage Name'].tolist()
+        group_matches = self._members_by_group(query_lower)
+        if group_matches:
+            group_name = group_matches[0]['Group']
+            members = [m['Stage Name'] for m in group_matches]
             
             # Add discography placeholder for groups with emoji pointers
             group_info = f"""
@@ -1614,8 +1837,7 @@ Database Info for {group_name}:
             database_info.append(group_info)
         
         # Search for individual member matches
-        member_matches = self.kpop_df[self.kpop_df['Stage Name'].str.lower() == query_lower]
-        for idx, member in member_matches.iterrows():
+        for member in self._members_by_stage_name(query_lower):
             stage_name = member.get('Stage Name', '')
             full_name = member.get('Full Name', '')
             korean_name = member.get('Korean Stage Name', '')
@@ -2512,7 +2734,7 @@ check official music platforms and databases like:
         alternatives = []
         
         # Find all members with same stage name
-        matches = self.kpop_df[self.kpop_df['Stage Name'].str.lower() == query_lower]
+        matches = self._members_by_stage_name(query_lower)
         
         if len(matches) > 1:  # Multiple members with same name
             # Sort by group popularity (prioritize well-known groups)
@@ -2520,7 +2742,7 @@ check official music platforms and databases like:
                             'VIVIZ', 'Dreamcatcher', 'MAMAMOO', 'Girls Generation', 'SNSD']
             
             # Create alternatives with full names and group context
-            for _, member in matches.iterrows():
+            for member in matches:
                 stage_name = member.get('Stage Name', '')
                 full_name = member.get('Full Name', '')
                 group = member.get('Group', '')
@@ -2539,12 +2761,9 @@ check official music platforms and databases like:
                         alternatives.insert(0, f"{stage_name} {group}")  # Prioritize popular groups
         
         # Also check for real names that might match stage names
-        real_name_matches = self.kpop_df[
-            (self.kpop_df['Full Name'].str.contains(query, case=False, na=False)) |
-            (self.kpop_df['Korean Stage Name'].str.contains(query, case=False, na=False))
-        ]
+        real_name_matches = self._members_by_real_name(query)
         
-        for _, member in real_name_matches.iterrows():
+        for member in real_name_matches:
             stage_name = member.get('Stage Name', '')
             group = member.get('Group', '')
             if stage_name and group:
@@ -2570,11 +2789,11 @@ check official music platforms and databases like:
         alternatives = []
         
         # Find exact match in database
-        exact_match = self.kpop_df[self.kpop_df['Stage Name'].str.lower() == query_lower]
+        exact_match = self._members_by_stage_name(query_lower)
         
-        if not exact_match.empty:
+        if exact_match:
             # Get the most popular/recent group for this name
-            member = exact_match.iloc[0]  # Take first match
+            member = exact_match[0]  # Take first match
             stage_name = member.get('Stage Name', '')
             full_name = member.get('Full Name', '')
             group = member.get('Group', '')
@@ -0,0 +1,301 @@
+"""
+Entity Store Module - Menyimpan fakta profil K-pop hasil scraping secara terstruktur
+Fakta (birthday, position, agency, instagram, dll) disimpan per entity dengan source dan timestamp,
+sehingga query berikutnya cukup merakit konteks AI dari field yang tersimpan.
+"""
+import json
+import os
+import re
+import time
+from core.logger import logger
+
+# Optional PostgreSQL imports dengan graceful fallback
+try:
+    from sqlalchemy import text
+    SQLALCHEMY_AVAILABLE = True
+except ImportError:
+    SQLALCHEMY_AVAILABLE = False
+
+DAY = 86400
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database_schema.sql")
+
+# Label di halaman profil -> nama field terstruktur
+FIELD_LABELS = {
+    "stage name": "stage_name",
+    "birth name": "birth_name",
+    "real name": "birth_name",
+    "full name": "birth_name",
+    "korean name": "korean_name",
+    "english name": "english_name",
+    "birthday": "birthday",
+    "birth date": "birthday",
+    "date of birth": "birthday",
+    "born": "birthday",
+    "position": "position",
+    "positions": "position",
+    "position(s)": "position",
+    "zodiac sign": "zodiac",
+    "chinese zodiac sign": "chinese_zodiac",
+    "height": "height",
+    "weight": "weight",
+    "blood type": "blood_type",
+    "mbti type": "mbti",
+    "mbti": "mbti",
+    "nationality": "nationality",
+    "birthplace": "birthplace",
+    "birth place": "birthplace",
+    "agency": "agency",
+    "company": "agency",
+    "label": "agency",
+    "debut": "debut",
+    "debut date": "debut",
+    "fandom name": "fandom",
+    "fandom": "fandom",
+    "official fan name": "fandom",
+    "instagram": "instagram",
+    "twitter": "twitter",
+    "x": "twitter",
+    "tiktok": "tiktok",
+    "youtube": "youtube",
+}
+
+# Freshness per field - fakta stabil disimpan lebih lama
+FIELD_TTLS = {
+    "stage_name": 90 * DAY,
+    "birth_name": 90 * DAY,
+    "korean_name": 90 * DAY,
+    "english_name": 90 * DAY,
+    "birthday": 180 * DAY,
+    "birthplace": 180 * DAY,
+    "nationality": 180 * DAY,
+    "zodiac": 180 * DAY,
+    "chinese_zodiac": 180 * DAY,
+    "blood_type": 180 * DAY,
+    "debut": 180 * DAY,
+    "height": 30 * DAY,
+    "weight": 30 * DAY,
+    "mbti": 30 * DAY,
+    "position": 14 * DAY,
+    "agency": 14 * DAY,
+    "fandom": 30 * DAY,
+    "instagram": 7 * DAY,
+    "twitter": 7 * DAY,
+    "tiktok": 7 * DAY,
+    "youtube": 7 * DAY,
+    "fun_facts": 7 * DAY,
+}
+DEFAULT_FIELD_TTL = 7 * DAY
+
+# Field minimum agar konteks dari store dianggap cukup (tanpa scraping ulang)
+REQUIRED_FIELDS = {
+    "member": ["birthday", "position", "instagram"],
+    "group": ["debut", "agency", "fandom"],
+}
+
+# Urutan dan label field saat merakit konteks untuk AI
+CONTEXT_LABELS = [
+    ("stage_name", "Stage Name"),
+    ("birth_name", "Birth Name"),
+    ("korean_name", "Korean Name"),
+    ("english_name", "English Name"),
+    ("birthday", "Birthday"),
+    ("birthplace", "Birthplace"),
+    ("nationality", "Nationality"),
+    ("position", "Position"),
+    ("agency", "Agency"),
+    ("debut", "Debut"),
+    ("fandom", "Fandom"),
+    ("zodiac", "Zodiac Sign"),
+    ("chinese_zodiac", "Chinese Zodiac Sign"),
+    ("height", "Height"),
+    ("weight", "Weight"),
+    ("blood_type", "Blood Type"),
+    ("mbti", "MBTI Type"),
+    ("instagram", "Instagram"),
+    ("twitter", "Twitter"),
+    ("tiktok", "TikTok"),
+    ("youtube", "YouTube"),
+]
+
+# "Label: value" dengan value berhenti sebelum label berikutnya
+_LABEL_PATTERN = re.compile(
+    r"(?<!\w)(?P<label>" + "|".join(sorted((re.escape(label) for label in FIELD_LABELS), key=len, reverse=True)) + r")\s*:\s*"
+    r"(?P<value>.+?)(?=\s+(?:" + "|".join(sorted((re.escape(label) for label in FIELD_LABELS), key=len, reverse=True)) + r")\s*:|[\n\r]|$)",
+    re.IGNORECASE,
+)
+
+
+def extract_profile_facts(texts):
+    """Parse teks profil hasil scraping menjadi dict {field: value}"""
+    facts = {}
+    for text in texts:
+        if not text:
+            continue
+        for match in _LABEL_PATTERN.finditer(text):
+            label = match.group("label").lower()
+            value = match.group("value").strip(" .;,|-")
+            field = FIELD_LABELS.get(label)
+            if not field or not value or len(value) > 200:
+                continue
+            # Label pendek seperti "x" atau "born" rawan false positive
+            if field == "birthday" and not any(char.isdigit() for char in value):
+                continue
+            if label == "x" and "@" not in value:
+                continue
+            # Source pertama (prioritas tertinggi) menang
+            facts.setdefault(field, value)
+    return facts
+
+
+class EntityStore:
+    """Per-entity fact store: PostgreSQL (kpop_entity_facts) -> Redis hash -> in-memory"""
+
+    TABLE_NAME = "kpop_entity_facts"
+    REDIS_PREFIX = "entity_facts:"
+
+    def __init__(self, engine=None, redis_client=None):
+        self.engine = engine if SQLALCHEMY_AVAILABLE else None
+        self.redis_client = redis_client
+        self._memory = {}  # {entity_key: {field: {"value", "source", "fetched_at"}}}
+        self._table_ready = False
+
+    @property
+    def backend(self):
+        if self.engine:
+            return "postgres"
+        if self.redis_client:
+            return "redis"
+        return "memory"
+
+    def _schema_statements(self):
+        """Statement DDL kpop_entity_facts dari database_schema.sql (satu sumber definisi tabel)"""
+        with open(SCHEMA_FILE, encoding="utf-8") as f:
+            lines = [line.split("--", 1)[0] for line in f.read().splitlines()]
+        statements = [statement.strip() for statement in "\n".join(lines).split(";")]
+        return [statement for statement in statements if self.TABLE_NAME in statement]
+
+    def _ensure_table(self):
+        """Buat companion table di samping kpop_members jika belum ada (DDL dari database_schema.sql)"""
+        if self._table_ready or not self.engine:
+            return
+        with self.engine.begin() as conn:
+            for statement in self._schema_statements():
+                conn.execute(text(statement))
+        self._table_ready = True
+
+    def get_facts(self, entity_key):
+        """Ambil semua fakta tersimpan untuk entity: {field: {"value", "source", "fetched_at"}}"""
+        try:
+            if self.engine:
+                self._ensure_table()
+                with self.engine.connect() as conn:
+                    rows = conn.execute(text(f"""
+                        SELECT field, value, source, EXTRACT(EPOCH FROM fetched_at) AS fetched_at
+                        FROM {self.TABLE_NAME}
+                        WHERE entity_key = :entity_key
+                    """), {"entity_key": entity_key})
+                    return {
+                        row.field: {"value": row.value, "source": row.source, "fetched_at": float(row.fetched_at)}
+                        for row in rows
+                    }
+            if self.redis_client:
+                raw = self.redis_client.hgetall(f"{self.REDIS_PREFIX}{entity_key}")
+                facts = {}
+                for field, payload in raw.items():
+                    if isinstance(field, bytes):
+                        field = field.decode("utf-8")
+                    facts[field] = json.loads(payload)
+                return facts
+        except Exception as e:
+            logger.error(f"Entity store read error for {entity_key}: {e}")
+            return {}
+        return dict(self._memory.get(entity_key, {}))
+
+    def save_facts(self, entity_key, facts, source):
+        """Simpan/replace fakta entity dengan source dan timestamp sekarang"""
+        if not facts:
+            return
+        now = time.time()
+        try:
+            if self.engine:
+                self._ensure_table()
+                with self.engine.begin() as conn:
+                    for field, value in facts.items():
+                        conn.execute(text(f"""
+                            INSERT INTO {self.TABLE_NAME} (entity_key, field, value, source, fetched_at)
+                            VALUES (:entity_key, :field, :value, :source, TO_TIMESTAMP(:fetched_at))
+                            ON CONFLICT (entity_key, field) DO UPDATE
+                            SET value = EXCLUDED.value, source = EXCLUDED.source, fetched_at = EXCLUDED.fetched_at
+                        """), {"entity_key": entity_key, "field": field, "value": value, "source": source, "fetched_at": now})
+            elif self.redis_client:
+                mapping = {
+                    field: json.dumps({"value": value, "source": source, "fetched_at": now}, ensure_ascii=False)
+                    for field, value in facts.items()
+                }
+                redis_key = f"{self.REDIS_PREFIX}{entity_key}"
+                self.redis_client.hset(redis_key, mapping=mapping)
+                # Hash ikut expire setelah field paling awet basi
+                self.redis_client.expire(redis_key, max(FIELD_TTLS.values()))
+            else:
+                entry = self._memory.setdefault(entity_key, {})
+                for field, value in facts.items():
+                    entry[field] = {"value": value, "source": source, "fetched_at": now}
+            logger.debug(f"Entity store saved {len(facts)} fields for {entity_key} from {source}")
+        except Exception as e:
+            logger.error(f"Entity store write error for {entity_key}: {e}")
+
+    def delete_facts(self, entity_key, include_variants=False):
+        """Hapus semua fakta entity (dipakai !sn clearcache <nama>).
+        include_variants: ikut hapus varian per grup "<entity_key>@<grup>" (clearcache tanpa nama grup)"""
+        variant_prefix = f"{entity_key}@"
+        try:
+            if self.engine:
+                self._ensure_table()
+                with self.engine.begin() as conn:
+                    if include_variants:
+                        escaped = re.sub(r"([\\%_])", r"\\\1", variant_prefix)
+                        conn.execute(text(f"DELETE FROM {self.TABLE_NAME} WHERE entity_key = :entity_key "
+                                          f"OR entity_key LIKE :pattern ESCAPE '\\'"),
+                                     {"entity_key": entity_key, "pattern": f"{escaped}%"})
+                    else:
+                        conn.execute(text(f"DELETE FROM {self.TABLE_NAME} WHERE entity_key = :entity_key"),
+                                     {"entity_key": entity_key})
+            elif self.redis_client:
+                keys = [f"{self.REDIS_PREFIX}{entity_key}"]
+                if include_variants:
+                    pattern = re.sub(r"([*?\[\]\\])", r"\\\1", f"{self.REDIS_PREFIX}{variant_prefix}") + "*"
+                    keys.extend(self.redis_client.scan_iter(match=pattern, count=100))
+                self.redis_client.delete(*keys)
+            else:
+                for key in [key for key in self._memory if key == entity_key
+                            or (include_variants and key.startswith(variant_prefix))]:
+                    del self._memory[key]
+        except Exception as e:
+            logger.error(f"Entity store delete error for {entity_key}: {e}")
+    
+    @staticmethod
+    def is_fresh(fact, field, now=None):
+        now = now or time.time()
+        return now - fact.get("fetched_at", 0) < FIELD_TTLS.get(field, DEFAULT_FIELD_TTL)
+
+    def get_fresh_facts(self, entity_key):
+        """Fakta yang masih dalam freshness window"""
+        now = time.time()
+        return {
+            field: fact for field, fact in self.get_facts(entity_key).items()
+            if self.is_fresh(fact, field, now)
+        }
+
+    def build_context(self, display_name, facts):
+        """Rakit konteks AI dari field tersimpan (format 'Label: value' seperti halaman profil)"""
+        lines = [f"Profile of {display_name}:"]
+        for field, label in CONTEXT_LABELS:
+            if field in facts:
+                lines.append(f"{label}: {facts[field]['value']}")
+        if "fun_facts" in facts:
+            lines.append("\n🎭 **Fun Facts & Trivia:**")
+            lines.extend(f"• {fact}" for fact in facts["fun_facts"]["value"].split("\n") if fact.strip())
+        sources = sorted({fact.get("source") for fact in facts.values() if fact.get("source")})
+        if sources:
+            lines.append(f"(Sources: {', '.join(sources)})")
+        return "\n".join(lines)
@@ -0,0 +1,121 @@
+"""
+Local Cache Module - Cache in-process (per worker) di depan Redis bersama
+Hanya key cache berversi (sn:{namespace}:v..g..) yang di-cache lokal: value-nya immutable per
+generation, jadi clear namespace (bump generation) otomatis terlihat. Clear per entity (UNLINK)
+di worker lain baru terlihat setelah LOCAL_CACHE_TTL detik - sengaja dibuat singkat.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from utils.cache_keys import CACHE_KEY_PREFIX, NAMESPACE_VERSIONS
+from core.metrics import record_cache
+
+LOCAL_CACHE_TTL = float(os.getenv("LOCAL_CACHE_TTL", "60"))  # 0 = nonaktif
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "1000"))
+
+_CACHEABLE_PREFIXES = tuple(f"{CACHE_KEY_PREFIX}:{namespace}:v" for namespace in NAMESPACE_VERSIONS)
+
+
+def _key_str(key):
+    return key.decode("utf-8", errors="replace") if isinstance(key, bytes) else str(key)
+
+
+class LocalCachedRedis:
+    """Wrapper redis (CompressedRedis) dengan L1 LRU/TTL untuk get/set key cache berversi.
+    Command lain diteruskan langsung ke client di bawahnya."""
+
+    def __init__(self, client, ttl=LOCAL_CACHE_TTL, max_entries=LOCAL_CACHE_MAX_ENTRIES):
+        self._client = client
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # {key: (value, expires_at)}
+        self.stats = {"hits": 0, "misses": 0}
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    @property
+    def raw_client(self):
+        return getattr(self._client, "raw_client", self._client)
+
+    def _cacheable(self, key):
+        return self.ttl > 0 and _key_str(key).startswith(_CACHEABLE_PREFIXES)
+
+    def _store(self, key, value, redis_ttl=None):
+        ttl = min(self.ttl, redis_ttl) if redis_ttl else self.ttl
+        with self._lock:
+            self._entries[_key_str(key)] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(_key_str(key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        if not self._cacheable(key):
+            return self._client.get(key)
+        name = _key_str(key)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry and entry[1] > time.monotonic():
+                self._entries.move_to_end(name)
+                self.stats["hits"] += 1
+                record_cache("local", True)
+                return entry[0]
+            self._entries.pop(name, None)
+            self.stats["misses"] += 1
+        record_cache("local", False)
+        value = self._client.get(key)
+        if value is not None:
+            self._store(key, value)
+        return value
+
+    def set(self, key, value, ex=None, **kwargs):
+        result = self._client.set(key, value, ex=ex, **kwargs)
+        if self._cacheable(key):
+            self.invalidate(key)  # Bentuk value hasil get (bytes/str) ditentukan client, isi ulang saat get
+        return result
+
+    def setex(self, key, time_seconds, value, **kwargs):
+        result = self._client.setex(key, time_seconds, value, **kwargs)
+        if self._cacheable(key):
+            self.invalidate(key)
+        return result
+
+    def delete(self, *keys):
+        for key in keys:
+            self.invalidate(key)
+        return self._client.delete(*keys)
+
+    def unlink(self, *keys):
+        for key in keys:
+            self.invalidate(key)
+        return self._client.unlink(*keys)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(_key_str(key), None)
+
+    def invalidate_prefix(self, prefix):
+        """Buang entry lokal dengan prefix tertentu (clear entity di worker ini)"""
+        with self._lock:
+            for name in [name for name in self._entries if name.startswith(prefix)]:
+                del self._entries[name]
+
+    def local_stats(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "hits": self.stats["hits"],
+                "misses": self.stats["misses"],
+                "hit_rate": round(self.stats["hits"] / lookups * 100, 1) if lookups else 0.0,
+                "ttl": self.ttl,
+            }
+
+
+def wrap_local_cache(client):
+    """Pasang L1 cache di depan client (idempotent, nonaktif jika LOCAL_CACHE_TTL=0)"""
+    if client is None or isinstance(client, LocalCachedRedis) or LOCAL_CACHE_TTL <= 0:
+        return client
+    return LocalCachedRedis(client)
@@ -0,0 +1,102 @@
+"""
+Message Delivery Module - Kirim teks panjang dalam pesan sesedikit mungkin
+Teks <= 2000 karakter dikirim sebagai pesan biasa. Teks lebih panjang dipecah di batas paragraf/baris/kata
+menjadi embed (description maks 4096 karakter, maks 10 embed dan 6000 karakter total per pesan).
+Tidak ada sleep tetap antar pesan: discord.py sudah menahan request berdasarkan header
+X-RateLimit-Remaining/Reset-After per bucket; 429 yang lolos di-retry sesuai header Retry-After.
+"""
+import asyncio
+import discord
+from core.logger import logger
+
+MESSAGE_LIMIT = 2000
+EMBED_DESCRIPTION_LIMIT = 4096
+EMBED_TOTAL_LIMIT = 6000  # Total karakter semua embed dalam satu pesan
+MAX_EMBEDS_PER_MESSAGE = 10
+MIN_EMBED_CHARS = 200  # Sisa budget lebih kecil dari ini -> lanjut di pesan berikutnya
+DEFAULT_EMBED_COLOR = 0xFF69B4
+MAX_RATE_LIMIT_RETRIES = 2
+
+
+def take_prefix(text, limit):
+    """Potong text <= limit di batas paling natural (paragraf > baris > kata). Return (head, rest)"""
+    if len(text) <= limit:
+        return text, ""
+    window = text[:limit]
+    for separator in ("\n\n", "\n", " "):
+        cut = window.rfind(separator)
+        if cut >= limit // 2:
+            return text[:cut].rstrip(), text[cut + len(separator):].lstrip()
+    return window, text[limit:]  # Tidak ada batas natural (kata/URL sangat panjang)
+
+
+def split_text(text, limit=MESSAGE_LIMIT):
+    """Pecah text menjadi chunk <= limit"""
+    chunks = []
+    rest = text.strip()
+    while rest:
+        chunk, rest = take_prefix(rest, limit)
+        if chunk:
+            chunks.append(chunk)
+    return chunks
+
+
+def plan_embed_messages(text, embed_limit=EMBED_DESCRIPTION_LIMIT, total_limit=EMBED_TOTAL_LIMIT,
+                        max_embeds=MAX_EMBEDS_PER_MESSAGE):
+    """Rencana pengiriman: list pesan, tiap pesan list description embed (dalam batas Discord)"""
+    messages = []
+    rest = text.strip()
+    while rest:
+        descriptions = []
+        budget = total_limit
+        while rest and len(descriptions) < max_embeds and budget >= min(MIN_EMBED_CHARS, len(rest)):
+            description, rest = take_prefix(rest, min(embed_limit, budget))
+            if description:
+                descriptions.append(description)
+                budget -= len(description)
+        messages.append(descriptions)
+    return messages
+
+
+async def _send_with_retry(destination, **kwargs):
+    """ctx.send dengan retry 429 sesuai Retry-After (discord.py sudah pacing per bucket)"""
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        try:
+            return await destination.send(**kwargs)
+        except discord.HTTPException as e:
+            if e.status != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                raise
+            retry_after = float(getattr(e, "retry_after", 0) or
+                                (e.response.headers.get("Retry-After", 1) if e.response is not None else 1))
+            logger.warning(f"Discord 429 on send, retrying after {retry_after:.2f}s")
+            await asyncio.sleep(retry_after)
+
+
+async def deliver_text(destination, text, color=DEFAULT_EMBED_COLOR):
+    """Kirim text ke ctx/channel dengan jumlah pesan minimal. Return jumlah pesan terkirim"""
+    text = (text or "").strip()
+    if not text:
+        return 0
+    if len(text) <= MESSAGE_LIMIT:
+        await _send_with_retry(destination, content=text)
+        return 1
+
+    plan = plan_embed_messages(text)
+    logger.info(f"Delivering {len(text)} characters in {len(plan)} message(s), "
+                f"{sum(len(descriptions) for descriptions in plan)} embed(s)")
+    sent = 0
+    for index, descriptions in enumerate(plan):
+        embeds = [discord.Embed(description=description, color=color) for description in descriptions]
+        try:
+            await _send_with_retry(destination, embeds=embeds)
+            sent += 1
+        except discord.Forbidden:
+            # Tanpa permission Embed Links: fallback pesan biasa untuk sisa teks
+            logger.warning("Missing embed permission, falling back to plain messages")
+            for chunk in split_text("\n\n".join(d for remaining in plan[index:] for d in remaining)):
+                await _send_with_retry(destination, content=chunk)
+                sent += 1
+            break
+        except Exception as e:
+            logger.error(f"Failed to deliver message {index + 1}/{len(plan)}: {e}")
+    return sent
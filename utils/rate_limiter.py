@@ -0,0 +1,123 @@
+"""
+Rate Limiter Module - Async token bucket per bucket id (mis. per Gemini API key + model)
+Backend in-memory secara default; jika REDIS_URL tersedia dan distributed=True, bucket disimpan di Redis
+dan diupdate atomik via Lua script sehingga limit berlaku lintas process/shard.
+"""
+import asyncio
+import time
+from core.logger import logger
+
+# Optional async Redis dengan graceful fallback ke in-memory
+try:
+    import redis.asyncio as redis_async
+    REDIS_ASYNC_AVAILABLE = True
+except ImportError:
+    REDIS_ASYNC_AVAILABLE = False
+
+# Reservasi token: token boleh negatif (antrian), caller menunggu -tokens/rate detik.
+# Reservasi yang melebihi max_wait di-refund dan ditolak (return -1).
+TOKEN_BUCKET_LUA = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local max_wait = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local data = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(data[1])
+local ts = tonumber(data[2])
+if tokens == nil then
+  tokens = capacity
+  ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local remaining = tokens - requested
+local wait = 0
+if remaining < 0 then
+  wait = -remaining / rate
+end
+if wait > max_wait then
+  redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+  redis.call('EXPIRE', key, math.ceil(capacity / rate) + 60)
+  return '-1'
+end
+redis.call('HSET', key, 'tokens', tostring(remaining), 'ts', tostring(now))
+redis.call('EXPIRE', key, math.ceil((capacity - remaining) / rate) + 60)
+return tostring(wait)
+"""
+
+
+class TokenBucketLimiter:
+    """Token bucket async: acquire() hanya menunggu bucket yang dipakai, tidak global"""
+
+    def __init__(self, rate_per_minute=60, capacity=2, max_wait=10.0, redis_url=None, prefix="ratelimit"):
+        self.rate = rate_per_minute / 60.0  # token per detik
+        self.capacity = capacity
+        self.max_wait = max_wait
+        self.prefix = prefix
+        self._buckets = {}  # {bucket_id: [tokens, last_ts]}
+        self._redis = None
+        self._script = None
+        if redis_url and REDIS_ASYNC_AVAILABLE:
+            try:
+                self._redis = redis_async.from_url(redis_url)
+                self._script = self._redis.register_script(TOKEN_BUCKET_LUA)
+                logger.info(f"Distributed token bucket enabled ({prefix}, {rate_per_minute}/min, burst {capacity})")
+            except Exception as e:
+                logger.warning(f"Redis token bucket unavailable, using in-memory: {e}")
+                self._redis = None
+
+    @property
+    def backend(self):
+        return "redis" if self._redis else "memory"
+
+    def _reserve_local(self, bucket_id, tokens):
+        now = time.monotonic()
+        bucket = self._buckets.setdefault(bucket_id, [float(self.capacity), now])
+        available = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+        remaining = available - tokens
+        wait = -remaining / self.rate if remaining < 0 else 0.0
+        if wait > self.max_wait:
+            bucket[0], bucket[1] = available, now
+            return -1.0
+        bucket[0], bucket[1] = remaining, now
+        return wait
+
+    async def _reserve_redis(self, bucket_id, tokens):
+        result = await self._script(
+            keys=[f"{self.prefix}:{bucket_id}"],
+            args=[self.rate, self.capacity, tokens, self.max_wait],
+        )
+        return float(result.decode() if isinstance(result, bytes) else result)
+
+    async def acquire(self, bucket_id, tokens=1):
+        """Reservasi token lalu tunggu giliran. Return detik menunggu, atau None jika antrian
+        melebihi max_wait (caller sebaiknya pindah ke bucket/key lain)."""
+        if self._redis:
+            try:
+                wait = await self._reserve_redis(bucket_id, tokens)
+            except Exception as e:
+                logger.warning(f"Redis token bucket error, falling back to in-memory: {e}")
+                wait = self._reserve_local(bucket_id, tokens)
+        else:
+            wait = self._reserve_local(bucket_id, tokens)
+
+        if wait < 0:
+            return None
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def snapshot(self):
+        """State bucket in-memory (untuk monitoring)"""
+        now = time.monotonic()
+        return {
+            bucket_id: round(min(self.capacity, tokens + (now - ts) * self.rate), 2)
+            for bucket_id, (tokens, ts) in self._buckets.items()
+        }
+
+    async def close(self):
+        if self._redis:
+            await self._redis.close()
+            self._redis = None
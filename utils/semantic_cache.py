@@ -0,0 +1,219 @@
+"""
+Semantic Cache Module - Cache respons obrolan casual berdasarkan kemiripan pesan
+Pesan dinormalisasi (lowercase, tanpa tanda baca, stopword dibuang), dipecah jadi character shingle,
+lalu dicari kandidat via MinHash + LSH banding dan diverifikasi dengan Jaccard exact.
+"halo min apa kabar", "haloo minn!! apa kabar?" dan "apa kabar halo min" berbagi entry yang sama.
+Negasi, kata tanya dan kata ganti tidak dibuang, dan hit mensyaratkan negasi/kata tanya yang sama persis
+("aku suka kamu" != "aku tidak suka kamu"). Pesan dengan kata konten < CASUAL_CACHE_MIN_TOKENS hanya
+dicocokkan exact setelah normalisasi ("siapa bias kamu" == "siapa bias kamu??"), tanpa LSH - makna pesan
+pendek terlalu bergantung pada kata fungsi untuk near-match.
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from patch.stopwordlist import STOPWORDS
+from utils.text_dedup import NUM_PERMUTATIONS, minhash_signature
+
+SEMANTIC_THRESHOLD = float(os.getenv("CASUAL_CACHE_THRESHOLD", "0.7"))
+SEMANTIC_MAX_ENTRIES = int(os.getenv("CASUAL_CACHE_MAX_ENTRIES", "2000"))
+SEMANTIC_TTL = int(os.getenv("CASUAL_CACHE_TTL", "3600"))
+SEMANTIC_MIN_TOKENS = int(os.getenv("CASUAL_CACHE_MIN_TOKENS", "2"))  # Minimal kata konten (non-stopword)
+
+CHAR_SHINGLE_SIZE = 3
+# 16 band x 2 row: pasangan dengan Jaccard ~0.7 hampir pasti jadi kandidat
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+
+# Kata yang mengubah makna/maksud pesan: tetap ikut normalisasi walau ada di STOPWORDS
+NEGATION_WORDS = {"tidak", "tak", "gak", "ga", "nggak", "enggak", "bukan", "belum", "jangan", "no", "not"}
+QUESTION_WORDS = {"apa", "siapa", "kapan", "kenapa", "mengapa", "bagaimana", "gimana", "dimana", "mana",
+                  "berapa", "what", "who", "when", "why", "how", "where"}
+PRONOUNS = {"aku", "kamu", "saya", "dia", "kami", "kita", "mereka"}
+_MARKER_WORDS = NEGATION_WORDS | QUESTION_WORDS
+_STOPWORDS = set(STOPWORDS) - _MARKER_WORDS - PRONOUNS
+
+
+def normalize_message(text):
+    """Lowercase, buang URL/mention/tanda baca, huruf berulang ("haloo" -> "halo") dan stopword"""
+    text = re.sub(r"http\S+|<[@#:!&]?\S+?>", " ", (text or "").lower())
+    text = re.sub(r"[^\w\s]", " ", text)
+    text = re.sub(r"(\w)\1+", r"\1", text)
+    tokens = text.split()
+    content = [token for token in tokens if token not in _STOPWORDS]
+    # Pesan yang seluruhnya stopword ("lagi dong") tetap dibedakan dari pesan kosong
+    return " ".join(content or tokens)
+
+
+def message_markers(normalized):
+    """Negasi + kata tanya dalam pesan ternormalisasi - harus sama persis untuk cache hit"""
+    return frozenset(token for token in normalized.split() if token in _MARKER_WORDS)
+
+
+def content_token_count(normalized):
+    """Jumlah kata konten (bukan stopword, negasi, kata tanya atau kata ganti)"""
+    return sum(1 for token in normalized.split()
+               if token not in _STOPWORDS and token not in _MARKER_WORDS and token not in PRONOUNS)
+
+
+def char_shingles(normalized):
+    """Character n-gram per token (dengan batas kata) - tahan typo dan urutan kata"""
+    shingles = set()
+    for token in normalized.split():
+        padded = f" {token} "
+        if len(padded) <= CHAR_SHINGLE_SIZE:
+            shingles.add(padded)
+            continue
+        shingles.update(padded[i:i + CHAR_SHINGLE_SIZE] for i in range(len(padded) - CHAR_SHINGLE_SIZE + 1))
+    return shingles
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class SemanticCache:
+    """In-memory near-duplicate cache: OrderedDict (LRU) + LSH band index + TTL + hit count per entry"""
+
+    def __init__(self, threshold=SEMANTIC_THRESHOLD, max_entries=SEMANTIC_MAX_ENTRIES, ttl=SEMANTIC_TTL,
+                 min_tokens=SEMANTIC_MIN_TOKENS):
+        self.threshold = threshold
+        self.min_tokens = min_tokens
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # {normalized: {"response", "shingles", "markers", "bands", "hits", "created_at", "sample"}}
+        self._bands = {}  # {(band_index, band_hash): set(normalized)}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _band_keys(signature):
+        return [
+            (band, hash(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]))
+            for band in range(LSH_BANDS)
+        ]
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if not entry:
+            return
+        for band_key in entry["bands"]:
+            bucket = self._bands.get(band_key)
+            if bucket:
+                bucket.discard(key)
+                if not bucket:
+                    del self._bands[band_key]
+
+    def _is_expired(self, entry, now):
+        return self.ttl and now - entry["created_at"] > self.ttl
+
+    def get(self, message):
+        """Return (response, similarity) untuk pesan mirip, atau (None, 0.0)"""
+        normalized = normalize_message(message)
+        if not normalized:
+            return None, 0.0
+        markers = message_markers(normalized)
+        now = time.time()
+        with self._lock:
+            # Fast path: hasil normalisasi identik (satu-satunya jalur untuk pesan pendek)
+            entry = self._entries.get(normalized)
+            if entry and not self._is_expired(entry, now):
+                return self._record_hit(normalized, entry), 1.0
+            if content_token_count(normalized) < self.min_tokens:
+                self.misses += 1
+                return None, 0.0
+
+            shingles = char_shingles(normalized)
+            signature = minhash_signature(shingles)
+            if not signature:
+                self.misses += 1
+                return None, 0.0
+
+            candidates = set()
+            for band_key in self._band_keys(signature):
+                candidates.update(self._bands.get(band_key, ()))
+
+            best_key, best_score = None, 0.0
+            for key in candidates:
+                candidate = self._entries[key]
+                if self._is_expired(candidate, now) or candidate["markers"] != markers:
+                    continue
+                score = jaccard(shingles, candidate["shingles"])
+                if score > best_score:
+                    best_key, best_score = key, score
+
+            if best_key is not None and best_score >= self.threshold:
+                return self._record_hit(best_key, self._entries[best_key]), best_score
+
+            self.misses += 1
+            return None, best_score
+
+    def _record_hit(self, key, entry):
+        entry["hits"] += 1
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry["response"]
+
+    def set(self, message, response):
+        normalized = normalize_message(message)
+        if not normalized or not response:
+            return
+        shingles = char_shingles(normalized)
+        signature = minhash_signature(shingles)
+        if not signature:
+            return
+        now = time.time()
+        with self._lock:
+            self._remove(normalized)
+            # Pesan pendek tidak masuk index LSH - hanya bisa hit lewat exact match
+            bands = self._band_keys(signature) if content_token_count(normalized) >= self.min_tokens else []
+            self._entries[normalized] = {
+                "response": response,
+                "shingles": shingles,
+                "markers": message_markers(normalized),
+                "bands": bands,
+                "hits": 0,
+                "created_at": now,
+                "sample": message[:50],
+            }
+            for band_key in bands:
+                self._bands.setdefault(band_key, set()).add(normalized)
+            self._evict(now)
+
+    def _evict(self, now):
+        # Buang entry expired dulu, lalu LRU sampai di bawah kapasitas
+        if self.ttl:
+            for key in [key for key, entry in self._entries.items() if self._is_expired(entry, now)]:
+                self._remove(key)
+                self.evictions += 1
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bands.clear()
+
+    def top_entries(self, limit=5):
+        """Entry dengan hit terbanyak: [(sample, hits)]"""
+        with self._lock:
+            ranked = sorted(self._entries.values(), key=lambda entry: entry["hits"], reverse=True)
+            return [(entry["sample"], entry["hits"]) for entry in ranked[:limit]]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total * 100, 1) if total else 0.0,
+            "evictions": self.evictions,
+            "threshold": self.threshold,
+        }
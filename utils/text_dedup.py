@@ -0,0 +1,158 @@
+"""
+Text Dedup Module - Eliminasi paragraf near-duplicate sebelum prompt ke Gemini
+Hasil scraping dari kprofiles (group + member page), fandom dan wiki sering mengulang fakta yang sama.
+Tahapan: normalized-hash (exact dup) -> MinHash shingle similarity (near dup) -> opsional ranking
+information density + trim ke token budget. Paragraf yang lolos dikembalikan dalam urutan aslinya.
+DataFetcher hanya memakai tahap dedup; budget prompt per kategori diatur PromptBuilder.
+"""
+import os
+import re
+import zlib
+
+# Jumlah permutasi MinHash - 32 cukup untuk threshold ~0.8 dengan paragraf pendek
+NUM_PERMUTATIONS = 32
+SHINGLE_SIZE = 3
+SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.8"))
+MIN_TRUNCATED_TOKENS = 50  # Sisa budget lebih kecil dari ini tidak dipakai untuk potongan paragraf
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Koefisien permutasi deterministik (a, b) - tidak bergantung PYTHONHASHSEED
+_PERMUTATIONS = [
+    (zlib.crc32(f"a{i}".encode()) | 1, zlib.crc32(f"b{i}".encode()))
+    for i in range(NUM_PERMUTATIONS)
+]
+
+_LABEL_PATTERN = re.compile(r"\b[\w() ]{2,25}:\s*\S")
+
+
+def estimate_tokens(text):
+    """Estimasi kasar token Gemini (~4 karakter per token)"""
+    return max(1, len(text) // 4) if text else 0
+
+
+def _normalize(text):
+    text = re.sub(r"http\S+", " ", text.lower())
+    text = re.sub(r"<.*?>", " ", text)
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def build_shingles(tokens):
+    if len(tokens) < SHINGLE_SIZE:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(shingles):
+    hashes = [zlib.crc32(shingle.encode()) for shingle in shingles]
+    if not hashes:
+        return None
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def estimated_similarity(sig_a, sig_b):
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERMUTATIONS
+
+
+def information_density(text):
+    """Skor informasi: rasio token unik + bonus angka (tanggal/tinggi) dan pola 'Label: value'"""
+    tokens = _normalize(text).split()
+    if not tokens:
+        return 0.0
+    unique_ratio = len(set(tokens)) / len(tokens)
+    digit_bonus = min(sum(1 for token in tokens if any(char.isdigit() for char in token)) / len(tokens), 0.3)
+    label_bonus = min(len(_LABEL_PATTERN.findall(text)) * 0.05, 0.3)
+    return unique_ratio + digit_bonus + label_bonus
+
+
+def truncate_words(text, max_tokens):
+    """Potong text di batas kata agar muat max_tokens"""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    boundary = cut.rfind(" ")
+    return (cut[:boundary] if boundary > 0 else cut).rstrip()
+
+
+def split_paragraphs(results):
+    """Pecah hasil scraping menjadi paragraf (per item, dipisah baris kosong)"""
+    paragraphs = []
+    for result in results:
+        if not result:
+            continue
+        for paragraph in re.split(r"\n\s*\n", str(result)):
+            paragraph = paragraph.strip()
+            if paragraph:
+                paragraphs.append(paragraph)
+    return paragraphs
+
+
+def dedupe_paragraphs(results, similarity_threshold=SIMILARITY_THRESHOLD, token_budget=None):
+    """Drop paragraf (near-)duplicate. Jika token_budget diisi, sisanya diranking berdasarkan information
+    density dan di-trim ke budget (paragraf yang lebih besar dari sisa budget dipotong, bukan dibuang).
+    Return (paragraphs, stats)."""
+    paragraphs = split_paragraphs(results)
+    seen_hashes = set()
+    kept = []  # [(position, paragraph, signature)]
+    exact_dups = 0
+    near_dups = 0
+
+    for position, paragraph in enumerate(paragraphs):
+        normalized = _normalize(paragraph)
+        if not normalized:
+            continue
+        digest = zlib.crc32(normalized.encode())
+        if digest in seen_hashes:
+            exact_dups += 1
+            continue
+        seen_hashes.add(digest)
+
+        signature = minhash_signature(build_shingles(normalized.split()))
+        duplicate_of = None
+        for index, (_, other, other_signature) in enumerate(kept):
+            if signature and other_signature and estimated_similarity(signature, other_signature) >= similarity_threshold:
+                duplicate_of = index
+                break
+
+        if duplicate_of is None:
+            kept.append((position, paragraph, signature))
+        else:
+            near_dups += 1
+            # Simpan versi yang lebih informatif dari pasangan duplicate
+            other_position, other, other_signature = kept[duplicate_of]
+            if information_density(paragraph) * len(paragraph) > information_density(other) * len(other):
+                kept[duplicate_of] = (other_position, paragraph, signature)
+
+    # Ranking by density, isi token budget, lalu kembalikan ke urutan asli
+    ranked = sorted(kept, key=lambda item: information_density(item[1]), reverse=True)
+    selected = []
+    used_tokens = 0
+    truncated = 0
+    for position, paragraph, _ in ranked:
+        tokens = estimate_tokens(paragraph)
+        if token_budget and used_tokens + tokens > token_budget:
+            remaining = token_budget - used_tokens
+            if remaining < MIN_TRUNCATED_TOKENS:
+                continue
+            paragraph = truncate_words(paragraph, remaining)
+            tokens = estimate_tokens(paragraph)
+            truncated += 1
+        selected.append((position, paragraph))
+        used_tokens += tokens
+
+    selected.sort(key=lambda item: item[0])
+    stats = {
+        "input_paragraphs": len(paragraphs),
+        "exact_duplicates": exact_dups,
+        "near_duplicates": near_dups,
+        "trimmed": len(kept) - len(selected),
+        "truncated": truncated,
+        "output_paragraphs": len(selected),
+        "output_tokens": used_tokens,
+    }
+    return [paragraph for _, paragraph in selected], stats